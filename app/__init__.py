@@ -9,6 +9,10 @@ load_dotenv()
 app = Flask(__name__)
 app.secret_key = os.environ.get("FLASK_SECRET_KEY", "dev_secret_key")
 
+# Dane sesji trzymamy po stronie serwera, w ciasteczku jest tylko identyfikator
+from app.sessions import ServerSideSessionInterface
+app.session_interface = ServerSideSessionInterface()
+
 # Import i rejestracja Blueprint
 from app.routes import routes
 app.register_blueprint(routes)
@@ -0,0 +1,308 @@
+"""
+Asynchroniczne (asyncio + httpx) odpowiedniki scrapera i klienta Spotify.
+
+Zapytania w locie nie zajmują wątków - tysiące wyszukiwań naraz obsługuje
+jedna pętla zdarzeń i jedna pula połączeń na host. Cache, indeks utworów,
+rejestr list, harmonogram zapytań do Spotify i metryki są te same co w wersji
+synchronicznej, więc obie wersje korzystają z tych samych wyników. Ich
+blokujące operacje (SQLite, Redis, blokady indeksu) wykonywane są w wątkach
+(asyncio.to_thread), żeby nie zatrzymywać pętli.
+
+Użycie (np. w widoku `async def` Flaska - wymaga `pip install "flask[async]"` -
+albo w workerze):
+
+    from app import aio
+
+    songs = await aio.get_top_100("2024-01-15")
+    client = aio.AsyncSpotifyClient(token_info)
+    url = await client.create_playlist_from_songs("2024-01-15", songs)
+
+httpx jest opcjonalne: `pip install httpx`. Liczbę wyszukiwań w locie
+ogranicza ASYNC_SPOTIFY_CONCURRENCY (domyślnie 256); tempo zapytań i tak
+wyznacza wspólny harmonogram (SPOTIFY_RATE_LIMIT).
+"""
+import asyncio
+import os
+import weakref
+from urllib.parse import quote
+from spotipy.exceptions import SpotifyException
+from . import metrics
+from .cache import get_cache
+from .charts import DEFAULT_CHART, get_chart
+from .http_pool import DEFAULT_POOL_SIZE, DEFAULT_RETRIES
+from .models import ChartEntry
+from .rate_limit import INTERACTIVE, RATE_LIMIT_RETRIES, get_scheduler
+from .scraper import _archived, _chart_and_week, _chart_ttl, _not_modified, _parse_page, _request_headers
+from .spotify import (
+    ADD_CHUNK_RETRIES,
+    PLAYLIST_ADD_LIMIT,
+    TRACK_CACHE_TTL,
+    TRACK_MISS_CACHE_TTL,
+    _add_retry_delay,
+    _first_uri,
+    _indexed_uri,
+    _is_transient,
+    _load_resolved,
+    _playlist_details,
+    _save_resolved,
+    _search_query,
+    _song_fields,
+    _token_expiring,
+    _track_index,
+    _track_key,
+    get_oauth_manager,
+)
+from .utils import chunk_list, safe_int
+
+try:
+    import httpx
+except ImportError:  # httpx jest opcjonalne
+    httpx = None
+
+_HTTP_ERRORS = (httpx.HTTPError,) if httpx is not None else ()
+# Błędy połączenia, przy których zapytanie nie zostało wysłane
+_CONNECT_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout) if httpx is not None else ()
+
+SPOTIFY_API_URL = "https://api.spotify.com/v1/"
+DEFAULT_CONCURRENCY = 256
+REQUEST_TIMEOUT = 10
+
+# Pętla zdarzeń -> {nazwa: httpx.AsyncClient}; klient działa tylko w pętli, w której powstał
+_clients = weakref.WeakKeyDictionary()
+
+
+def get_async_client(name):
+    """
+    Zwraca klienta httpx współdzielonego w bieżącej pętli zdarzeń dla podanej
+    nazwy (np. "billboard", "spotify") - z pulą połączeń keep-alive.
+    """
+    if httpx is None:
+        raise ImportError("httpx is not installed")
+    clients = _clients.setdefault(asyncio.get_running_loop(), {})
+    client = clients.get(name)
+    if client is None:
+        pool_size = safe_int(os.environ.get("HTTP_POOL_SIZE"), default=DEFAULT_POOL_SIZE)
+        client = clients[name] = httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size),
+            # Ponawiane są tylko nieudane połączenia
+            transport=httpx.AsyncHTTPTransport(
+                retries=safe_int(os.environ.get("HTTP_RETRIES"), default=DEFAULT_RETRIES)
+            ),
+            timeout=REQUEST_TIMEOUT,
+            # Jak requests w wersji synchronicznej - billboard.com bywa przekierowywany
+            follow_redirects=name == "billboard",
+        )
+    return client
+
+
+async def close_clients():
+    """
+    Zamyka klientów httpx bieżącej pętli zdarzeń (np. przed jej zamknięciem).
+    """
+    clients = _clients.pop(asyncio.get_running_loop(), {})
+    for client in clients.values():
+        await client.aclose()
+
+
+async def get_top_100(date_str, client=None):
+    """
+    Asynchroniczny scraper.get_top_100.
+    """
+    return await get_chart_entries(DEFAULT_CHART, date_str, client=client)
+
+
+async def get_chart_entries(chart_id, date_str, client=None):
+    """
+    Asynchroniczny scraper.get_chart_entries: ten sam cache, zapytania warunkowe
+    i parser. Parsowanie odbywa się w wątku, żeby nie zatrzymywać pętli.
+    Opcjonalny client zastępuje współdzielonego klienta httpx.
+    """
+    chart, week = _chart_and_week(chart_id, date_str)
+    archived = await asyncio.to_thread(_archived, chart, week)
+    if archived is not None:
+        return archived
+
+    async def load():
+        return [song.to_list() for song in await _fetch_chart(chart, week, client)]
+
+    with metrics.timer("get_chart", chart=chart.id):
+        cached = await get_cache("chart").get_or_load_async(
+            chart.cache_key(week), load, ttl=_chart_ttl(week)
+        )
+    return [ChartEntry.from_list(values) for values in cached]
+
+
+async def _fetch_chart(chart, week, client=None):
+    client = client or get_async_client("billboard")
+    headers, stored = await asyncio.to_thread(_request_headers, chart, week)
+
+    try:
+        with metrics.timer("billboard_fetch"):
+            response = await client.get(chart.url(week), headers=headers)
+            # httpx, inaczej niż requests, zgłasza błąd także dla 3xx - 304 sprawdzamy wcześniej
+            if response.status_code == 304 and stored:
+                return _not_modified(stored)
+            response.raise_for_status()
+    except _HTTP_ERRORS as e:
+        raise Exception(f"Error fetching Billboard page: {e}")
+
+    return await asyncio.to_thread(
+        _parse_page, chart, week, response.text, len(response.content),
+        response.num_bytes_downloaded or len(response.content),
+        response.headers.get("ETag"), response.headers.get("Last-Modified"),
+    )
+
+
+class AsyncSpotifyClient:
+    """
+    Klient Spotify Web API na httpx, bez spotipy. Dopasowania, cache utworów
+    i gotowe listy URI są wspólne z SpotifyClient.
+    """
+
+    def __init__(self, token_info, max_concurrency=None, client=None, priority=INTERACTIVE):
+        self.token_info = token_info
+        self.client = client
+        self.max_concurrency = max_concurrency or safe_int(
+            os.environ.get("ASYNC_SPOTIFY_CONCURRENCY"), default=DEFAULT_CONCURRENCY
+        )
+        # Priorytet w harmonogramie zapytań (rate_limit.INTERACTIVE / BACKGROUND)
+        self.priority = priority
+        self._refresh_lock = asyncio.Lock()
+
+    async def _access_token(self):
+        """
+        Zwraca access token, odświeżając go (w wątku), zanim wygaśnie.
+        """
+        async with self._refresh_lock:
+            if _token_expiring(self.token_info):
+                oauth = get_oauth_manager(
+                    os.environ.get("SPOTIPY_CLIENT_ID"),
+                    os.environ.get("SPOTIPY_CLIENT_SECRET"),
+                    os.environ.get("SPOTIPY_REDIRECT_URI"),
+                    "playlist-modify-public playlist-modify-private",
+                )
+                self.token_info = await asyncio.to_thread(
+                    oauth.refresh_access_token, self.token_info["refresh_token"]
+                )
+            return self.token_info["access_token"]
+
+    async def _request(self, method, name, path, **kwargs):
+        """
+        Wysyła zapytanie do Web API przez wspólny harmonogram. Po odpowiedzi 429
+        wstrzymuje kubełek na czas z Retry-After i próbuje ponownie.
+        Błędy zgłasza jako SpotifyException, jak spotipy.
+        """
+        client = self.client or get_async_client("spotify")
+        scheduler = get_scheduler()
+        metrics.inc("spotify_api_calls", method=name)
+        with metrics.timer("spotify_api", method=name):
+            for attempt in range(RATE_LIMIT_RETRIES + 1):
+                await scheduler.acquire_async(self.priority)
+                headers = {"Authorization": f"Bearer {await self._access_token()}"}
+                response = await client.request(method, SPOTIFY_API_URL + path, headers=headers, **kwargs)
+                if response.status_code == 429 and attempt < RATE_LIMIT_RETRIES:
+                    await scheduler.throttle_async(safe_int(response.headers.get("Retry-After"), default=1))
+                    continue
+                if response.status_code >= 400:
+                    raise SpotifyException(
+                        response.status_code, -1, f"{path}: {response.text}", headers=dict(response.headers)
+                    )
+                return response.json() if response.content else None
+
+    async def get_user_id(self):
+        return (await self._request("GET", "current_user", "me"))["id"]
+
+    async def search_song(self, song_name, year, artist=None):
+        """
+        Asynchroniczny SpotifyClient.search_song - ten sam cache i indeks utworów.
+        """
+        with metrics.timer("search_song"):
+            cached = await get_cache("track").get_or_load_async(
+                _track_key(song_name, year, artist),
+                lambda: self._load_uri(song_name, year, artist),
+                ttl=lambda value: TRACK_CACHE_TTL if value["uri"] else TRACK_MISS_CACHE_TTL,
+            )
+        return cached["uri"]
+
+    async def _load_uri(self, song_name, year, artist):
+        return {"uri": await self._resolve_uri(song_name, year, artist)}
+
+    async def _resolve_uri(self, song_name, year, artist):
+        # Indeks czyta i zapisuje cache (SQLite/Redis) pod blokadą - w wątku
+        uri = await asyncio.to_thread(_indexed_uri, song_name, artist, year)
+        if uri:
+            return uri
+        uri = await self._search_uri(song_name, year, artist)
+        if uri:
+            await asyncio.to_thread(_track_index().add, song_name, artist, year, uri)
+        return uri
+
+    async def _search_uri(self, song_name, year, artist):
+        params = {"q": _search_query(song_name, year, artist), "type": "track"}
+        return _first_uri(await self._request("GET", "search", "search", params=params))
+
+    @metrics.timed("resolve_songs")
+    async def resolve_songs(self, song_list, year, progress=None):
+        """
+        Zwraca listę URI (None dla nieznalezionych) w kolejności song_list,
+        wyszukując najwyżej max_concurrency utworów naraz.
+        """
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        done = 0
+
+        async def search(song):
+            nonlocal done
+            title, artist = _song_fields(song)
+            async with semaphore:
+                uri = await self.search_song(title, year, artist)
+            done += 1
+            if progress:
+                progress(done, len(song_list))
+            return uri
+
+        return list(await asyncio.gather(*(search(song) for song in song_list)))
+
+    async def add_tracks(self, playlist_id, uris):
+        """
+        Dodaje utwory do playlisty paczkami po PLAYLIST_ADD_LIMIT, zachowując kolejność.
+        Ponawiane są tylko błędy przejściowe, jak w SpotifyClient.add_tracks.
+        """
+        for chunk in chunk_list(list(uris), PLAYLIST_ADD_LIMIT):
+            for attempt in range(ADD_CHUNK_RETRIES + 1):
+                try:
+                    await self._request("POST", "playlist_add_items", f"playlists/{quote(playlist_id)}/tracks",
+                                        json={"uris": chunk})
+                    break
+                except Exception as e:
+                    delay = _add_retry_delay(_is_transient(e) or isinstance(e, _CONNECT_ERRORS), attempt)
+                    if delay is None:
+                        raise
+                    await asyncio.sleep(delay)
+
+    async def _create_playlist(self, name, description):
+        user_id = await self.get_user_id()
+        return await self._request(
+            "POST", "user_playlist_create", f"users/{quote(user_id)}/playlists",
+            json={"name": name, "public": False, "description": description},
+        )
+
+    @metrics.timed("create_playlist")
+    async def create_playlist_from_songs(self, date_str, song_list, custom_name=None, progress=None,
+                                         chart_id=DEFAULT_CHART):
+        """
+        Asynchroniczny SpotifyClient.create_playlist_from_songs. Zwraca link do playlisty.
+        """
+        chart = get_chart(chart_id)
+        year = date_str.split("-")[0]
+        playlist = await self._create_playlist(*_playlist_details(date_str, custom_name, chart))
+
+        key, fingerprint, uris = await asyncio.to_thread(_load_resolved, date_str, song_list, year, chart.id)
+        if uris is not None:
+            if progress:
+                progress(len(song_list), len(song_list))
+        else:
+            uris = await self.resolve_songs(song_list, year, progress)
+            await asyncio.to_thread(_save_resolved, key, fingerprint, uris)
+
+        await self.add_tracks(playlist["id"], [uri for uri in uris if uri])
+        return playlist["external_urls"]["spotify"]
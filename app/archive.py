@@ -0,0 +1,400 @@
+"""
+Kolumnowe archiwum historii list (tylko dopisywanie).
+
+Całe archiwum Hot 100 to ok. 3500 tygodni po 100 pozycji. Zamiast osobnego
+HTML-a albo JSON-a dla każdego tygodnia archiwum trzyma:
+- tablice napisów (titles.txt, artists.txt) - każdy tytuł i wykonawca raz,
+- tablicę utworów (song_title.i32, song_artist.i32) - id utworu -> id napisów,
+- kolumny wierszy: tydzień (week.i32, numer dnia), pozycja (rank.i16),
+  id utworu (song.i32), tygodnie na liście (weeks_on.i16) i najwyższa pozycja
+  (peak.i16); brak wartości to -1,
+- commits.i32 - pary (tydzień, koniec wierszy) zapisywane na końcu każdego
+  dopisania.
+
+Kolumny czytane są przez mmap, bez kopiowania, więc przegląd całej historii
+(np. wszystkie tygodnie utworu - song_weeks) trwa milisekundy i zajmuje mało
+pamięci. Liczby zapisane są w natywnej kolejności bajtów.
+
+Dopisuje jeden proces naraz (backfill.py --archive). Dopisanie jest widoczne
+dopiero po zapisie commits.i32 - dane przerwanego dopisania są pomijane przy
+odczycie i obcinane przed kolejnym dopisaniem. Inne procesy widzą nowe
+tygodnie przy kolejnym odczycie.
+
+Konfiguracja (zmienne środowiskowe):
+- CHART_ARCHIVE_DIR - katalog archiwum (podkatalog na listę); bez niej
+  scraper nie korzysta z archiwum
+"""
+import mmap
+import os
+import struct
+import threading
+from array import array
+from datetime import date
+from . import normalize
+from .charts import DEFAULT_CHART, get_chart
+from .models import ChartEntry
+
+_instances = {}
+_lock = threading.Lock()
+_root = None
+
+# Brak wartości w kolumnach liczbowych
+MISSING = -1
+
+
+class _Column:
+    """
+    Kolumna liczb w pliku: dopisywanie na końcu, odczyt przez mmap.
+    """
+
+    def __init__(self, path, typecode):
+        self.path = path
+        self.typecode = typecode
+        self.itemsize = array(typecode).itemsize
+        self._view = None
+        if not os.path.exists(path):
+            open(path, "wb").close()
+
+    def __len__(self):
+        return os.path.getsize(self.path) // self.itemsize
+
+    def append(self, values):
+        with open(self.path, "ab") as f:
+            f.write(array(self.typecode, values).tobytes())
+
+    def truncate(self, length):
+        if os.path.getsize(self.path) > length * self.itemsize:
+            os.truncate(self.path, length * self.itemsize)
+            self._view = None
+
+    def view(self, length):
+        """
+        Zwraca memoryview pierwszych length wartości (bez kopiowania).
+        """
+        if self._view is None or len(self._view) < length:
+            with open(self.path, "rb") as f:
+                if os.fstat(f.fileno()).st_size == 0:
+                    self._view = memoryview(b"").cast(self.typecode)
+                else:
+                    # Mapa zostaje otwarta, dopóki istnieją widoki
+                    self._view = memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)).cast(self.typecode)
+        return self._view[:length]
+
+
+class _Strings:
+    """
+    Tablica napisów w pliku tekstowym (jeden napis w wierszu) z indeksem napis -> id.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.values = []
+        self.ids = {}
+        self.size = 0
+        if not os.path.exists(path):
+            open(path, "wb").close()
+
+    def load(self):
+        with open(self.path, "rb") as f:
+            data = f.read()
+        # Niepełny ostatni wiersz (przerwany zapis) jest pomijany
+        self.size = data.rfind(b"\n") + 1
+        self.values = data[:self.size].decode("utf-8").split("\n")[:-1]
+        self.ids = {value: i for i, value in enumerate(self.values)}
+
+    def repair(self):
+        if os.path.getsize(self.path) != self.size:
+            os.truncate(self.path, self.size)
+
+    def intern(self, value, pending):
+        """
+        Zwraca id napisu; nowe napisy dopisuje do pending (zapisywane przez flush).
+        """
+        value = (value or "").replace("\n", " ")
+        string_id = self.ids.get(value)
+        if string_id is None:
+            string_id = self.ids[value] = len(self.values)
+            self.values.append(value)
+            pending.append(value)
+        return string_id
+
+    def flush(self, pending):
+        if pending:
+            data = "".join(value + "\n" for value in pending).encode("utf-8")
+            with open(self.path, "ab") as f:
+                f.write(data)
+            self.size += len(data)
+
+
+def _ordinal(week):
+    return date.fromisoformat(week).toordinal()
+
+
+def _week(ordinal):
+    return date.fromordinal(ordinal).isoformat()
+
+
+def _value(value):
+    return MISSING if value is None else value
+
+
+def _optional(value):
+    return None if value == MISSING else value
+
+
+class ChartArchive:
+    """
+    Archiwum jednej listy w katalogu path.
+    """
+
+    def __init__(self, path, chart_id=DEFAULT_CHART):
+        self.path = path
+        self.chart = get_chart(chart_id)
+        os.makedirs(path, exist_ok=True)
+        self._lock = threading.RLock()
+        self._titles = _Strings(os.path.join(path, "titles.txt"))
+        self._artists = _Strings(os.path.join(path, "artists.txt"))
+        self._song_title = _Column(os.path.join(path, "song_title.i32"), "i")
+        self._song_artist = _Column(os.path.join(path, "song_artist.i32"), "i")
+        self._rows = {
+            "week": _Column(os.path.join(path, "week.i32"), "i"),
+            "rank": _Column(os.path.join(path, "rank.i16"), "h"),
+            "song": _Column(os.path.join(path, "song.i32"), "i"),
+            "weeks_on": _Column(os.path.join(path, "weeks_on.i16"), "h"),
+            "peak": _Column(os.path.join(path, "peak.i16"), "h"),
+        }
+        self._commits = _Column(os.path.join(path, "commits.i32"), "i")
+        self._commits_size = None
+        self._song_ids = None
+        self._title_keys = None
+        self._refresh()
+
+    def _refresh(self):
+        """
+        Wczytuje stan archiwum, jeśli od ostatniego odczytu przybyły tygodnie
+        (także dopisane przez inny proces). Dane zapisane po ostatnim commicie
+        są pomijane.
+        """
+        size = os.path.getsize(self._commits.path)
+        if size == self._commits_size:
+            return
+        with self._lock:
+            # Najpierw commity - utwory i napisy, do których się odwołują, są już zapisane
+            commits = self._commits.view(len(self._commits) // 2 * 2)
+            self._weeks = {}
+            start = 0
+            for i in range(0, len(commits), 2):
+                self._weeks[commits[i]] = (start, commits[i + 1])
+                start = commits[i + 1]
+            self.rows = start
+            self._titles.load()
+            self._artists.load()
+            self.songs = min(len(self._song_title), len(self._song_artist))
+            self._song_ids = None
+            self._title_keys = None
+            self._commits_size = size
+
+    def _repair(self):
+        """
+        Obcina dane przerwanego dopisania (tylko proces dopisujący - inny
+        proces mógłby właśnie dopisywać).
+        """
+        self._commits.truncate(len(self._commits) // 2 * 2)
+        for column in self._rows.values():
+            column.truncate(self.rows)
+        self._song_title.truncate(self.songs)
+        self._song_artist.truncate(self.songs)
+        self._titles.repair()
+        self._artists.repair()
+        self._commits_size = os.path.getsize(self._commits.path)
+
+    def __contains__(self, week):
+        self._refresh()
+        return _ordinal(week) in self._weeks
+
+    def __len__(self):
+        self._refresh()
+        return len(self._weeks)
+
+    def weeks(self):
+        """
+        Zwraca posortowaną listę zarchiwizowanych tygodni.
+        """
+        self._refresh()
+        return [_week(ordinal) for ordinal in sorted(self._weeks)]
+
+    def append(self, week, entries):
+        """
+        Dopisuje listę z tygodnia week. Zwraca False, jeśli tydzień już jest w archiwum.
+        """
+        ordinal = _ordinal(week)
+        entries = list(entries)
+        with self._lock:
+            self._refresh()
+            if ordinal in self._weeks:
+                return False
+            self._repair()
+            try:
+                self._write(ordinal, entries)
+            except Exception:
+                # Stan w pamięci mógł rozjechać się z plikami - pełne wczytanie przy kolejnym użyciu
+                self._commits_size = None
+                raise
+            return True
+
+    def _write(self, ordinal, entries):
+        new_titles, new_artists, new_songs = [], [], []
+        songs = [
+            self._song_id(self._titles.intern(entry.title, new_titles),
+                          self._artists.intern(entry.artist, new_artists), new_songs)
+            for entry in entries
+        ]
+
+        # Kolejność zapisu: napisy, utwory, wiersze, commit
+        self._titles.flush(new_titles)
+        self._artists.flush(new_artists)
+        if new_songs:
+            self._song_title.append(title_id for title_id, _ in new_songs)
+            self._song_artist.append(artist_id for _, artist_id in new_songs)
+            self.songs += len(new_songs)
+        self._rows["week"].append([ordinal] * len(songs))
+        self._rows["rank"].append(entry.rank for entry in entries)
+        self._rows["song"].append(songs)
+        self._rows["weeks_on"].append(_value(entry.weeks_on_chart) for entry in entries)
+        self._rows["peak"].append(_value(entry.peak) for entry in entries)
+        self._commits.append([ordinal, self.rows + len(songs)])
+
+        self._weeks[ordinal] = (self.rows, self.rows + len(songs))
+        self.rows += len(songs)
+        self._commits_size = os.path.getsize(self._commits.path)
+
+    def _song_id(self, title_id, artist_id, new_songs):
+        """
+        Zwraca id utworu o podanych napisach, dodając nowy utwór do new_songs.
+        """
+        if self._song_ids is None:
+            self._song_ids = {
+                pair: song_id for song_id, pair in enumerate(zip(
+                    self._song_title.view(self.songs), self._song_artist.view(self.songs)
+                ))
+            }
+        song_id = self._song_ids.get((title_id, artist_id))
+        if song_id is None:
+            song_id = self._song_ids[(title_id, artist_id)] = self.songs + len(new_songs)
+            new_songs.append((title_id, artist_id))
+        return song_id
+
+    def get(self, week):
+        """
+        Zwraca listę ChartEntry z tygodnia week albo None, gdy go nie ma w archiwum.
+        """
+        self._refresh()
+        rows = self._weeks.get(_ordinal(week))
+        if rows is None:
+            return None
+        start, end = rows
+        columns = {name: column.view(self.rows)[start:end] for name, column in self._rows.items()}
+        song_title = self._song_title.view(self.songs)
+        song_artist = self._song_artist.view(self.songs)
+        return [
+            ChartEntry(rank, self._titles.values[song_title[song]], self._artists.values[song_artist[song]],
+                       _optional(weeks_on), _optional(peak))
+            for rank, song, weeks_on, peak in zip(
+                columns["rank"], columns["song"], columns["weeks_on"], columns["peak"]
+            )
+        ]
+
+    def song_weeks(self, title, artist=None):
+        """
+        Zwraca posortowaną listę (tydzień, pozycja) wszystkich notowań utworu.
+        Tytuł i wykonawca porównywane są kanonicznie (normalize), bez wykonawcy
+        pasuje każdy utwór o tym tytule.
+        """
+        self._refresh()
+        song_artist = self._song_artist.view(self.songs)
+        weeks = self._rows["week"].view(self.rows)
+        ranks = self._rows["rank"].view(self.rows)
+        found = []
+        for title_id in self._title_ids(normalize.title_key(title)):
+            for song_id in self._find(self._song_title, self.songs, title_id):
+                if artist is not None and (normalize.artist_key(self._artists.values[song_artist[song_id]])
+                                           != normalize.artist_key(artist)):
+                    continue
+                found.extend((weeks[row], ranks[row]) for row in self._find(self._rows["song"], self.rows, song_id))
+        return [(_week(ordinal), rank) for ordinal, rank in sorted(found)]
+
+    def _title_ids(self, key):
+        """
+        Id tytułów o kanonicznym kluczu key. Indeks klucz -> id tytułów
+        uzupełniany jest o tytuły dopisane od poprzedniego zapytania.
+        """
+        with self._lock:
+            if self._title_keys is None:
+                self._title_keys, self._keyed_titles = {}, 0
+            values = self._titles.values
+            for title_id in range(self._keyed_titles, len(values)):
+                self._title_keys.setdefault(normalize.title_key(values[title_id]), []).append(title_id)
+            self._keyed_titles = len(values)
+            return list(self._title_keys.get(key, ()))
+
+    @staticmethod
+    def _find(column, length, value):
+        """
+        Numery pozycji z wartością value w pierwszych length wartościach kolumny:
+        wyszukiwanie w bajtach zmapowanego pliku (mmap.find), bez przeglądania
+        wartości w Pythonie.
+        """
+        data = column.view(length).cast("B")
+        if not len(data):
+            return
+        buffer = data.obj
+        needle = struct.pack(column.typecode, value)
+        position = buffer.find(needle, 0, len(data))
+        while position != -1:
+            # Trafienie musi zaczynać się na granicy wartości
+            if position % column.itemsize == 0:
+                yield position // column.itemsize
+                position = buffer.find(needle, position + column.itemsize, len(data))
+            else:
+                position = buffer.find(needle, position + 1, len(data))
+
+    def stats(self):
+        """
+        Zwraca liczbę tygodni, wierszy, utworów i rozmiar archiwum na dysku.
+        """
+        self._refresh()
+        return {
+            "weeks": len(self._weeks),
+            "rows": self.rows,
+            "songs": self.songs,
+            "bytes": sum(entry.stat().st_size for entry in os.scandir(self.path) if entry.is_file()),
+        }
+
+
+def configure(path=None):
+    """
+    Ustawia katalog archiwum dla całego procesu (np. w testach lub CLI).
+    Bez argumentu czyta CHART_ARCHIVE_DIR; pusta wartość wyłącza archiwum.
+    """
+    global _root
+    with _lock:
+        _root = (path if path is not None else os.environ.get("CHART_ARCHIVE_DIR")) or None
+        _instances.clear()
+    return _root
+
+
+def get_archive(chart_id=None):
+    """
+    Zwraca archiwum listy chart_id albo None, gdy archiwum nie jest skonfigurowane.
+    """
+    chart = get_chart(chart_id)
+    with _lock:
+        if _root is None:
+            return None
+        archive = _instances.get(chart.id)
+        if archive is None:
+            archive = _instances[chart.id] = ChartArchive(os.path.join(_root, chart.id), chart.id)
+        return archive
+
+
+configure()
@@ -0,0 +1,448 @@
+"""
+Trwały cache klucz-wartość współdzielony przez scraper i klienta Spotify.
+
+Backend wybierany jest adresem z zmiennej środowiskowej CACHE_URL:
+- memory://                  - słownik w pamięci procesu (LRU)
+- sqlite:///sciezka/do/pliku - plik SQLite (domyślnie)
+- redis://host:port/db       - Redis (współdzielony między procesami)
+
+Limit wpisów (CACHE_MAX_ENTRIES) i usuwanie najdawniej używanych dotyczą
+tylko wpisów z TTL. Wpisy bez TTL (archiwalne listy, które się nie zmienią)
+nie są usuwane - inaczej ruch utworów i zadań wypychałby je z cache.
+"""
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from .singleflight import AsyncSingleFlight, SingleFlight
+
+DEFAULT_CACHE_URL = "sqlite:///chart_cache.db"
+DEFAULT_MAX_ENTRIES = 10000
+# Wartości dłuższe niż tyle bajtów SQLite trzyma skompresowane (zlib)
+COMPRESS_MIN_SIZE = 512
+# Blokada "ktoś już pobiera tę wartość" - wygasa, gdyby jej właściciel padł
+LOCK_TTL = 30
+LOCK_POLL_INTERVAL = 0.1
+
+
+class MemoryBackend:
+    """Cache w pamięci procesu z wygasaniem i usuwaniem najdawniej używanych."""
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES):
+        self.max_entries = max_entries
+        # Wpisy z TTL (w kolejności użycia) i wpisy bez TTL, których limit nie dotyczy
+        self._data = OrderedDict()
+        self._permanent = {}
+        self._locks = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            if key in self._permanent:
+                return self._permanent[key]
+            item = self._data.get(key)
+            if item is None:
+                return None
+            value, expires_at = item
+            if expires_at <= time.time():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl=None):
+        with self._lock:
+            if not ttl:
+                self._data.pop(key, None)
+                self._permanent[key] = value
+                return
+            self._permanent.pop(key, None)
+            self._data[key] = (value, time.time() + ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+            self._permanent.pop(key, None)
+
+    def sweep(self):
+        """Usuwa wszystkie wygasłe wpisy."""
+        now = time.time()
+        with self._lock:
+            expired = [key for key, (_, expires_at) in self._data.items() if expires_at <= now]
+            for key in expired:
+                del self._data[key]
+
+    def acquire_lock(self, key, ttl):
+        now = time.time()
+        with self._lock:
+            if self._locks.get(key, 0) > now:
+                return False
+            self._locks[key] = now + ttl
+            return True
+
+    def release_lock(self, key):
+        with self._lock:
+            self._locks.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._permanent.clear()
+
+    def __len__(self):
+        return len(self._data) + len(self._permanent)
+
+
+class SQLiteBackend:
+    """
+    Cache w pliku SQLite - przeżywa restart aplikacji.
+    Duże wartości (np. całe listy) zapisywane są skompresowane.
+    """
+
+    def __init__(self, path, max_entries=DEFAULT_MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+                "expires_at REAL, accessed_at REAL NOT NULL)"
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS cache_accessed ON cache (accessed_at)"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS locks (key TEXT PRIMARY KEY, expires_at REAL NOT NULL)"
+            )
+
+    def get(self, key):
+        now = time.time()
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            value, expires_at = row
+            if expires_at is not None and expires_at <= now:
+                self._conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+                return None
+            self._conn.execute(
+                "UPDATE cache SET accessed_at = ? WHERE key = ?", (now, key)
+            )
+        if isinstance(value, bytes):
+            value = zlib.decompress(value).decode("utf-8")
+        return value
+
+    def set(self, key, value, ttl=None):
+        now = time.time()
+        expires_at = now + ttl if ttl else None
+        if len(value) > COMPRESS_MIN_SIZE:
+            value = zlib.compress(value.encode("utf-8"))
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache (key, value, expires_at, accessed_at) "
+                "VALUES (?, ?, ?, ?)",
+                (key, value, expires_at, now),
+            )
+            if expires_at is None:
+                return
+            # Limit dotyczy tylko wpisów z TTL
+            count = self._conn.execute(
+                "SELECT COUNT(*) FROM cache WHERE expires_at IS NOT NULL"
+            ).fetchone()[0]
+            if count > self.max_entries:
+                self._conn.execute(
+                    "DELETE FROM cache WHERE key IN "
+                    "(SELECT key FROM cache WHERE expires_at IS NOT NULL ORDER BY accessed_at LIMIT ?)",
+                    (count - self.max_entries,),
+                )
+
+    def delete(self, key):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+
+    def sweep(self):
+        """Usuwa wszystkie wygasłe wpisy."""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "DELETE FROM cache WHERE expires_at IS NOT NULL AND expires_at <= ?", (time.time(),)
+            )
+
+    def acquire_lock(self, key, ttl):
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM locks WHERE key = ? AND expires_at <= ?", (key, now))
+            cursor = self._conn.execute(
+                "INSERT OR IGNORE INTO locks (key, expires_at) VALUES (?, ?)", (key, now + ttl)
+            )
+            return cursor.rowcount == 1
+
+    def release_lock(self, key):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM locks WHERE key = ?", (key,))
+
+    def clear(self):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM cache")
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+
+
+class RedisBackend:
+    """
+    Cache w Redisie. Kolejność użycia kluczy z TTL trzymana jest w sorted secie,
+    dzięki czemu limit wpisów działa tak samo jak w pozostałych backendach.
+    Klucze bez TTL trafiają do osobnego zbioru.
+    """
+
+    def __init__(self, url, max_entries=DEFAULT_MAX_ENTRIES, prefix="playlist_scraper:"):
+        import redis
+
+        self.client = redis.Redis.from_url(url)
+        self.max_entries = max_entries
+        self.prefix = prefix
+        self._lru_key = prefix + "__lru__"
+        self._permanent_key = prefix + "__permanent__"
+
+    def get(self, key):
+        value = self.client.get(self.prefix + key)
+        if value is None:
+            self.client.zrem(self._lru_key, key)
+            return None
+        # Tylko klucze już obecne w secie LRU (z TTL) - zadd xx nie dodaje nowych
+        self.client.zadd(self._lru_key, {key: time.time()}, xx=True)
+        return value.decode("utf-8")
+
+    def set(self, key, value, ttl=None):
+        pipe = self.client.pipeline()
+        if not ttl:
+            pipe.set(self.prefix + key, value)
+            pipe.zrem(self._lru_key, key)
+            pipe.sadd(self._permanent_key, key)
+            pipe.execute()
+            return
+        pipe.set(self.prefix + key, value, ex=int(ttl))
+        pipe.srem(self._permanent_key, key)
+        pipe.zadd(self._lru_key, {key: time.time()})
+        pipe.zcard(self._lru_key)
+        count = pipe.execute()[-1]
+        if count > self.max_entries:
+            evicted = self.client.zpopmin(self._lru_key, count - self.max_entries)
+            if evicted:
+                self.client.delete(*[self.prefix + k.decode("utf-8") for k, _ in evicted])
+
+    def delete(self, key):
+        self.client.delete(self.prefix + key)
+        self.client.zrem(self._lru_key, key)
+        self.client.srem(self._permanent_key, key)
+
+    def sweep(self):
+        """Wygasłe klucze usuwa sam Redis - czyścimy tylko listę LRU."""
+        keys = self.client.zrange(self._lru_key, 0, -1)
+        pipe = self.client.pipeline()
+        for key in keys:
+            pipe.exists(self.prefix + key.decode("utf-8"))
+        missing = [key for key, exists in zip(keys, pipe.execute()) if not exists]
+        if missing:
+            self.client.zrem(self._lru_key, *missing)
+
+    def acquire_lock(self, key, ttl):
+        return bool(self.client.set(self.prefix + "__lock__:" + key, 1, nx=True, ex=int(ttl)))
+
+    def release_lock(self, key):
+        self.client.delete(self.prefix + "__lock__:" + key)
+
+    def clear(self):
+        keys = list(self.client.scan_iter(match=self.prefix + "*"))
+        if keys:
+            self.client.delete(*keys)
+
+    def __len__(self):
+        return self.client.zcard(self._lru_key) + self.client.scard(self._permanent_key)
+
+
+def backend_from_url(url, max_entries=DEFAULT_MAX_ENTRIES, prefix="playlist_scraper:"):
+    """
+    Tworzy backend na podstawie adresu (memory://, sqlite:///..., redis://...).
+    Prefiks rozdziela klucze różnych backendów w tej samej bazie Redis.
+    """
+    if url.startswith("memory://"):
+        return MemoryBackend(max_entries=max_entries)
+    if url.startswith("sqlite:///"):
+        return SQLiteBackend(url[len("sqlite:///"):], max_entries=max_entries)
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        return RedisBackend(url, max_entries=max_entries, prefix=prefix)
+    raise ValueError(f"Unsupported cache URL: {url}")
+
+
+_flights = SingleFlight()
+_async_flights = AsyncSingleFlight()
+
+
+class Cache:
+    """
+    Przestrzeń nazw w backendzie cache. Wartości serializowane są do JSON.
+    Liczy trafienia i chybienia.
+    """
+
+    def __init__(self, namespace, backend):
+        self.namespace = namespace
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+
+    def _key(self, key):
+        return f"{self.namespace}:{key}"
+
+    def get(self, key):
+        """
+        Zwraca zapisaną wartość albo None, jeśli jej nie ma lub wygasła.
+        """
+        raw = self.backend.get(self._key(key))
+        if raw is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return json.loads(raw)
+
+    def set(self, key, value, ttl=None):
+        """
+        Zapisuje wartość. ttl w sekundach, None oznacza brak wygasania.
+        """
+        self.backend.set(self._key(key), json.dumps(value), ttl=ttl)
+
+    def delete(self, key):
+        self.backend.delete(self._key(key))
+
+    async def _run_async(self, func, *args, **kwargs):
+        """
+        Wywołuje metodę z korutyny. Zapytania do SQLite i Redisa blokują -
+        wykonujemy je w wątku, żeby nie zatrzymywać pętli zdarzeń.
+        """
+        if isinstance(self.backend, MemoryBackend):
+            return func(*args, **kwargs)
+        return await asyncio.to_thread(func, *args, **kwargs)
+
+    async def get_async(self, key):
+        return await self._run_async(self.get, key)
+
+    async def set_async(self, key, value, ttl=None):
+        await self._run_async(self.set, key, value, ttl=ttl)
+
+    def get_or_load(self, key, loader, ttl=None):
+        """
+        Zwraca wartość z cache, a przy braku - wynik loader() zapisany w cache.
+        Równoczesne zapytania o ten sam klucz współdzielą jedno wywołanie loader():
+        w procesie przez single-flight, między procesami przez blokadę w backendzie.
+        ttl może być funkcją wyliczającą TTL z wartości.
+        """
+        value = self.get(key)
+        if value is not None:
+            return value
+        return _flights.do(self._key(key), lambda: self._load(key, loader, ttl))
+
+    async def get_or_load_async(self, key, loader, ttl=None):
+        """
+        Jak get_or_load, ale loader() to korutyna. Równoczesne zapytania w tej
+        samej pętli zdarzeń współdzielą jedno wywołanie; między procesami nie
+        ma blokady (czekanie na nią zatrzymałoby całą pętlę).
+        """
+        value = await self.get_async(key)
+        if value is not None:
+            return value
+
+        async def load():
+            value = await loader()
+            await self.set_async(key, value, ttl=ttl(value) if callable(ttl) else ttl)
+            return value
+
+        return await _async_flights.do(self._key(key), load)
+
+    def _load(self, key, loader, ttl):
+        full_key = self._key(key)
+        locked = self.backend.acquire_lock(full_key, LOCK_TTL)
+        deadline = time.monotonic() + LOCK_TTL
+        while not locked and time.monotonic() < deadline:
+            # Inny proces już pobiera tę wartość - czekamy, aż trafi do cache
+            time.sleep(LOCK_POLL_INTERVAL)
+            raw = self.backend.get(full_key)
+            if raw is not None:
+                return json.loads(raw)
+            locked = self.backend.acquire_lock(full_key, LOCK_TTL)
+
+        try:
+            # Wartość mogła się pojawić, zanim dostaliśmy blokadę
+            raw = self.backend.get(full_key)
+            if raw is not None:
+                return json.loads(raw)
+            value = loader()
+            self.set(key, value, ttl=ttl(value) if callable(ttl) else ttl)
+            return value
+        finally:
+            if locked:
+                self.backend.release_lock(full_key)
+
+    def stats(self):
+        """
+        Zwraca liczniki trafień i chybień.
+        """
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+
+_backend = None
+_caches = {}
+_lock = threading.Lock()
+
+
+def configure(url=None, max_entries=None):
+    """
+    Ustawia backend cache dla całego procesu (np. w testach lub CLI).
+    Bez argumentów czyta CACHE_URL i CACHE_MAX_ENTRIES ze środowiska.
+    """
+    global _backend
+    url = url or os.environ.get("CACHE_URL", DEFAULT_CACHE_URL)
+    if max_entries is None:
+        max_entries = int(os.environ.get("CACHE_MAX_ENTRIES", DEFAULT_MAX_ENTRIES))
+    with _lock:
+        _backend = backend_from_url(url, max_entries=max_entries)
+        _caches.clear()
+    return _backend
+
+
+def get_cache(namespace):
+    """
+    Zwraca cache dla danej przestrzeni nazw (np. "chart").
+    """
+    if _backend is None:
+        configure()
+    with _lock:
+        cache = _caches.get(namespace)
+        if cache is None:
+            cache = _caches[namespace] = Cache(namespace, _backend)
+        return cache
+
+
+def cache_stats():
+    """
+    Zwraca liczniki trafień i chybień dla wszystkich przestrzeni nazw.
+    """
+    with _lock:
+        return {name: cache.stats() for name, cache in _caches.items()}
@@ -0,0 +1,65 @@
+"""
+Rejestr list Billboard.
+
+Każda lista to ścieżka strony na billboard.com, parser, liczba pozycji i data
+pierwszego notowania. Wszystkie listy pobiera, parsuje i zapisuje w cache ten
+sam kod (scraper.get_chart_entries), więc nowa lista to jeden wpis w CHARTS.
+Dopasowania utworów w Spotify nie zależą od listy - utwór znaleziony dla
+jednej listy nie jest szukany ponownie dla innej.
+"""
+from .parsers import parse_chart
+
+BASE_URL = "https://www.billboard.com/charts/"
+DEFAULT_CHART = "hot-100"
+
+
+class Chart:
+    """
+    Opis jednej listy. parser(html) zwraca listę ChartEntry - wszystkie listy
+    billboard.com mają ten sam układ, więc domyślnie jest to parse_chart.
+    """
+
+    __slots__ = ("id", "name", "size", "first_date", "parser", "playlist_title")
+
+    def __init__(self, chart_id, name, size=100, first_date="1958-08-04", parser=parse_chart,
+                 playlist_title=None):
+        self.id = chart_id
+        self.name = name
+        self.size = size
+        self.first_date = first_date
+        self.parser = parser
+        # Domyślna nazwa playlisty "<data> <playlist_title>"
+        self.playlist_title = playlist_title or name
+
+    def url(self, week):
+        return f"{BASE_URL}{self.id}/{week}"
+
+    def cache_key(self, week):
+        """
+        Klucz listy z danego tygodnia w cache (przestrzeń "chart"). Hot 100 zostaje
+        pod samą datą - zgodnie z wpisami zapisanymi przed wprowadzeniem rejestru.
+        """
+        return week if self.id == DEFAULT_CHART else f"{self.id}|{week}"
+
+    def parse(self, html):
+        return self.parser(html)[:self.size]
+
+
+CHARTS = {chart.id: chart for chart in (
+    Chart("hot-100", "Billboard Hot 100", playlist_title="Billboard 100"),
+    Chart("billboard-global-200", "Billboard Global 200", size=200, first_date="2020-09-19"),
+    Chart("country-songs", "Hot Country Songs", size=50, first_date="1958-10-20"),
+    Chart("r-b-hip-hop-songs", "Hot R&B/Hip-Hop Songs", size=50, first_date="1958-10-20"),
+    Chart("rock-songs", "Hot Rock & Alternative Songs", size=50, first_date="2009-06-20"),
+    Chart("latin-songs", "Hot Latin Songs", size=50, first_date="1986-09-20"),
+)}
+
+
+def get_chart(chart_id=None):
+    """
+    Zwraca opis listy o podanym id (domyślnie Hot 100).
+    """
+    chart = CHARTS.get(chart_id or DEFAULT_CHART)
+    if chart is None:
+        raise ValueError(f"Unknown chart: {chart_id}")
+    return chart
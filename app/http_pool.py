@@ -0,0 +1,95 @@
+"""
+Wspólne, procesowe sesje HTTP (keep-alive, pula połączeń, ponawianie)
+dla ruchu do Billboard i Spotify.
+
+Konfiguracja przez zmienne środowiskowe:
+- HTTP_POOL_SIZE - maksymalna liczba połączeń na host (domyślnie 20)
+- HTTP_RETRIES   - ile razy ponawiać zapytania GET po błędzie (domyślnie 3)
+- HTTP_BACKOFF   - współczynnik opóźnienia między próbami (domyślnie 0.5)
+"""
+import os
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from .utils import safe_int, safe_float
+
+DEFAULT_POOL_SIZE = 20
+DEFAULT_RETRIES = 3
+DEFAULT_BACKOFF = 0.5
+# Błędy serwera, po których warto spróbować ponownie
+RETRY_STATUSES = (500, 502, 503, 504)
+# Sesje, których odpowiedzi 429 obsługuje harmonogram zapytań (rate_limit) -
+# urllib3 nie może ich ponawiać sam, bo harmonogram nie wstrzymałby kubełka
+SCHEDULED_SESSIONS = frozenset(["spotify"])
+
+_sessions = {}
+_lock = threading.Lock()
+
+
+def _build_session(respect_retry_after=True):
+    """
+    Tworzy sesję z pulą połączeń i ponawianiem bezpiecznych zapytań.
+    Przy respect_retry_after=False odpowiedzi 429 trafiają do wywołującego.
+    """
+    pool_size = safe_int(os.environ.get("HTTP_POOL_SIZE"), default=DEFAULT_POOL_SIZE)
+    retry = Retry(
+        total=safe_int(os.environ.get("HTTP_RETRIES"), default=DEFAULT_RETRIES),
+        backoff_factor=safe_float(os.environ.get("HTTP_BACKOFF"), default=DEFAULT_BACKOFF),
+        status_forcelist=RETRY_STATUSES,
+        allowed_methods=frozenset(["GET", "HEAD"]),
+        respect_retry_after_header=respect_retry_after,
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def get_session(name):
+    """
+    Zwraca współdzieloną sesję HTTP o podanej nazwie (np. "billboard", "spotify").
+    """
+    with _lock:
+        session = _sessions.get(name)
+        if session is None:
+            session = _sessions[name] = _build_session(respect_retry_after=name not in SCHEDULED_SESSIONS)
+        return session
+
+
+def reset_sessions():
+    """
+    Zamyka wszystkie sesje (np. po zmianie konfiguracji lub w testach).
+    """
+    with _lock:
+        for session in _sessions.values():
+            session.close()
+        _sessions.clear()
+
+
+def pool_stats():
+    """
+    Zwraca dla każdej sesji liczbę zapytań, nowych połączeń i odsetek
+    zapytań obsłużonych na już otwartym połączeniu.
+    """
+    stats = {}
+    with _lock:
+        sessions = dict(_sessions)
+    for name, session in sessions.items():
+        requests_count = connections = 0
+        for adapter in set(session.adapters.values()):
+            pools = adapter.poolmanager.pools
+            for key in list(pools.keys()):
+                pool = pools.get(key)
+                if pool is not None:
+                    requests_count += pool.num_requests
+                    connections += pool.num_connections
+        stats[name] = {
+            "requests": requests_count,
+            "connections": connections,
+            "reuse_rate": 1 - connections / requests_count if requests_count else 0.0,
+        }
+    return stats
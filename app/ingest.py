@@ -0,0 +1,166 @@
+"""
+Hurtowe pobieranie list (backfill archiwum): pobieranie i parsowanie jako
+osobne etapy.
+
+Parsowanie strony obciąża procesor i w wątkach czeka na GIL, a pobieranie
+prawie cały czas czeka na sieć. Dlatego strony pobiera pula wątków, a parsuje
+pula procesów (ProcessPoolExecutor) - parsowanie skaluje się z liczbą rdzeni.
+Między etapami są ograniczone kolejki: gdy parsowanie nie nadąża, pobieranie
+czeka, zamiast gromadzić strony w pamięci. Wyniki wracają strumieniowo,
+w kolejności tygodni:
+
+    for week, entries, error in ingest.iter_charts("hot-100", weeks, processes=4):
+        ...
+
+Pobrane listy trafiają do cache, jak przez scraper.get_chart_entries, a tygodnie
+już zapisane w archiwum albo w cache nie są pobierane.
+
+Konfiguracja (zmienne środowiskowe):
+- INGEST_PROCESSES - liczba procesów parsujących (domyślnie liczba rdzeni bez
+  jednego, a na maszynach z 1-2 rdzeniami 0 - parsowanie w wątku)
+"""
+import contextvars
+import multiprocessing
+import os
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from itertools import islice
+from . import metrics
+from .cache import get_cache
+from .charts import get_chart
+from .models import ChartEntry
+from .scraper import _archived, _chart_ttl, _count_page, _download, _store_page
+from .utils import safe_int
+
+DEFAULT_FETCH_WORKERS = 4
+# Ile stron może czekać w każdej z kolejek na jeden proces parsujący
+QUEUE_PER_WORKER = 2
+# Od ilu procesów parsowanie w puli procesów jest szybsze niż w wątku
+MIN_PARSE_PROCESSES = 2
+
+
+def _available_cores():
+    # Rdzenie, na których proces może działać (np. limit w kontenerze)
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def default_processes():
+    """
+    Liczba procesów parsujących: INGEST_PROCESSES, a domyślnie wszystkie rdzenie
+    poza jednym (pobieranie i zapis w głównym procesie). Gdy zostaje mniej niż
+    MIN_PARSE_PROCESSES, pula procesów tylko dokłada narzut przesyłania stron -
+    wtedy 0, czyli parsowanie w wątku.
+    """
+    processes = _available_cores() - 1
+    default = processes if processes >= MIN_PARSE_PROCESSES else 0
+    return safe_int(os.environ.get("INGEST_PROCESSES"), default=default)
+
+
+def _parse_in_process(chart_id, text):
+    """
+    Parsowanie w procesie roboczym. Pozycje wracają jako listy - tańsze
+    w przesyłaniu między procesami niż obiekty.
+    """
+    return [song.to_list() for song in get_chart(chart_id).parse(text)]
+
+
+def _completed(value):
+    future = Future()
+    future.set_result(value)
+    return future
+
+
+def _parse_pool(processes):
+    """
+    Pula etapu parsowania: procesy albo - dla processes=0 - jeden wątek.
+    Procesy startują metodą spawn: fork procesu z działającymi wątkami
+    (pobieranie, cache) mógłby skopiować zajęte blokady.
+    """
+    if processes <= 0:
+        return ThreadPoolExecutor(max_workers=1)
+    return ProcessPoolExecutor(max_workers=processes, mp_context=multiprocessing.get_context("spawn"))
+
+
+def iter_charts(chart_id, weeks, fetch_workers=None, processes=None, queue_size=None, session=None,
+                throttle=None):
+    """
+    Pobiera i parsuje listy chart_id z podanych tygodni. Zwraca generator
+    krotek (tydzień, pozycje, błąd) w kolejności weeks - dla nieudanego
+    tygodnia pozycje to None, a błąd to wyjątek; pozostałe tygodnie są
+    pobierane dalej.
+
+    fetch_workers wątków pobiera strony, processes procesów je parsuje
+    (0 - parsowanie w wątku, bez puli procesów). W każdej z kolejek
+    (pobieranie, parsowanie) czeka najwyżej queue_size stron. throttle
+    wywoływane jest przed każdym zapytaniem do billboard.com.
+    """
+    chart = get_chart(chart_id)
+    chart_cache = get_cache("chart")
+    fetch_workers = fetch_workers or DEFAULT_FETCH_WORKERS
+    processes = default_processes() if processes is None else processes
+    queue_size = queue_size or QUEUE_PER_WORKER * max(fetch_workers, processes, 1)
+    weeks = iter(weeks)
+    # Wątki dostają kopię kontekstu, żeby pomiary trafiły do bieżącego śledzenia
+    context = contextvars.copy_context()
+
+    def fetch(week):
+        archived = _archived(chart, week)
+        if archived is not None:
+            return None, archived
+        cached = chart_cache.get(chart.cache_key(week))
+        if cached is not None:
+            return None, [ChartEntry.from_list(values) for values in cached]
+        if throttle:
+            throttle()
+        page, entries = _download(chart, week, session=session)
+        if entries is not None:
+            # Odpowiedź 304 - zapamiętany wynik od razu trafia do cache
+            chart_cache.set(chart.cache_key(week), [song.to_list() for song in entries], ttl=_chart_ttl(week))
+        return page, entries
+
+    def parse(parse_pool, fetched):
+        """
+        Przekazuje pobraną stronę do parsowania. Zwraca (strona, future z wynikiem).
+        """
+        try:
+            page, entries = fetched.result()
+        except Exception as e:
+            future = Future()
+            future.set_exception(e)
+            return None, future
+        if page is None:
+            return None, _completed(entries)
+        _count_page(page.size, page.wire_bytes)
+        return page, parse_pool.submit(_parse_in_process, chart.id, page.text)
+
+    def finish(week, page, future):
+        result = future.result()
+        if page is None:
+            return result
+        songs = _store_page(chart, week, [ChartEntry.from_list(values) for values in result],
+                            page.size, page.etag, page.last_modified)
+        chart_cache.set(chart.cache_key(week), [song.to_list() for song in songs], ttl=_chart_ttl(week))
+        metrics.inc("ingest_pages_parsed", chart=chart.id)
+        return songs
+
+    fetches, parses = deque(), deque()
+    with ThreadPoolExecutor(max_workers=fetch_workers) as fetch_pool, _parse_pool(processes) as parse_pool:
+        while True:
+            for week in islice(weeks, queue_size - len(fetches)):
+                fetches.append((week, fetch_pool.submit(context.copy().run, fetch, week)))
+            # Pobrane strony przechodzą do parsowania w kolejności tygodni, póki jest
+            # miejsce; na pobranie czekamy tylko wtedy, gdy nie ma czego odebrać
+            while fetches and len(parses) < queue_size and (not parses or fetches[0][1].done()):
+                week, fetched = fetches.popleft()
+                parses.append((week, *parse(parse_pool, fetched)))
+            if not parses:
+                return
+
+            week, page, future = parses.popleft()
+            try:
+                result = (week, finish(week, page, future), None)
+            except Exception as e:
+                result = (week, None, e)
+            yield result
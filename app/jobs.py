@@ -0,0 +1,145 @@
+"""
+Zadania w tle (np. budowanie playlisty) zamiast pracy wewnątrz requestu HTTP.
+
+Tryb wybierany jest zmienną środowiskową JOB_QUEUE:
+- thread (domyślnie)  - pula wątków w procesie aplikacji
+- redis://host:port/db - kolejka w Redisie, zadania wykonuje `python worker.py`
+- eager               - zadanie wykonywane od razu (testy)
+
+Stan zadań trzymany jest w cache (przestrzeń nazw "job"), więc przy
+backendzie SQLite/Redis widzą go wszystkie procesy.
+"""
+import json
+import os
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from .cache import get_cache
+from .utils import safe_int
+
+DEFAULT_JOB_WORKERS = 4
+# Stan zadania trzymamy dobę - wystarczy, żeby użytkownik zobaczył wynik
+JOB_TTL = 24 * 60 * 60
+REDIS_QUEUE_KEY = "playlist_scraper:jobs"
+
+TASKS = {}
+
+_mode = None
+_executor = None
+_redis = None
+
+
+def task(name):
+    """
+    Dekorator rejestrujący funkcję jako zadanie o podanej nazwie.
+    Funkcja dostaje jako pierwszy argument obiekt Job.
+    """
+    def decorator(func):
+        TASKS[name] = func
+        return func
+    return decorator
+
+
+class Job:
+    """Uchwyt przekazywany do zadania - pozwala raportować postęp."""
+
+    def __init__(self, job_id):
+        self.id = job_id
+
+    def progress(self, done, total):
+        _update(self.id, done=done, total=total)
+
+
+def configure(mode=None, workers=None):
+    """
+    Ustawia tryb kolejki (thread, eager lub adres redis://).
+    Bez argumentów czyta JOB_QUEUE i JOB_WORKERS ze środowiska.
+    """
+    global _mode, _executor, _redis
+    _mode = mode or os.environ.get("JOB_QUEUE", "thread")
+    _executor = None
+    _redis = None
+    if _mode == "thread":
+        workers = workers or safe_int(os.environ.get("JOB_WORKERS"), default=DEFAULT_JOB_WORKERS)
+        _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="job")
+    elif _mode.startswith(("redis://", "rediss://", "unix://")):
+        import redis
+
+        _redis = redis.Redis.from_url(_mode)
+    elif _mode != "eager":
+        raise ValueError(f"Unsupported job queue: {_mode}")
+
+
+def enqueue(name, **kwargs):
+    """
+    Dodaje zadanie do kolejki i od razu zwraca jego id.
+    """
+    if name not in TASKS:
+        raise ValueError(f"Unknown task: {name}")
+    if _mode is None:
+        configure()
+
+    job_id = uuid.uuid4().hex
+    get_cache("job").set(job_id, _new_job(job_id), ttl=JOB_TTL)
+
+    if _mode == "eager":
+        run_job(job_id, name, kwargs)
+    elif _redis is not None:
+        _redis.rpush(REDIS_QUEUE_KEY, json.dumps({"id": job_id, "task": name, "kwargs": kwargs}))
+    else:
+        _executor.submit(run_job, job_id, name, kwargs)
+    return job_id
+
+
+def get_job(job_id):
+    """
+    Zwraca stan zadania (słownik) albo None, jeśli nie istnieje lub wygasł.
+    """
+    return get_cache("job").get(job_id)
+
+
+def _new_job(job_id, status="queued"):
+    return {
+        "id": job_id,
+        "status": status,
+        "done": 0,
+        "total": 0,
+        "result": None,
+        "error": None,
+    }
+
+
+def _update(job_id, **fields):
+    """
+    Zapisuje zmienione pola stanu zadania. Stan wypchnięty z cache (limit wpisów)
+    w trakcie pracy zadania jest odtwarzany - inaczej wynik by przepadł.
+    """
+    cache = get_cache("job")
+    job = cache.get(job_id) or _new_job(job_id, status="running")
+    job.update(fields)
+    cache.set(job_id, job, ttl=JOB_TTL)
+
+
+def run_job(job_id, name, kwargs):
+    """
+    Wykonuje zadanie i zapisuje jego wynik albo komunikat błędu.
+    """
+    _update(job_id, status="running")
+    try:
+        result = TASKS[name](Job(job_id), **kwargs)
+    except Exception as e:
+        _update(job_id, status="failed", error=str(e))
+    else:
+        _update(job_id, status="done", result=result)
+
+
+def run_worker(url=None):
+    """
+    Pętla workera dla kolejki Redis - pobiera i wykonuje kolejne zadania.
+    """
+    configure(url or os.environ.get("JOB_QUEUE"))
+    if _redis is None:
+        raise ValueError("Worker requires JOB_QUEUE=redis://...")
+    while True:
+        _, payload = _redis.blpop(REDIS_QUEUE_KEY)
+        message = json.loads(payload)
+        run_job(message["id"], message["task"], message["kwargs"])
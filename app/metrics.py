@@ -0,0 +1,307 @@
+"""
+Pomiary czasu etapów i liczniki, udostępniane w formacie Prometheus
+pod /metrics.
+
+Etapy mierzone są przez `with timer("nazwa"):`. Każdy pomiar trafia do
+histogramu procesu, a jeśli trwa śledzenie (`with trace(...)`) - także do
+podsumowania tego jednego zapytania lub zadania. Przy METRICS_TRACE=1
+podsumowanie zapisywane jest w logu (logger "app.metrics", poziom INFO).
+"""
+import contextvars
+import functools
+import inspect
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from .cache import cache_stats
+from .http_pool import pool_stats
+from .rate_limit import scheduler_stats
+
+PREFIX = "playlist_scraper_"
+# Granice przedziałów histogramu czasu (s)
+TIME_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+# Granice przedziałów liczby zapytań do Spotify na playlistę
+CALL_BUCKETS = (1, 10, 50, 100, 150, 200, 300, 500, 1000)
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_counters = {}
+_histograms = {}
+_current = contextvars.ContextVar("metrics_trace", default=None)
+
+
+class Histogram:
+    """Liczba, suma i rozkład obserwacji."""
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.count += 1
+        self.sum += value
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+
+
+class Trace:
+    """
+    Podsumowanie jednego zapytania lub zadania: czas i liczba wywołań
+    każdego etapu oraz liczniki. Etapy mogą być mierzone w wielu wątkach.
+    Pomiary zagnieżdżonego śledzenia trafiają też do nadrzędnego.
+    """
+
+    def __init__(self, name, parent=None):
+        self.name = name
+        self.parent = parent
+        self.stages = {}
+        self.counters = {}
+        self._start = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def record(self, stage, seconds):
+        with self._lock:
+            count, total = self.stages.get(stage, (0, 0.0))
+            self.stages[stage] = (count + 1, total + seconds)
+        if self.parent is not None:
+            self.parent.record(stage, seconds)
+
+    def add(self, name, value):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+        if self.parent is not None:
+            self.parent.add(name, value)
+
+    @property
+    def elapsed(self):
+        return time.perf_counter() - self._start
+
+    def summary(self):
+        """
+        Zwraca słownik z czasem całkowitym, etapami i licznikami.
+        """
+        with self._lock:
+            return {
+                "name": self.name,
+                "seconds": self.elapsed,
+                "stages": {stage: {"count": count, "seconds": total}
+                           for stage, (count, total) in self.stages.items()},
+                "counters": dict(self.counters),
+            }
+
+
+def _key(name, labels):
+    return name, tuple(sorted(labels.items()))
+
+
+def _stage_name(stage, labels):
+    if not labels:
+        return stage
+    return stage + "[" + ",".join(str(value) for _, value in sorted(labels.items())) + "]"
+
+
+def inc(name, value=1, **labels):
+    """
+    Zwiększa licznik (w procesie i w bieżącym śledzeniu).
+    """
+    with _lock:
+        key = _key(name, labels)
+        _counters[key] = _counters.get(key, 0) + value
+    current = _current.get()
+    if current is not None:
+        current.add(name, value)
+
+
+def observe(name, value, buckets=TIME_BUCKETS, **labels):
+    """
+    Dodaje obserwację do histogramu.
+    """
+    with _lock:
+        key = _key(name, labels)
+        histogram = _histograms.get(key)
+        if histogram is None:
+            histogram = _histograms[key] = Histogram(buckets)
+        histogram.observe(value)
+
+
+@contextmanager
+def timer(stage, **labels):
+    """
+    Mierzy czas bloku jako etap `stage` (także gdy blok rzuci wyjątek).
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        observe("stage_seconds", elapsed, stage=stage, **labels)
+        current = _current.get()
+        if current is not None:
+            current.record(_stage_name(stage, labels), elapsed)
+
+
+def timed(stage):
+    """
+    Dekorator mierzący czas każdego wywołania funkcji (także korutyny) jako etap `stage`.
+    """
+    def decorator(func):
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with timer(stage):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with timer(stage):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def current_trace():
+    return _current.get()
+
+
+def trace_enabled():
+    return os.environ.get("METRICS_TRACE", "").lower() in ("1", "true", "yes")
+
+
+def start_trace(name):
+    """
+    Zaczyna śledzenie w bieżącym kontekście. Zwraca token dla finish_trace.
+    """
+    return _current.set(Trace(name, parent=_current.get()))
+
+
+def finish_trace(token):
+    """
+    Kończy śledzenie, przywraca poprzednie i zwraca zakończony Trace.
+    Przy METRICS_TRACE=1 zapisuje podsumowanie w logu.
+    """
+    finished = _current.get()
+    _current.reset(token)
+    if finished is not None and trace_enabled():
+        logger.info(format_trace(finished))
+    return finished
+
+
+@contextmanager
+def trace(name):
+    """
+    Śledzi etapy wykonane wewnątrz bloku (również w wątkach uruchomionych
+    z kopią kontekstu - zob. contextvars.copy_context).
+    """
+    token = start_trace(name)
+    try:
+        yield _current.get()
+    finally:
+        finish_trace(token)
+
+
+def format_trace(finished):
+    """
+    Jednolinijkowe podsumowanie śledzenia do logu.
+    """
+    summary = finished.summary()
+    stages = " ".join(
+        f"{stage}={data['count']}x{data['seconds']:.3f}s"
+        for stage, data in sorted(summary["stages"].items(), key=lambda item: -item[1]["seconds"])
+    )
+    counters = " ".join(f"{name}={value}" for name, value in sorted(summary["counters"].items()))
+    return f"trace {summary['name']} {summary['seconds']:.3f}s {stages} {counters}".rstrip()
+
+
+def reset():
+    """
+    Zeruje liczniki i histogramy (np. w testach).
+    """
+    with _lock:
+        _counters.clear()
+        _histograms.clear()
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels) + "}"
+
+
+def _format_value(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def _collected():
+    """
+    Zwraca metryki z cache, puli HTTP i harmonogramu Spotify
+    jako listę (nazwa, typ, [(etykiety, wartość)]).
+    """
+    caches = cache_stats()
+    pools = pool_stats()
+    scheduler = scheduler_stats()
+    return [
+        ("cache_hits_total", "counter",
+         [((("namespace", name),), stats["hits"]) for name, stats in caches.items()]),
+        ("cache_misses_total", "counter",
+         [((("namespace", name),), stats["misses"]) for name, stats in caches.items()]),
+        ("cache_hit_ratio", "gauge",
+         [((("namespace", name),), stats["hit_rate"]) for name, stats in caches.items()]),
+        ("http_requests_total", "counter",
+         [((("session", name),), stats["requests"]) for name, stats in pools.items()]),
+        ("http_connections_total", "counter",
+         [((("session", name),), stats["connections"]) for name, stats in pools.items()]),
+        ("spotify_queue_depth", "gauge",
+         [((("priority", name),), depth) for name, depth in scheduler["queued"].items()]),
+        ("spotify_scheduled_calls_total", "counter", [((), scheduler["calls"])]),
+        ("spotify_wait_seconds_total", "counter", [((), scheduler["wait_seconds_total"])]),
+        ("spotify_wait_seconds_max", "gauge", [((), scheduler["wait_seconds_max"])]),
+        ("spotify_throttled_total", "counter", [((), scheduler["throttled"])]),
+    ]
+
+
+def render():
+    """
+    Zwraca wszystkie metryki w formacie tekstowym Prometheus.
+    """
+    lines = []
+    with _lock:
+        counters = sorted(_counters.items())
+        histograms = sorted(_histograms.items(), key=lambda item: item[0])
+        histograms = [(key, (h.buckets, list(h.counts), h.count, h.sum)) for key, h in histograms]
+
+    declared = set()
+    for (name, labels), value in counters:
+        full = f"{PREFIX}{name}_total"
+        if full not in declared:
+            lines.append(f"# TYPE {full} counter")
+            declared.add(full)
+        lines.append(f"{full}{_labels(labels)} {_format_value(value)}")
+
+    for (name, labels), (buckets, counts, count, total) in histograms:
+        full = PREFIX + name
+        if full not in declared:
+            lines.append(f"# TYPE {full} histogram")
+            declared.add(full)
+        for bound, bucket_count in zip(buckets, counts):
+            lines.append(f"{full}_bucket{_labels(labels + (('le', bound),))} {bucket_count}")
+        lines.append(f"{full}_bucket{_labels(labels + (('le', '+Inf'),))} {count}")
+        lines.append(f"{full}_count{_labels(labels)} {count}")
+        lines.append(f"{full}_sum{_labels(labels)} {_format_value(total)}")
+
+    for name, kind, samples in _collected():
+        full = PREFIX + name
+        lines.append(f"# TYPE {full} {kind}")
+        for labels, value in samples:
+            lines.append(f"{full}{_labels(labels)} {_format_value(value)}")
+    return "\n".join(lines) + "\n"
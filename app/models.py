@@ -0,0 +1,40 @@
+"""
+Struktury danych współdzielone przez scraper, cache i klienta Spotify.
+"""
+
+
+class ChartEntry:
+    """
+    Pozycja na liście Billboard. __slots__ - setki tysięcy takich obiektów
+    przy pracy z archiwum zajmują mało pamięci.
+    """
+
+    __slots__ = ("rank", "title", "artist", "weeks_on_chart", "peak")
+
+    def __init__(self, rank, title, artist="", weeks_on_chart=None, peak=None):
+        self.rank = rank
+        self.title = title
+        self.artist = artist
+        self.weeks_on_chart = weeks_on_chart
+        self.peak = peak
+
+    def to_list(self):
+        """
+        Zwraca zwartą postać do zapisu w cache (JSON).
+        """
+        return [self.rank, self.title, self.artist, self.weeks_on_chart, self.peak]
+
+    @classmethod
+    def from_list(cls, values):
+        return cls(*values)
+
+    def __eq__(self, other):
+        if not isinstance(other, ChartEntry):
+            return NotImplemented
+        return self.to_list() == other.to_list()
+
+    def __hash__(self):
+        return hash(tuple(self.to_list()))
+
+    def __repr__(self):
+        return f"ChartEntry({self.rank}, {self.title!r}, {self.artist!r})"
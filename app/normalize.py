@@ -0,0 +1,145 @@
+"""
+Normalizacja tytułów i wykonawców.
+
+Ta sama piosenka bywa zapisana różnie: "Don't" i "Dont", "Beyoncé" i
+"Beyonce", "X Featuring Y" i "X feat. Y", "Song (Remix)". Funkcje z tego
+modułu sprowadzają takie warianty do jednego, kanonicznego klucza, którego
+używają scraper, wyszukiwanie w Spotify, cache utworów i lokalny indeks.
+
+Wyniki są zapamiętywane (LRU) - te same tytuły powtarzają się w kolejnych
+tygodniach setki razy.
+"""
+import re
+import unicodedata
+from functools import lru_cache
+
+# Ile różnych tekstów pamiętamy w każdej funkcji
+NORMALIZE_CACHE_SIZE = 100000
+
+# Typograficzne cudzysłowy, apostrofy i myślniki sprowadzamy do ASCII
+_PUNCTUATION = str.maketrans({
+    "‘": "'", "’": "'", "‚": "'", "‛": "'", "′": "'", "`": "'", "´": "'",
+    "“": '"', "”": '"', "„": '"', "″": '"',
+    "‐": "-", "‑": "-", "‒": "-", "–": "-", "—": "-", "−": "-",
+})
+# Goście w nazwie wykonawcy: "X Featuring Y", "X feat. Y", "X ft. Y". Tylko te
+# oznaczenia oddzielają głównego wykonawcę - "&", "with" i przecinek bywają częścią
+# nazwy ("Simon & Garfunkel", "Earth, Wind & Fire"), ale dzielą listę gości.
+_ARTIST_FEATURING = re.compile(r"\s+(?:featuring|feat\.?|ft\.?)\s+", re.IGNORECASE)
+_ARTIST_SEPARATOR = re.compile(r"\s+(?:featuring|feat\.?|ft\.?|with|&|and)\s+|\s*,\s*", re.IGNORECASE)
+# Goście w tytule: "Song (feat. X)", "Song [ft. X]", "Song feat. X"
+_TITLE_FEATURING = re.compile(
+    r"\s*[(\[]\s*(?:featuring|feat\.?|ft\.?|with)\s+([^)\]]*)[)\]]|\s+(?:featuring|feat\.?|ft\.?)\s+(.*)$",
+    re.IGNORECASE,
+)
+# Dopiski w nawiasach: "(Remix)", "[Live]", "(From ...)"
+_BRACKETS = re.compile(r"\([^)]*\)|\[[^\]]*\]")
+_APOSTROPHES = re.compile(r"(\w)'(\w)|'")
+_NON_WORD = re.compile(r"[^\w\s]")
+
+
+def clean_text(text):
+    """
+    Tekst do wyświetlania: Unicode NFC, bez zbędnych białych znaków.
+    Dla wartości innych niż str zwraca "".
+    """
+    if not isinstance(text, str):
+        return ""
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+
+@lru_cache(maxsize=NORMALIZE_CACHE_SIZE)
+def fold(text):
+    """
+    Tekst do porównań: NFKD bez akcentów, małymi literami, "&" jako "and",
+    bez apostrofów ("Don't" -> "dont") i pozostałej interpunkcji.
+    """
+    text = unicodedata.normalize("NFKD", str(text or "")).translate(_PUNCTUATION)
+    text = "".join(ch for ch in text if not unicodedata.combining(ch)).casefold()
+    text = _APOSTROPHES.sub(r"\1\2", text.replace("&", " and "))
+    return " ".join(_NON_WORD.sub(" ", text).split())
+
+
+@lru_cache(maxsize=NORMALIZE_CACHE_SIZE)
+def split_artist(artist):
+    """
+    Rozdziela nazwę wykonawcy na (główny wykonawca, krotka gości).
+    """
+    parts = _ARTIST_FEATURING.split(clean_text(artist), maxsplit=1)
+    primary = parts[0].strip()
+    if len(parts) == 1:
+        return primary, ()
+    return primary, tuple(part.strip() for part in _ARTIST_SEPARATOR.split(parts[1]) if part.strip())
+
+
+@lru_cache(maxsize=NORMALIZE_CACHE_SIZE)
+def split_title(title):
+    """
+    Usuwa z tytułu gości ("feat. X") - zwraca (tytuł, krotka gości).
+    """
+    featured = []
+
+    def extract(match):
+        names = match.group(1) or match.group(2) or ""
+        featured.extend(part.strip() for part in _ARTIST_SEPARATOR.split(names) if part.strip())
+        return ""
+
+    stripped = _TITLE_FEATURING.sub(extract, clean_text(title)).strip()
+    return stripped, tuple(featured)
+
+
+def featured_artists(title, artist=""):
+    """
+    Goście z tytułu i z nazwy wykonawcy, bez powtórzeń, w kolejności wystąpienia.
+    """
+    names = split_artist(artist)[1] + split_title(title)[1]
+    seen = set()
+    result = []
+    for name in names:
+        key = fold(name)
+        if key and key not in seen:
+            seen.add(key)
+            result.append(name)
+    return result
+
+
+@lru_cache(maxsize=NORMALIZE_CACHE_SIZE)
+def title_key(title):
+    """
+    Kanoniczny klucz tytułu: bez gości i dopisków w nawiasach, po fold().
+    """
+    stripped = split_title(title)[0]
+    key = fold(_BRACKETS.sub(" ", stripped))
+    # Tytuł w całości w nawiasach - zostawiamy jego treść
+    return key or fold(stripped)
+
+
+@lru_cache(maxsize=NORMALIZE_CACHE_SIZE)
+def artist_key(artist):
+    """
+    Kanoniczny klucz wykonawcy: główny wykonawca po fold(), bez "The" na początku.
+    """
+    key = fold(split_artist(artist)[0])
+    if key.startswith("the "):
+        key = key[4:]
+    return key
+
+
+def track_key(title, artist=""):
+    """
+    Kanoniczny klucz utworu "tytuł|wykonawca".
+    """
+    return f"{title_key(title)}|{artist_key(artist)}"
+
+
+def cache_info():
+    """
+    Statystyki pamięci podręcznej funkcji normalizujących.
+    """
+    return {func.__name__: func.cache_info() for func in
+            (fold, split_artist, split_title, title_key, artist_key)}
+
+
+def cache_clear():
+    for func in (fold, split_artist, split_title, title_key, artist_key):
+        func.cache_clear()
@@ -0,0 +1,272 @@
+"""
+Parsery strony z listą Billboard.
+
+Dostępne backendy (zmienna środowiskowa CHART_PARSER):
+- lxml   - XPath na lxml (domyślnie, jeśli zainstalowane: `pip install lxml`)
+- stream - strumieniowy parser na html.parser, bez budowania drzewa
+           (domyślnie bez lxml)
+- bs4    - BeautifulSoup i selektor CSS (pierwotna implementacja)
+
+Każdy backend szuka tytułów w elementach pasujących do selektora `li ul li h3`
+i zwraca listę ChartEntry. Obok tytułu odczytywany jest wykonawca (pierwszy
+<span> za <h3>), pozycja (pierwsze <li> wiersza listy) oraz liczby z kolejnych
+<li> wiersza: pozycja tydzień wcześniej, najwyższa pozycja, liczba tygodni.
+"""
+import os
+import re
+from html.parser import HTMLParser
+from bs4 import BeautifulSoup
+from .models import ChartEntry
+from .normalize import clean_text
+from .utils import safe_int
+
+try:
+    import lxml.html
+except ImportError:  # lxml jest opcjonalne
+    lxml = None
+
+DEFAULT_PARSER = "lxml" if lxml is not None else "stream"
+
+# Elementy bez znacznika zamykającego - nie trafiają na stos
+VOID_TAGS = frozenset([
+    "area", "base", "br", "col", "embed", "hr", "img", "input",
+    "link", "meta", "param", "source", "track", "wbr",
+])
+
+# Komórki statystyk wiersza: liczba albo "-" (nowość na liście)
+_STAT = re.compile(r"^(\d+|-)$")
+
+
+def _normalize(text):
+    # Normalizuj białe znaki (zamień wiele białych znaków na jedną spację) i zapis Unicode
+    return clean_text(text)
+
+
+def _make_entry(index, title, artist, rank_text, stat_texts):
+    """
+    Składa ChartEntry z surowych tekstów; brakujące pola zostają puste.
+    """
+    stats = [text for text in stat_texts if _STAT.match(text)]
+    peak = weeks = None
+    if len(stats) >= 3:
+        # Kolejność kolumn: tydzień wcześniej, najwyższa pozycja, tygodnie na liście
+        peak, weeks = safe_int(stats[1]), safe_int(stats[2])
+    rank = safe_int(rank_text, default=index + 1)
+    return ChartEntry(rank, title, artist, weeks, peak)
+
+
+class _Frame:
+    """Otwarty element na stosie parsera strumieniowego."""
+
+    __slots__ = ("tag", "text", "ul", "lis", "first_li")
+
+    def __init__(self, tag, ul=None):
+        self.tag = tag
+        self.text = None     # lista fragmentów tekstu, jeśli go zbieramy
+        self.ul = ul         # dla <li>: nadrzędna <ul>
+        self.lis = 0         # dla <ul>: liczba otwartych dotąd <li>
+        self.first_li = None  # dla <ul>: tekst pierwszego <li>
+
+
+class _ChartExtractor(HTMLParser):
+    """
+    Przechodzi po dokumencie zdarzeniami i zbiera dane pozycji listy,
+    nie tworząc drzewa dokumentu.
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.entries = []
+        self._stack = []
+        self._open = {}
+        self._capturing = 0
+        self._entry = None
+
+    def _nearest(self, tag, below=None):
+        end = len(self._stack) if below is None else below
+        for i in range(end - 1, -1, -1):
+            if self._stack[i].tag == tag:
+                return i
+        return None
+
+    def _capture(self, frame):
+        frame.text = []
+        self._capturing += 1
+
+    def _start_entry(self):
+        # Stos: ... ul(wiersz) ... li ... ul(wewnętrzna) ... li(tytuł) ... h3
+        title_li = self._nearest("li")
+        inner_ul = self._nearest("ul", title_li) if title_li is not None else None
+        outer_li = self._nearest("li", inner_ul) if inner_ul is not None else None
+        if outer_li is None:
+            return False
+        row_ul = self._nearest("ul", outer_li)
+        self._entry = {
+            "title_li": self._stack[title_li],
+            "inner_ul": self._stack[inner_ul],
+            "rank": self._stack[row_ul].first_li if row_ul is not None else None,
+            "title": None,
+            "artist": "",
+            "stats": [],
+            "phase": "title",
+        }
+        return True
+
+    def _finish_entry(self):
+        entry = self._entry
+        self._entry = None
+        if entry and entry["title"] is not None:
+            self.entries.append(_make_entry(
+                len(self.entries), entry["title"], entry["artist"],
+                entry["rank"], entry["stats"],
+            ))
+
+    def handle_starttag(self, tag, attrs):
+        if tag in VOID_TAGS:
+            return
+        entry = self._entry
+        if tag == "ul":
+            frame = _Frame(tag)
+        elif tag == "li":
+            ul_index = self._nearest("ul")
+            ul = self._stack[ul_index] if ul_index is not None else None
+            frame = _Frame(tag, ul)
+            if ul is not None:
+                ul.lis += 1
+                if ul.lis == 1 or (entry and entry["phase"] == "stats" and ul is entry["inner_ul"]):
+                    self._capture(frame)
+        elif tag == "h3" and not (entry and entry["phase"] == "title"):
+            if entry:
+                self._finish_entry()
+            frame = _Frame(tag)
+            if self._start_entry():
+                self._entry["h3"] = frame
+                self._capture(frame)
+        elif tag == "span" and entry and entry["phase"] == "artist":
+            frame = _Frame(tag)
+            entry["span"] = frame
+            entry["phase"] = "artist_text"
+            self._capture(frame)
+        else:
+            frame = _Frame(tag)
+        self._stack.append(frame)
+        self._open[tag] = self._open.get(tag, 0) + 1
+
+    def handle_startendtag(self, tag, attrs):
+        pass
+
+    def handle_endtag(self, tag):
+        if not self._open.get(tag):
+            return
+        # Zamknij również elementy, których autor strony nie zamknął
+        while self._stack:
+            frame = self._stack.pop()
+            self._close(frame)
+            if frame.tag == tag:
+                break
+
+    def _close(self, frame):
+        self._open[frame.tag] -= 1
+        text = None
+        if frame.text is not None:
+            text = _normalize("".join(frame.text))
+            self._capturing -= 1
+        if frame.tag == "li" and frame.ul is not None and frame.ul.first_li is None and text is not None:
+            frame.ul.first_li = text
+
+        entry = self._entry
+        if entry is None:
+            return
+        if frame is entry.get("h3"):
+            entry["title"] = text
+            entry["phase"] = "artist"
+        elif frame is entry.get("span"):
+            entry["artist"] = text
+            entry["phase"] = "after_artist"
+        elif frame is entry["title_li"]:
+            entry["phase"] = "stats"
+        elif frame.tag == "li" and frame.ul is entry["inner_ul"] and entry["phase"] == "stats":
+            entry["stats"].append(text)
+        elif frame is entry["inner_ul"]:
+            self._finish_entry()
+
+    def handle_data(self, data):
+        if self._capturing:
+            for frame in self._stack:
+                if frame.text is not None:
+                    frame.text.append(data)
+
+    def close(self):
+        super().close()
+        while self._stack:
+            self._close(self._stack.pop())
+        self._finish_entry()
+
+
+def parse_stream(html):
+    parser = _ChartExtractor()
+    parser.feed(html)
+    parser.close()
+    return parser.entries
+
+
+def parse_lxml(html):
+    if lxml is None:
+        raise ImportError("lxml is not installed")
+    tree = lxml.html.fromstring(html)
+    entries = []
+    for h3 in tree.xpath("//li//ul//li//h3"):
+        span = h3.xpath("following-sibling::span[1]")
+        title_li = h3.xpath("ancestor::li[1]")[0]
+        rank_li = title_li.xpath("ancestor::ul[1]/ancestor::li[1]/ancestor::ul[1]/li[1]")
+        entries.append(_make_entry(
+            len(entries),
+            _normalize(h3.text_content()),
+            _normalize(span[0].text_content()) if span else "",
+            _normalize(rank_li[0].text_content()) if rank_li else None,
+            [_normalize(li.text_content()) for li in title_li.xpath("following-sibling::li")],
+        ))
+    return entries
+
+
+def parse_bs4(html):
+    soup = BeautifulSoup(html, "html.parser")
+    entries = []
+    for h3 in soup.select("li ul li h3"):
+        span = h3.find_next_sibling("span")
+        title_li = h3.find_parent("li")
+        row = title_li.find_parent("ul").find_parent("li")
+        row = row.find_parent("ul") if row else None
+        rank_li = row.find("li") if row else None
+        entries.append(_make_entry(
+            len(entries),
+            _normalize(h3.get_text()),
+            _normalize(span.get_text()) if span else "",
+            _normalize(rank_li.get_text()) if rank_li else None,
+            [_normalize(li.get_text()) for li in title_li.find_next_siblings("li")],
+        ))
+    return entries
+
+
+PARSERS = {
+    "stream": parse_stream,
+    "lxml": parse_lxml,
+    "bs4": parse_bs4,
+}
+
+
+def parse_chart(html, backend=None):
+    """
+    Zwraca listę ChartEntry ze strony Billboard wybranym backendem.
+    Gdy szybki parser nic nie znajdzie, próbuje jeszcze BeautifulSoup.
+    """
+    backend = backend or os.environ.get("CHART_PARSER", DEFAULT_PARSER)
+    if backend not in PARSERS:
+        raise ValueError(f"Unknown chart parser: {backend}")
+    if backend == "lxml" and lxml is None:
+        backend = "stream"
+
+    entries = PARSERS[backend](html)
+    if not entries and backend != "bs4":
+        entries = parse_bs4(html)
+    return entries
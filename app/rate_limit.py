@@ -0,0 +1,298 @@
+"""
+Wspólny harmonogram zapytań do Spotify API.
+
+Każde zapytanie SpotifyClient pobiera najpierw token z kubełka (token bucket),
+więc wątki i procesy nie przekraczają razem ustalonego tempa. Odpowiedź 429
+wstrzymuje cały kubełek na czas z nagłówka Retry-After, a nie tylko wątek,
+który ją dostał. Zapytania interaktywne mają pierwszeństwo przed pracą w tle.
+
+Konfiguracja przez zmienne środowiskowe:
+- SPOTIFY_RATE_LIMIT     - zapytań na sekundę (domyślnie 10, 0 = bez limitu)
+- SPOTIFY_BURST          - ile zapytań można wysłać naraz po przerwie (domyślnie 20)
+- SPOTIFY_RATE_LIMIT_URL - memory:// (kubełek w procesie, domyślnie) albo
+                           redis://... (kubełek wspólny dla wszystkich workerów)
+
+Kolejność według priorytetu obowiązuje w obrębie procesu - między procesami
+dzielone jest samo tempo i wstrzymanie po 429.
+"""
+import asyncio
+import heapq
+import itertools
+import os
+import threading
+import time
+from spotipy.exceptions import SpotifyException
+from .utils import safe_int, safe_float
+
+DEFAULT_RATE = 10.0
+DEFAULT_BURST = 20
+# Ile razy ponawiamy zapytanie po odpowiedzi 429 (Too Many Requests)
+RATE_LIMIT_RETRIES = 3
+
+# Priorytety - mniejsza liczba wcześniej
+INTERACTIVE = 0
+BACKGROUND = 10
+PRIORITY_NAMES = {INTERACTIVE: "interactive", BACKGROUND: "background"}
+
+_scheduler = None
+_lock = threading.Lock()
+
+
+class TokenBucket:
+    """Kubełek tokenów w pamięci procesu."""
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = max(burst, 1)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def try_acquire(self):
+        """
+        Bierze token. Zwraca 0, a gdy tokenu nie ma - ile sekund poczekać.
+        """
+        with self._lock:
+            now = time.monotonic()
+            if now < self._paused_until:
+                return self._paused_until - now
+            if self.rate <= 0:
+                return 0.0
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0.0
+            return (1 - self._tokens) / self.rate
+
+    def pause(self, seconds):
+        """Wstrzymuje wydawanie tokenów na podaną liczbę sekund."""
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+
+# Stan kubełka liczony atomowo w Redisie, z zegarem serwera Redis
+_REDIS_ACQUIRE = """
+local now_parts = redis.call('TIME')
+local now = tonumber(now_parts[1]) + tonumber(now_parts[2]) / 1000000
+local paused_until = tonumber(redis.call('GET', KEYS[2]) or '0')
+if now < paused_until then
+    return tostring(paused_until - now)
+end
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+if rate <= 0 then
+    return '0'
+end
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+local tokens = tonumber(state[1]) or burst
+local updated = tonumber(state[2]) or now
+tokens = math.min(burst, tokens + (now - updated) * rate)
+local wait = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+else
+    wait = (1 - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'updated', tostring(now))
+redis.call('EXPIRE', KEYS[1], math.ceil(burst / rate) + 1)
+return tostring(wait)
+"""
+
+_REDIS_PAUSE = """
+local now_parts = redis.call('TIME')
+local now = tonumber(now_parts[1]) + tonumber(now_parts[2]) / 1000000
+local until_ts = now + tonumber(ARGV[1])
+local current = tonumber(redis.call('GET', KEYS[1]) or '0')
+if until_ts > current then
+    redis.call('SET', KEYS[1], tostring(until_ts), 'PX', math.ceil(tonumber(ARGV[1]) * 1000))
+end
+return 1
+"""
+
+
+class RedisTokenBucket:
+    """Kubełek tokenów w Redisie, wspólny dla wszystkich procesów."""
+
+    def __init__(self, url, rate, burst, prefix="playlist_scraper:spotify_rate:"):
+        import redis
+
+        self.client = redis.Redis.from_url(url)
+        self.rate = rate
+        self.burst = max(burst, 1)
+        self._keys = [prefix + "bucket", prefix + "paused_until"]
+        self._acquire = self.client.register_script(_REDIS_ACQUIRE)
+        self._pause = self.client.register_script(_REDIS_PAUSE)
+
+    def try_acquire(self):
+        return float(self._acquire(keys=self._keys, args=[self.rate, self.burst]))
+
+    def pause(self, seconds):
+        self._pause(keys=self._keys[1:], args=[seconds])
+
+
+class Scheduler:
+    """
+    Wydaje tokeny czekającym wątkom według priorytetu (a przy równym -
+    w kolejności zgłoszenia) i zbiera statystyki kolejki.
+    """
+
+    def __init__(self, bucket):
+        self.bucket = bucket
+        self._cond = threading.Condition()
+        self._waiters = []
+        self._seq = itertools.count()
+        self._calls = 0
+        self._throttled = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+
+    def acquire(self, priority=INTERACTIVE):
+        """
+        Czeka na swoją kolej i token z kubełka.
+        """
+        ticket = (priority, next(self._seq))
+        start = time.monotonic()
+        with self._cond:
+            heapq.heappush(self._waiters, ticket)
+        try:
+            while True:
+                with self._cond:
+                    while self._waiters[0] != ticket:
+                        self._cond.wait()
+                    wait = self.bucket.try_acquire()
+                if wait <= 0:
+                    break
+                time.sleep(wait)
+        finally:
+            waited = time.monotonic() - start
+            with self._cond:
+                self._waiters.remove(ticket)
+                heapq.heapify(self._waiters)
+                self._calls += 1
+                self._wait_total += waited
+                self._wait_max = max(self._wait_max, waited)
+                self._cond.notify_all()
+
+    async def acquire_async(self, priority=INTERACTIVE):
+        """
+        Czeka na token bez blokowania pętli zdarzeń. Korutyny dzielą kubełek
+        i statystyki z wątkami, ale nie stają w ich kolejce priorytetów -
+        każda próbuje wziąć token po upływie wskazanego przez kubełek czasu.
+        """
+        ticket = (priority, next(self._seq))
+        start = time.monotonic()
+        with self._cond:
+            heapq.heappush(self._waiters, ticket)
+        try:
+            while True:
+                wait = await self._bucket_async(self.bucket.try_acquire)
+                if wait <= 0:
+                    break
+                await asyncio.sleep(wait)
+        finally:
+            waited = time.monotonic() - start
+            with self._cond:
+                self._waiters.remove(ticket)
+                heapq.heapify(self._waiters)
+                self._calls += 1
+                self._wait_total += waited
+                self._wait_max = max(self._wait_max, waited)
+                self._cond.notify_all()
+
+    def throttle(self, retry_after):
+        """
+        Odnotowuje odpowiedź 429 i wstrzymuje kubełek na retry_after sekund.
+        """
+        with self._cond:
+            self._throttled += 1
+        self.bucket.pause(retry_after)
+
+    async def throttle_async(self, retry_after):
+        """
+        throttle dla korutyn - bez blokowania pętli zdarzeń.
+        """
+        with self._cond:
+            self._throttled += 1
+        await self._bucket_async(self.bucket.pause, retry_after)
+
+    async def _bucket_async(self, func, *args):
+        """
+        Wywołuje metodę kubełka z korutyny. Kubełek w Redisie odpytujemy
+        w wątku - zapytanie sieciowe zatrzymałoby pętlę zdarzeń.
+        """
+        if isinstance(self.bucket, TokenBucket):
+            return func(*args)
+        return await asyncio.to_thread(func, *args)
+
+    def call(self, func, *args, priority=INTERACTIVE, **kwargs):
+        """
+        Wywołuje metodę spotipy po uzyskaniu tokenu. Po odpowiedzi 429
+        wstrzymuje kubełek na czas z Retry-After i próbuje ponownie.
+        """
+        for attempt in range(RATE_LIMIT_RETRIES + 1):
+            self.acquire(priority)
+            try:
+                return func(*args, **kwargs)
+            except SpotifyException as e:
+                if e.http_status != 429 or attempt == RATE_LIMIT_RETRIES:
+                    raise
+                headers = e.headers or {}
+                self.throttle(safe_int(headers.get("Retry-After"), default=1))
+
+    def stats(self):
+        """
+        Zwraca długość kolejki (łącznie i według priorytetu), liczbę zapytań,
+        czas oczekiwania na token i liczbę odpowiedzi 429.
+        """
+        with self._cond:
+            queued = {name: 0 for name in PRIORITY_NAMES.values()}
+            for priority, _ in self._waiters:
+                name = PRIORITY_NAMES.get(priority, str(priority))
+                queued[name] = queued.get(name, 0) + 1
+            return {
+                "queue_depth": len(self._waiters),
+                "queued": queued,
+                "calls": self._calls,
+                "wait_seconds_total": self._wait_total,
+                "wait_seconds_max": self._wait_max,
+                "throttled": self._throttled,
+            }
+
+
+def configure(url=None, rate=None, burst=None):
+    """
+    Tworzy harmonogram z nowym kubełkiem.
+    Bez argumentów czyta SPOTIFY_RATE_LIMIT_URL, SPOTIFY_RATE_LIMIT i SPOTIFY_BURST.
+    """
+    global _scheduler
+    url = url or os.environ.get("SPOTIFY_RATE_LIMIT_URL", "memory://")
+    if rate is None:
+        rate = safe_float(os.environ.get("SPOTIFY_RATE_LIMIT"), default=DEFAULT_RATE)
+    if burst is None:
+        burst = safe_int(os.environ.get("SPOTIFY_BURST"), default=DEFAULT_BURST)
+
+    if url.startswith("memory://"):
+        bucket = TokenBucket(rate, burst)
+    elif url.startswith(("redis://", "rediss://", "unix://")):
+        bucket = RedisTokenBucket(url, rate, burst)
+    else:
+        raise ValueError(f"Unsupported rate limit URL: {url}")
+
+    with _lock:
+        _scheduler = Scheduler(bucket)
+    return _scheduler
+
+
+def get_scheduler():
+    """
+    Zwraca harmonogram procesu, tworząc go przy pierwszym użyciu.
+    """
+    if _scheduler is None:
+        configure()
+    return _scheduler
+
+
+def scheduler_stats():
+    return get_scheduler().stats()
@@ -1,30 +1,80 @@
-from flask import Blueprint, render_template, request, redirect, session, url_for, flash
+from flask import Blueprint, render_template, request, redirect, session, url_for, flash, jsonify, abort, g, Response
 from datetime import datetime
-from .scraper import get_top_100
+from . import jobs, metrics
+from .charts import CHARTS, DEFAULT_CHART, get_chart
+from .scraper import get_chart_entries, get_chart_range, range_weeks
+from .rate_limit import BACKGROUND
 from .spotify import SpotifyClient
-from .utils import validate_date
+from .utils import validate_date, safe_int, chart_week
+
+# Ile pierwszych pozycji każdego tygodnia trafia do playlisty z zakresu dat
+RANGE_TOP_CHOICES = (1, 5, 10, 20, 40, 100)
 
 routes = Blueprint("routes", __name__)
 
+@routes.before_app_request
+def start_request_trace():
+    """Per-request stage timings, logged when METRICS_TRACE=1."""
+    if metrics.trace_enabled():
+        g.metrics_trace = metrics.start_trace(f"{request.method} {request.path}")
+
+
+@routes.teardown_app_request
+def finish_request_trace(exc):
+    token = g.pop("metrics_trace", None)
+    if token is not None:
+        metrics.finish_trace(token)
+
+
 @routes.route("/", methods=["GET"])
 def index():
     """Homepage with date form."""
     # Ustaw maksymalną datę na dzisiaj
     max_date = datetime.now().strftime("%Y-%m-%d")
-    return render_template("index.html", max_date=max_date)
+    return render_template("index.html", max_date=max_date, top_choices=RANGE_TOP_CHOICES,
+                           charts=CHARTS.values(), default_chart=DEFAULT_CHART)
 
 @routes.route("/start", methods=["POST"])
 def start():
     """Validate date and begin Spotify OAuth."""
     user_date = request.form.get("date")
+    chart_id = request.form.get("chart") or DEFAULT_CHART
+    end_date = request.form.get("end_date", "").strip()
+    top = safe_int(request.form.get("top"), default=100)
     playlist_name = request.form.get("playlist_name", "").strip()
     
     if not validate_date(user_date):
         flash("Invalid date format. Use YYYY-MM-DD.", "error")
         return redirect(url_for("routes.index"))
 
-    # Save date and optional playlist name in session
+    try:
+        chart = get_chart(chart_id)
+    except ValueError as e:
+        flash(f"{e}.", "error")
+        return redirect(url_for("routes.index"))
+
+    # Optional end date turns the playlist into a multi-week one
+    if end_date:
+        if not validate_date(end_date):
+            flash("Invalid end date format. Use YYYY-MM-DD.", "error")
+            return redirect(url_for("routes.index"))
+        try:
+            range_weeks(user_date, end_date, chart.id)
+        except ValueError as e:
+            flash(f"{e}.", "error")
+            return redirect(url_for("routes.index"))
+        if top not in RANGE_TOP_CHOICES or top > chart.size:
+            flash("Invalid number of songs per week.", "error")
+            return redirect(url_for("routes.index"))
+    elif chart_week(user_date) < chart.first_date:
+        flash(f"{chart.name} starts on {chart.first_date}.", "error")
+        return redirect(url_for("routes.index"))
+
+    # Save dates and optional playlist name in session
     session["selected_date"] = user_date
+    session["chart"] = chart.id
+    session["end_date"] = end_date or None
+    session["top"] = top
     session["playlist_name"] = playlist_name if playlist_name else None
 
     # Redirect to Spotify login
@@ -49,9 +99,61 @@ def callback():
     return redirect(url_for("routes.create_playlist"))
 
 
+@jobs.task("build_playlist")
+def build_playlist(job, user_date, playlist_name, token_info, chart_id=DEFAULT_CHART):
+    """Background job: scrape Billboard and build the Spotify playlist."""
+    with metrics.trace("build_playlist") as trace:
+        try:
+            # Step 1: Scrape Billboard
+            try:
+                songs = get_chart_entries(chart_id, user_date)
+            except Exception:
+                raise Exception("Failed to fetch Billboard data.")
+
+            spotify = SpotifyClient(token_info=token_info)
+
+            # Step 2: Create playlist
+            try:
+                return spotify.create_playlist_from_songs(user_date, songs, playlist_name,
+                                                          progress=job.progress, chart_id=chart_id)
+            except Exception:
+                raise Exception("Spotify playlist creation failed.")
+        finally:
+            # Ile zapytań do Spotify kosztowała jedna playlista
+            metrics.observe("playlist_spotify_api_calls", trace.counters.get("spotify_api_calls", 0),
+                            buckets=metrics.CALL_BUCKETS)
+
+
+@jobs.task("build_range_playlist")
+def build_range_playlist(job, start_date, end_date, top, playlist_name, token_info,
+                         chart_id=DEFAULT_CHART):
+    """Background job: scrape every week of a date range and build one playlist."""
+    with metrics.trace("build_range_playlist") as trace:
+        try:
+            # Step 1: Scrape Billboard, each song only once
+            try:
+                songs = get_chart_range(start_date, end_date, top=top, chart_id=chart_id, with_weeks=True)
+            except Exception:
+                raise Exception("Failed to fetch Billboard data.")
+
+            # Setki wyszukiwań - zapytania użytkowników mają pierwszeństwo
+            spotify = SpotifyClient(token_info=token_info, priority=BACKGROUND)
+
+            # Step 2: Create playlist
+            try:
+                return spotify.create_playlist_from_range(start_date, end_date, songs, playlist_name,
+                                                          progress=job.progress, top=top,
+                                                          chart_id=chart_id)
+            except Exception:
+                raise Exception("Spotify playlist creation failed.")
+        finally:
+            metrics.observe("playlist_spotify_api_calls", trace.counters.get("spotify_api_calls", 0),
+                            buckets=metrics.CALL_BUCKETS)
+
+
 @routes.route("/create_playlist")
 def create_playlist():
-    """Generate playlist from Billboard top 100."""
+    """Start building the playlist in the background."""
     user_date = session.get("selected_date")
     playlist_name = session.get("playlist_name")
     
@@ -59,20 +161,55 @@ def create_playlist():
         flash("Session expired. Please try again.", "error")
         return redirect(url_for("routes.index"))
 
-        # Step 1: Scrape Billboard
-    try:
-        songs = get_top_100(user_date)
-    except Exception:
-        flash("Failed to fetch Billboard data.", "error")
+    end_date = session.get("end_date")
+    if end_date:
+        job_id = jobs.enqueue(
+            "build_range_playlist",
+            start_date=user_date,
+            end_date=end_date,
+            top=session.get("top", 100),
+            playlist_name=playlist_name,
+            token_info=session.get("spotify_token"),
+            chart_id=session.get("chart", DEFAULT_CHART),
+        )
+        return redirect(url_for("routes.job", job_id=job_id))
+
+    job_id = jobs.enqueue(
+        "build_playlist",
+        user_date=user_date,
+        playlist_name=playlist_name,
+        token_info=session.get("spotify_token"),
+        chart_id=session.get("chart", DEFAULT_CHART),
+    )
+    return redirect(url_for("routes.job", job_id=job_id))
+
+
+@routes.route("/jobs/<job_id>")
+def job(job_id):
+    """Progress page of a playlist job, or its result once finished."""
+    state = jobs.get_job(job_id)
+    if state is None:
+        abort(404)
+
+    if state["status"] == "failed":
+        flash(state["error"], "error")
         return redirect(url_for("routes.index"))
+    if state["status"] == "done":
+        return render_template("playlist_created.html", playlist_url=state["result"])
 
-    spotify = SpotifyClient()
+    return render_template("job.html", job=state)
+
+
+@routes.route("/jobs/<job_id>/status")
+def job_status(job_id):
+    """Job state as JSON, polled by script.js."""
+    state = jobs.get_job(job_id)
+    if state is None:
+        return jsonify({"error": "Job not found"}), 404
+    return jsonify(state)
 
-    # Step 2: Create playlist
-    try:
-        playlist_url = spotify.create_playlist_from_songs(user_date, songs, playlist_name)
-    except Exception:
-        flash("Spotify playlist creation failed.", "error")
-        return redirect(url_for("routes.index"))
 
-    return render_template("playlist_created.html", playlist_url=playlist_url)
\ No newline at end of file
+@routes.route("/metrics")
+def prometheus_metrics():
+    """Stage timings, counters, cache and pool stats in Prometheus text format."""
+    return Response(metrics.render(), mimetype="text/plain; version=0.0.4")
@@ -1,33 +1,326 @@
+import contextvars
+import os
+import threading
+import time
 import requests
-from bs4 import BeautifulSoup
+from collections import namedtuple
+from requests.utils import DEFAULT_ACCEPT_ENCODING
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from . import metrics, normalize
+from .archive import get_archive
+from .cache import get_cache
+from .charts import DEFAULT_CHART, get_chart
+from .http_pool import get_session
+from .models import ChartEntry
+from .utils import chart_week, iter_chart_weeks, safe_float, safe_int
 
-BASIC_URL = "https://www.billboard.com/charts/hot-100/"
+# Lista z bieżącego tygodnia może się jeszcze zmienić - trzymamy ją krócej
+CURRENT_WEEK_TTL = 6 * 60 * 60
 
-def get_top_100(date_str):
+# Walidatory (ETag/Last-Modified) z wynikiem ostatniego pobrania listy, która może
+# się jeszcze zmienić - trzymane dłużej niż sama lista, żeby ponowne pobranie
+# mogło skończyć się odpowiedzią 304
+VALIDATOR_TTL = 30 * 24 * 60 * 60
+
+# Najdłuższy zakres dat jednej playlisty (~10 lat notowań)
+MAX_RANGE_WEEKS = 530
+# Ile tygodni zakresu pobieramy z billboard.com naraz
+DEFAULT_RANGE_WORKERS = 4
+# Ile zapytań na sekundę wysyłają do billboard.com razem wszystkie zakresy dat w procesie
+DEFAULT_RANGE_RATE = 2.0
+
+# Pobrana, jeszcze nieparsowana strona listy (size - bajty po dekompresji)
+RawPage = namedtuple("RawPage", ["text", "size", "wire_bytes", "etag", "last_modified"])
+
+
+def _chart_ttl(date_str):
+    """
+    Zwraca TTL dla listy z danej daty: starsze notowania nie zmieniają się już nigdy.
+    """
+    try:
+        chart_date = datetime.strptime(date_str, "%Y-%m-%d")
+    except (ValueError, TypeError):
+        return CURRENT_WEEK_TTL
+    if chart_date >= datetime.now() - timedelta(days=7):
+        return CURRENT_WEEK_TTL
+    return None
+
+
+def get_top_100(date_str, session=None):
     """
     Pobiera listę top 100 utworów z Billboard dla podanej daty (YYYY-MM-DD)
-    Zwraca listę nazw utworów.
+    Zwraca listę ChartEntry (pozycja, tytuł, wykonawca, tygodnie, najwyższa pozycja).
+    Skrót dla get_chart_entries(DEFAULT_CHART, date_str).
+    """
+    return get_chart_entries(DEFAULT_CHART, date_str, session=session)
+
+
+class RateLimiter:
+    """Pilnuje odstępu między zapytaniami do billboard.com (wspólnego dla wątków)."""
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._next = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self):
+        with self._lock:
+            now = time.monotonic()
+            delay = self._next - now
+            self._next = max(now, self._next) + self.interval
+        if delay > 0:
+            time.sleep(delay)
+
+
+_range_limiter = None
+_range_limiter_lock = threading.Lock()
+
+
+def _range_throttle():
+    """
+    Czeka na swoją kolej przed pobraniem tygodnia zakresu dat. Tempo (CHART_RANGE_RATE)
+    jest wspólne dla wszystkich zadań w procesie.
+    """
+    global _range_limiter
+    with _range_limiter_lock:
+        if _range_limiter is None:
+            _range_limiter = RateLimiter(
+                safe_float(os.environ.get("CHART_RANGE_RATE"), default=DEFAULT_RANGE_RATE)
+            )
+    _range_limiter.wait()
+
+
+def get_chart_entries(chart_id, date_str, session=None, throttle=None):
+    """
+    Pobiera listę o podanym id (zob. charts.CHARTS) dla daty (YYYY-MM-DD).
+    Data zamieniana jest na datę notowania, a wynik trafia do cache, więc kolejne
+    zapytania o ten sam tydzień nie odpytują billboard.com.
+    Opcjonalna session zastępuje współdzieloną sesję HTTP, a throttle wywoływane
+    jest przed zapytaniem do billboard.com (tylko gdy listy nie ma w cache).
+    """
+    chart, week = _chart_and_week(chart_id, date_str)
+    archived = _archived(chart, week)
+    if archived is not None:
+        return archived
+
+    def load():
+        if throttle:
+            throttle()
+        return [song.to_list() for song in _fetch_chart(chart, week, session=session)]
+
+    # Równoczesne zapytania o ten sam tydzień czekają na jedno pobranie
+    with metrics.timer("get_chart", chart=chart.id):
+        cached = get_cache("chart").get_or_load(chart.cache_key(week), load, ttl=_chart_ttl(week))
+    return [ChartEntry.from_list(values) for values in cached]
+
+
+def _chart_and_week(chart_id, date_str):
+    """
+    Zwraca (opis listy, data notowania) albo rzuca ValueError.
+    """
+    chart = get_chart(chart_id)
+    week = chart_week(date_str)
+    if week is None:
+        raise ValueError(f"Invalid date: {date_str}")
+    if week < chart.first_date:
+        raise ValueError(f"{chart.name} starts on {chart.first_date}")
+    return chart, week
+
+
+def _archived(chart, week):
+    """
+    Zwraca listę z archiwum kolumnowego (zob. archive.py) albo None. Archiwum
+    trzyma tylko notowania, które już się nie zmienią.
+    """
+    archive = get_archive(chart.id)
+    if archive is None or _chart_ttl(week) is not None:
+        return None
+    entries = archive.get(week)
+    if entries is not None:
+        metrics.inc("chart_archive_hits", chart=chart.id)
+    return entries
+
+
+def _header(response, name):
+    value = response.headers.get(name)
+    return value if isinstance(value, str) else None
+
+
+def _wire_bytes(response):
+    """
+    Liczba bajtów odebranych z sieci (przed dekompresją gzip/brotli).
+    """
+    received = getattr(response.raw, "tell", lambda: None)()
+    if isinstance(received, int) and received > 0:
+        return received
+    length = safe_int(_header(response, "Content-Length"), default=None)
+    return length if length is not None else len(response.content)
+
+
+def _request_headers(chart, week):
+    """
+    Zwraca nagłówki zapytania o stronę listy i zapamiętany wynik poprzedniego
+    pobrania (albo None). Dla list, które mogą się jeszcze zmienić, nagłówki
+    zawierają walidatory - zapytanie jest warunkowe.
     """
-    url = BASIC_URL + date_str
     headers = {
         "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
                       "AppleWebKit/537.36 (KHTML, like Gecko) "
-                      "Chrome/114.0.0.0 Safari/537.36"
+                      "Chrome/114.0.0.0 Safari/537.36",
+        # gzip zawsze, brotli gdy zainstalowany pakiet brotli
+        "Accept-Encoding": DEFAULT_ACCEPT_ENCODING,
     }
+    # Archiwalne notowania nie zmieniają się - nie ma czego walidować
+    if _chart_ttl(week) is None:
+        return headers, None
+    stored = get_cache("chart_validators").get(chart.cache_key(week))
+    if stored:
+        if stored.get("etag"):
+            headers["If-None-Match"] = stored["etag"]
+        if stored.get("last_modified"):
+            headers["If-Modified-Since"] = stored["last_modified"]
+    return headers, stored
+
+
+def _not_modified(stored):
+    """
+    Wynik dla odpowiedzi 304 - zapamiętane pozycje, bez pobierania i parsowania.
+    """
+    metrics.inc("billboard_not_modified")
+    metrics.inc("billboard_bytes_saved", stored["size"])
+    return [ChartEntry.from_list(values) for values in stored["entries"]]
+
+
+def _parse_page(chart, week, text, size, wire_bytes, etag=None, last_modified=None):
+    """
+    Parsuje pobraną stronę listy i zapamiętuje walidatory razem z wynikiem.
+    """
+    _count_page(size, wire_bytes)
+
+    # Selekcja tytułów utworów (li ul li h3) wraz z wykonawcą i statystykami
+    with metrics.timer("billboard_parse"):
+        songs = chart.parse(text)
+    return _store_page(chart, week, songs, size, etag, last_modified)
+
+
+def _count_page(size, wire_bytes):
+    metrics.inc("billboard_bytes_received", wire_bytes)
+    metrics.inc("billboard_bytes_decoded", size)
+
+
+def _store_page(chart, week, songs, size, etag=None, last_modified=None):
+    """
+    Sprawdza wynik parsowania strony i zapamiętuje walidatory razem z nim.
+    """
+    if not songs:
+        raise Exception("Could not parse Billboard page — selector may have changed.")
+
+    if _chart_ttl(week) is not None and (etag or last_modified):
+        get_cache("chart_validators").set(chart.cache_key(week), {
+            "etag": etag,
+            "last_modified": last_modified,
+            "size": size,
+            "entries": [song.to_list() for song in songs],
+        }, ttl=VALIDATOR_TTL)
+    return songs
+
+
+def _fetch_chart(chart, week, session=None):
+    """
+    Pobiera i parsuje stronę listy bez udziału cache listy.
+
+    Dla list, które mogą się jeszcze zmienić, zapamiętuje ETag/Last-Modified
+    razem z wynikiem i przy kolejnym pobraniu wysyła zapytanie warunkowe -
+    odpowiedź 304 zwraca zapamiętany wynik bez pobierania i parsowania strony.
+    """
+    page, entries = _download(chart, week, session=session)
+    if entries is not None:
+        return entries
+    return _parse_page(chart, week, *page)
+
+
+def _download(chart, week, session=None):
+    """
+    Pobiera stronę listy bez parsowania. Zwraca (RawPage, None) albo - po
+    odpowiedzi 304 - (None, zapamiętane pozycje).
+    """
+    session = session or get_session("billboard")
+    headers, stored = _request_headers(chart, week)
 
     try:
-        response = requests.get(url, headers=headers, timeout=10)
-        response.raise_for_status()
+        with metrics.timer("billboard_fetch"):
+            response = session.get(chart.url(week), headers=headers, timeout=10)
+            response.raise_for_status()
     except requests.RequestException as e:
         raise Exception(f"Error fetching Billboard page: {e}")
 
-    soup = BeautifulSoup(response.text, "html.parser")
+    if response.status_code == 304 and stored:
+        return None, _not_modified(stored)
+    return RawPage(
+        response.text, len(response.content), _wire_bytes(response),
+        _header(response, "ETag"), _header(response, "Last-Modified"),
+    ), None
 
-    # Selekcja tytułów utworów
-    song_spans = soup.select("li ul li h3")
-    if not song_spans:
-        raise Exception("Could not parse Billboard page — selector may have changed.")
 
-    # Normalizuj białe znaki (zamień wiele białych znaków na jedną spację)
-    songs = [" ".join(song.get_text().split()) for song in song_spans]
-    return songs
+def range_weeks(start_str, end_str, chart_id=DEFAULT_CHART):
+    """
+    Zwraca listę tygodni notowań zakresu (od pierwszego notowania listy).
+    ValueError, gdy zakres jest niepoprawny, odwrócony albo dłuższy niż MAX_RANGE_WEEKS.
+    """
+    first_date = get_chart(chart_id).first_date
+    weeks = [week for week in iter_chart_weeks(start_str, end_str) if week >= first_date]
+    if not weeks:
+        raise ValueError("End date is before start date")
+    if len(weeks) > MAX_RANGE_WEEKS:
+        raise ValueError(f"Date range is too long (max {MAX_RANGE_WEEKS} weeks)")
+    return weeks
+
+
+def unique_entries(entries, entry_of=None):
+    """
+    Zwraca pozycje bez powtórzeń tego samego utworu (kanoniczny klucz tytułu
+    i wykonawcy), w kolejności pierwszego wystąpienia. entry_of wyciąga pozycję
+    z elementu, np. z pary (tydzień, pozycja).
+    """
+    seen = set()
+    unique = []
+    for item in entries:
+        entry = entry_of(item) if entry_of else item
+        key = normalize.track_key(entry.title, entry.artist)
+        if key not in seen:
+            seen.add(key)
+            unique.append(item)
+    return unique
+
+
+def get_chart_range(start_str, end_str, top=100, max_workers=None, chart_id=DEFAULT_CHART,
+                    with_weeks=False):
+    """
+    Pobiera listy wszystkich tygodni od start_str do end_str (przez cache
+    get_chart_entries, najwyżej max_workers tygodni naraz) i zwraca utwory z pierwszych
+    `top` pozycji każdego tygodnia - każdy utwór raz, w kolejności pierwszego
+    wystąpienia. Np. top=1 dla roku to wszystkie utwory z pierwszego miejsca.
+    Tygodnie spoza cache pobierane są w tempie CHART_RANGE_RATE.
+    Przy with_weeks=True zwraca pary (tydzień pierwszego wystąpienia, utwór).
+    """
+    weeks = range_weeks(start_str, end_str, chart_id)
+    max_workers = max_workers or safe_int(
+        os.environ.get("CHART_RANGE_WORKERS"), default=DEFAULT_RANGE_WORKERS
+    )
+
+    def fetch(week):
+        return get_chart_entries(chart_id, week, throttle=_range_throttle)
+
+    with metrics.timer("get_chart_range"):
+        if max_workers <= 1 or len(weeks) == 1:
+            charts = [fetch(week) for week in weeks]
+        else:
+            # Wątki dostają kopię kontekstu, żeby pomiary trafiły do bieżącego śledzenia
+            context = contextvars.copy_context()
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                charts = list(executor.map(lambda week: context.copy().run(fetch, week), weeks))
+        # Listy są uporządkowane według pozycji
+        pairs = ((week, entry) for week, chart in zip(weeks, charts) for entry in chart[:top])
+        unique = unique_entries(pairs, entry_of=lambda pair: pair[1])
+    return unique if with_weeks else [entry for _, entry in unique]
@@ -0,0 +1,123 @@
+"""
+Sesja Flask trzymana po stronie serwera. W ciasteczku zostaje tylko
+krótki, podpisany identyfikator sesji, a dane (token Spotify, wybrana
+data itp.) leżą w backendzie cache.
+
+Backend wybierany jest zmienną środowiskową SESSION_URL, tak jak CACHE_URL:
+memory:// (LRU w procesie), sqlite:///sessions.db (domyślnie) lub redis://...
+"""
+import os
+import secrets
+import threading
+import time
+from flask.json.tag import TaggedJSONSerializer
+from flask.sessions import SessionInterface, SessionMixin
+from itsdangerous import BadSignature, Signer
+from werkzeug.datastructures import CallbackDict
+from .cache import backend_from_url
+
+DEFAULT_SESSION_URL = "sqlite:///sessions.db"
+DEFAULT_MAX_SESSIONS = 100000
+# Co ile sekund usuwamy z backendu wygasłe sesje
+SWEEP_INTERVAL = 5 * 60
+
+
+class ServerSideSession(CallbackDict, SessionMixin):
+    """Słownik sesji, który pamięta, czy został zmieniony."""
+
+    def __init__(self, initial=None, sid=None, new=False):
+        def on_update(self):
+            self.modified = True
+            self.accessed = True
+
+        super().__init__(initial, on_update)
+        self.sid = sid
+        self.new = new
+        self.modified = False
+        self.accessed = False
+
+
+class ServerSideSessionInterface(SessionInterface):
+    """
+    Interfejs sesji Flask zapisujący dane w backendzie cache.
+    Backend tworzony jest przy pierwszym użyciu.
+    """
+
+    serializer = TaggedJSONSerializer()
+
+    def __init__(self, backend=None, url=None):
+        self._backend = backend
+        self._url = url
+        self._lock = threading.Lock()
+        self._last_sweep = time.monotonic()
+
+    @property
+    def backend(self):
+        if self._backend is None:
+            with self._lock:
+                if self._backend is None:
+                    url = self._url or os.environ.get("SESSION_URL", DEFAULT_SESSION_URL)
+                    self._backend = backend_from_url(
+                        url, max_entries=DEFAULT_MAX_SESSIONS, prefix="playlist_scraper_session:"
+                    )
+        return self._backend
+
+    def _signer(self, app):
+        return Signer(app.secret_key, salt="server-side-session")
+
+    def _key(self, sid):
+        return f"session:{sid}"
+
+    def open_session(self, app, request):
+        cookie = request.cookies.get(self.get_cookie_name(app))
+        if cookie:
+            try:
+                sid = self._signer(app).unsign(cookie).decode("utf-8")
+            except BadSignature:
+                sid = None
+            if sid:
+                raw = self.backend.get(self._key(sid))
+                if raw is not None:
+                    return ServerSideSession(self.serializer.loads(raw), sid=sid)
+        return ServerSideSession(sid=secrets.token_urlsafe(16), new=True)
+
+    def save_session(self, app, session, response):
+        name = self.get_cookie_name(app)
+        domain = self.get_cookie_domain(app)
+        path = self.get_cookie_path(app)
+
+        if session.accessed:
+            response.vary.add("Cookie")
+
+        # Pusta sesja - usuwamy dane i ciasteczko
+        if not session:
+            if session.modified:
+                self.backend.delete(self._key(session.sid))
+                response.delete_cookie(name, domain=domain, path=path)
+                response.vary.add("Cookie")
+            return
+
+        if not (session.new or self.should_set_cookie(app, session)):
+            return
+
+        lifetime = app.permanent_session_lifetime.total_seconds()
+        self.backend.set(self._key(session.sid), self.serializer.dumps(dict(session)), ttl=lifetime)
+        self._sweep()
+        response.set_cookie(
+            name,
+            self._signer(app).sign(session.sid).decode("utf-8"),
+            expires=self.get_expiration_time(app, session),
+            httponly=self.get_cookie_httponly(app),
+            domain=domain,
+            path=path,
+            secure=self.get_cookie_secure(app),
+            samesite=self.get_cookie_samesite(app),
+        )
+        response.vary.add("Cookie")
+
+    def _sweep(self):
+        now = time.monotonic()
+        if now - self._last_sweep < SWEEP_INTERVAL:
+            return
+        self._last_sweep = now
+        self.backend.sweep()
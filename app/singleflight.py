@@ -0,0 +1,94 @@
+"""
+Łączenie równoczesnych wywołań o ten sam klucz (single-flight): pierwszy
+wątek wykonuje funkcję, pozostałe czekają na jego wynik.
+AsyncSingleFlight robi to samo dla korutyn w pętli zdarzeń.
+"""
+import asyncio
+import threading
+
+
+class _Call:
+    __slots__ = ("event", "result", "error")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Grupa wywołań - jedno wykonanie na klucz naraz w obrębie procesu."""
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, func):
+        """
+        Wykonuje func() albo, jeśli ktoś już ją wykonuje dla tego klucza,
+        czeka i zwraca ten sam wynik (lub rzuca ten sam wyjątek).
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = func()
+            return call.result
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.event.set()
+
+    def in_flight(self):
+        """
+        Zwraca liczbę trwających wywołań.
+        """
+        with self._lock:
+            return len(self._calls)
+
+
+class AsyncSingleFlight:
+    """Jedno wykonanie korutyny na klucz naraz w obrębie pętli zdarzeń."""
+
+    def __init__(self):
+        self._calls = {}
+
+    async def do(self, key, func):
+        """
+        Czeka na func() albo, jeśli ktoś już na nią czeka dla tego klucza,
+        zwraca ten sam wynik (lub rzuca ten sam wyjątek).
+        """
+        loop = asyncio.get_running_loop()
+        # Future należy do jednej pętli - różne pętle (wątki) nie dzielą wywołań
+        call_key = (loop, key)
+        future = self._calls.get(call_key)
+        if future is not None:
+            return await asyncio.shield(future)
+
+        future = self._calls[call_key] = loop.create_future()
+        try:
+            result = await func()
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            future.set_exception(e)
+            # Bez czekających wyjątek i tak trafia do wywołującego
+            future.exception()
+            raise
+        finally:
+            del self._calls[call_key]
+
+    def in_flight(self):
+        return len(self._calls)
@@ -1,28 +1,319 @@
+import contextvars
+import hashlib
 import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from flask import session, url_for
+import requests
 import spotipy
+from spotipy.cache_handler import CacheHandler
+from spotipy.exceptions import SpotifyException
 from spotipy.oauth2 import SpotifyOAuth
+from urllib3.exceptions import NewConnectionError
+from . import metrics, normalize
+from .cache import get_cache
+from .charts import DEFAULT_CHART, get_chart
+from .http_pool import get_session
+from .models import ChartEntry
+from .rate_limit import INTERACTIVE, get_scheduler
+from .track_index import TrackIndex
+from .utils import safe_int, chunk_list, chart_week
+
+# Wersja algorytmu dopasowania utworów. Zwiększ ją po każdej zmianie wyszukiwania
+# (zapytanie, klucz, wybór trafienia) - zapisane dopasowania przestaną być używane.
+MATCHING_VERSION = 5
+
+# Znalezione utwory trzymamy długo, brak wyniku krócej (katalog Spotify się zmienia)
+TRACK_CACHE_TTL = 30 * 24 * 60 * 60
+TRACK_MISS_CACHE_TTL = 24 * 60 * 60
+
+DEFAULT_SEARCH_WORKERS = 8
+
+# Token odświeżamy, gdy do jego wygaśnięcia zostało mniej niż tyle sekund
+TOKEN_REFRESH_MARGIN = 120
+# Ilu użytkowników trzymamy z gotowym obiektem spotipy
+MAX_USER_CLIENTS = 1000
+
+# Spotify przyjmuje najwyżej 100 utworów w jednym playlist_add_items
+PLAYLIST_ADD_LIMIT = 100
+# Ile razy ponawiamy dodanie paczki utworów po błędzie przejściowym (zob. _is_transient)
+ADD_CHUNK_RETRIES = 2
+# Co ile znalezionych utworów dodajemy je do playlisty w trakcie wyszukiwania -
+# mniej niż PLAYLIST_ADD_LIMIT, żeby dodawanie zaczęło się też przy Hot 100
+PLAYLIST_FLUSH_SIZE = 25
+
+
+def _is_transient(error):
+    """
+    Czy po tym błędzie można bezpiecznie ponowić dodanie utworów: błąd serwera
+    (5xx) albo połączenie, przez które zapytanie nie zostało wysłane. Po 400/401/403
+    ponowienie nic nie da, a po przekroczeniu czasu odpowiedzi utwory mogły już
+    zostać dodane. 429 obsługuje harmonogram zapytań.
+    """
+    if isinstance(error, SpotifyException):
+        return error.http_status is not None and error.http_status >= 500
+    if isinstance(error, requests.exceptions.ConnectTimeout):
+        return True
+    if isinstance(error, requests.exceptions.ConnectionError):
+        reason = getattr(error.args[0], "reason", None) if error.args else None
+        return isinstance(reason, NewConnectionError)
+    return False
+
+
+def _track_key(song_name, year, artist=None):
+    """
+    Klucz cache utworu z kanonicznych kluczy tytułu i wykonawcy (zob. normalize).
+    Rok wchodzi do klucza tylko bez wykonawcy - wtedy wyszukiwanie zależy od roku.
+    """
+    artist = normalize.artist_key(artist)
+    return f"v{MATCHING_VERSION}|{normalize.title_key(song_name)}|{artist}|{'' if artist else year}"
+
+
+def _resolved_key(date_str, chart_id=DEFAULT_CHART):
+    """
+    Klucz gotowej listy URI dla listy, tygodnia notowania i wersji dopasowania.
+    """
+    week = chart_week(date_str)
+    return f"v{MATCHING_VERSION}|{get_chart(chart_id).cache_key(week)}" if week else None
+
+
+def _track_index():
+    """
+    Lokalny indeks znalezionych utworów dla bieżącej wersji dopasowania.
+    """
+    return TrackIndex(get_cache("track_index"), version=MATCHING_VERSION)
+
+
+def _songs_fingerprint(song_list, year):
+    """
+    Skrót listy utworów - zapisana lista URI pasuje tylko do tej samej listy.
+    """
+    keys = []
+    for song in song_list:
+        title, artist = _song_fields(song)
+        keys.append(_track_key(title, year, artist))
+    return hashlib.sha1("\n".join(keys).encode("utf-8")).hexdigest()
+
+
+def _song_fields(song):
+    """
+    Zwraca (tytuł, wykonawca) dla ChartEntry albo samego tytułu.
+    """
+    if isinstance(song, ChartEntry):
+        return song.title, song.artist
+    return song, None
+
+
+def _token_expiring(token_info):
+    """
+    Czy token trzeba odświeżyć - wygaśnie za mniej niż TOKEN_REFRESH_MARGIN sekund.
+    Token bez refresh_token zostaje, jaki jest.
+    """
+    expires_at = token_info.get("expires_at")
+    return bool(token_info.get("refresh_token") and expires_at is not None
+                and expires_at - time.time() < TOKEN_REFRESH_MARGIN)
+
+
+def _search_query(song_name, year, artist):
+    """
+    Zapytanie do wyszukiwarki Spotify: tytuł z głównym wykonawcą albo - bez
+    wykonawcy - z rokiem. Goście z tytułu ("feat. X") tylko przeszkadzają.
+    """
+    title = normalize.split_title(song_name)[0] or song_name
+    if artist:
+        return f"track:{title} artist:{normalize.split_artist(artist)[0]}"
+    return f"track:{title} year:{year}"
+
+
+def _first_uri(result):
+    items = result["tracks"]["items"]
+    return items[0]["uri"] if items else None
+
+
+def _indexed_uri(song_name, artist, year):
+    """
+    URI utworu z lokalnego indeksu albo None.
+    """
+    found = _track_index().match(song_name, artist, year)
+    if found:
+        metrics.inc("track_index_matches")
+        return found[0]
+    return None
+
+
+def _add_retry_delay(transient, attempt):
+    """
+    Ile sekund czekać przed ponowieniem dodania paczki utworów, albo None,
+    gdy błąd nie jest przejściowy lub skończyły się próby.
+    """
+    if not transient or attempt == ADD_CHUNK_RETRIES:
+        return None
+    return 2 ** attempt
+
+
+def _playlist_details(date_str, custom_name, chart):
+    """
+    Zwraca (nazwa, opis) playlisty z jednego tygodnia listy.
+    """
+    name = custom_name if custom_name else f"{date_str} {chart.playlist_title}"
+    description = f"Top songs from {date_str}" if chart.id == DEFAULT_CHART else f"{chart.name} from {date_str}"
+    return name, description
+
+
+def _load_resolved(date_str, song_list, year, chart_id):
+    """
+    Zwraca (klucz, skrót listy, URI) gotowej listy URI tygodnia. URI to None,
+    gdy listy nie ma albo zapisano ją dla innych utworów.
+    """
+    key = _resolved_key(date_str, chart_id)
+    fingerprint = _songs_fingerprint(song_list, year)
+    cached = get_cache("resolved").get(key) if key else None
+    uris = cached["uris"] if cached and cached["songs"] == fingerprint else None
+    return key, fingerprint, uris
+
+
+def _save_resolved(key, fingerprint, uris):
+    if key:
+        # Nieznalezione utwory mogą pojawić się w katalogu - takie listy trzymamy krócej
+        ttl = TRACK_MISS_CACHE_TTL if None in uris else TRACK_CACHE_TTL
+        get_cache("resolved").set(key, {"songs": fingerprint, "uris": uris}, ttl=ttl)
+
+
+class _NoTokenCache(CacheHandler):
+    """
+    OAuth jest współdzielony przez wszystkich użytkowników, więc nie może
+    pamiętać niczyjego tokenu - tokeny żyją w sesji użytkownika.
+    """
+
+    def get_cached_token(self):
+        return None
+
+    def save_token_to_cache(self, token_info):
+        pass
+
+
+class UserToken:
+    """
+    Token jednego użytkownika. spotipy pyta o niego przed każdym zapytaniem,
+    a on odświeża się sam, zanim wygaśnie.
+    """
+
+    def __init__(self, token_info, oauth):
+        self.token_info = token_info
+        self.oauth = oauth
+        self._lock = threading.Lock()
+
+    def get_access_token(self, as_dict=False):
+        with self._lock:
+            if _token_expiring(self.token_info):
+                self.token_info = self.oauth.refresh_access_token(self.token_info["refresh_token"])
+            return self.token_info if as_dict else self.token_info["access_token"]
+
+
+_oauth_managers = {}
+_user_clients = OrderedDict()
+_clients_lock = threading.Lock()
+
+
+def get_oauth_manager(client_id, client_secret, redirect_uri, scope):
+    """
+    Zwraca obiekt SpotifyOAuth współdzielony w procesie dla danej aplikacji.
+    """
+    key = (client_id, client_secret, redirect_uri, scope)
+    with _clients_lock:
+        oauth = _oauth_managers.get(key)
+        if oauth is None:
+            oauth = _oauth_managers[key] = SpotifyOAuth(
+                client_id=client_id,
+                client_secret=client_secret,
+                redirect_uri=redirect_uri,
+                scope=scope,
+                show_dialog=True,
+                cache_handler=_NoTokenCache(),
+                requests_session=get_session("spotify"),
+            )
+        return oauth
+
+
+def reset_clients():
+    """
+    Zapomina współdzielone obiekty OAuth i klientów użytkowników (np. w testach).
+    """
+    with _clients_lock:
+        _oauth_managers.clear()
+        _user_clients.clear()
+
 
 class SpotifyClient:
-    def __init__(self):
+    def __init__(self, max_workers=None, token_info=None, requests_session=None, priority=INTERACTIVE):
         self.client_id = os.environ.get("SPOTIPY_CLIENT_ID")
         self.client_secret = os.environ.get("SPOTIPY_CLIENT_SECRET")
         self.redirect_uri = os.environ.get("SPOTIPY_REDIRECT_URI")
         self.scope = "playlist-modify-public playlist-modify-private"
         self.sp = None
+        # Token przekazany wprost (np. w zadaniu w tle, gdzie nie ma sesji Flask)
+        self.token_info = token_info
+        # Współdzielona sesja HTTP - połączenia do api.spotify.com są ponownie używane
+        self.requests_session = requests_session or get_session("spotify")
+        # Liczba równoległych wyszukiwań (1 = po kolei)
+        self.max_workers = max_workers or safe_int(
+            os.environ.get("SPOTIFY_SEARCH_WORKERS"), default=DEFAULT_SEARCH_WORKERS
+        )
+        # Priorytet w harmonogramie zapytań (rate_limit.INTERACTIVE / BACKGROUND)
+        self.priority = priority
 
-    def get_auth_url(self):
+    def _oauth(self):
+        return get_oauth_manager(self.client_id, self.client_secret, self.redirect_uri, self.scope)
+
+    def _client(self):
+        """
+        Zwraca obiekt spotipy, tworząc go z tokenu w sesji przy pierwszym użyciu.
         """
-                Tworzy URL do logowania użytkownika Spotify.
-                """
-        oauth = SpotifyOAuth(
-            client_id=self.client_id,
-            client_secret=self.client_secret,
-            redirect_uri=self.redirect_uri,
-            scope=self.scope,
-            show_dialog=True,
-            cache_path=None  # Wyłączamy cache, który może powodować problemy
+        if not self.sp:
+            token_info = self.token_info or session.get("spotify_token")
+            if not token_info:
+                raise Exception("User is not authenticated.")
+            self.sp = self._build_client(token_info)
+        return self.sp
+
+    def _build_client(self, token_info):
+        """
+        Zwraca obiekt spotipy danego użytkownika - współdzielony między requestami
+        i zadaniami, z tokenem odświeżanym automatycznie.
+        """
+        # refresh_token nie zmienia się przy odświeżaniu - dobrze identyfikuje użytkownika
+        key = token_info.get("refresh_token") or token_info["access_token"]
+        with _clients_lock:
+            client = _user_clients.get(key)
+            if client is not None:
+                _user_clients.move_to_end(key)
+                return client
+        client = spotipy.Spotify(
+            auth_manager=UserToken(token_info, self._oauth()),
+            requests_session=self.requests_session,
         )
+        with _clients_lock:
+            client = _user_clients.setdefault(key, client)
+            while len(_user_clients) > MAX_USER_CLIENTS:
+                _user_clients.popitem(last=False)
+        return client
+
+    def _call(self, func, *args, **kwargs):
+        """
+        Wywołuje metodę spotipy przez wspólny harmonogram zapytań.
+        """
+        method = getattr(func, "__name__", "call")
+        metrics.inc("spotify_api_calls", method=method)
+        with metrics.timer("spotify_api", method=method):
+            return get_scheduler().call(func, *args, priority=self.priority, **kwargs)
+
+    def get_auth_url(self):
+        """
+        Tworzy URL do logowania użytkownika Spotify.
+        """
+        oauth = self._oauth()
         auth_url = oauth.get_authorize_url()
 
         session["oauth_state"] = oauth.state
@@ -32,73 +323,181 @@ class SpotifyClient:
         """
         Wymienia code od Spotify na access token i zapisuje w sesji.
         """
-        oauth = SpotifyOAuth(
-            client_id=self.client_id,
-            client_secret=self.client_secret,
-            redirect_uri=self.redirect_uri,
-            scope=self.scope,
-            cache_path=None  # Wyłączamy cache
-        )
-        token_info = oauth.get_access_token(code)
+        token_info = self._oauth().get_access_token(code)
         session["spotify_token"] = token_info
         # Tworzymy obiekt spotipy do dalszego użycia
-        self.sp = spotipy.Spotify(auth=token_info["access_token"])
+        self.sp = self._build_client(token_info)
 
     def get_user_id(self):
         """
         Zwraca Spotify user_id aktualnie zalogowanego użytkownika.
         """
-        if not self.sp:
-            token_info = session.get("spotify_token")
-            if not token_info:
-                raise Exception("User is not authenticated.")
-            self.sp = spotipy.Spotify(auth=token_info["access_token"])
-        return self.sp.current_user()["id"]
+        return self._call(self._client().current_user)["id"]
 
-    def search_song(self, song_name, year):
+    def search_song(self, song_name, year, artist=None):
         """
         Szuka utworu na Spotify, zwraca URI pierwszego trafienia.
+        Ze znanym wykonawcą sprawdza najpierw lokalny indeks utworów, potem szuka
+        po tytule i wykonawcy, bez niego - po tytule i roku.
+        Wynik (także brak trafienia) zapisywany jest w cache.
         """
-        if not self.sp:
-            token_info = session.get("spotify_token")
-            if not token_info:
-                raise Exception("User is not authenticated.")
-            self.sp = spotipy.Spotify(auth=token_info["access_token"])
+        # Równoczesne wyszukiwania tego samego utworu czekają na jedno zapytanie
+        with metrics.timer("search_song"):
+            cached = get_cache("track").get_or_load(
+                _track_key(song_name, year, artist),
+                lambda: {"uri": self._resolve_uri(song_name, year, artist)},
+                ttl=lambda value: TRACK_CACHE_TTL if value["uri"] else TRACK_MISS_CACHE_TTL,
+            )
+        return cached["uri"]
 
-        result = self.sp.search(q=f"track:{song_name} year:{year}", type="track")
-        try:
-            uri = result["tracks"]["items"][0]["uri"]
+    def _resolve_uri(self, song_name, year, artist):
+        """
+        Zwraca URI z lokalnego indeksu, a gdy go tam nie ma - z wyszukiwania w Spotify.
+        Znalezione w Spotify utwory trafiają do indeksu.
+        """
+        uri = _indexed_uri(song_name, artist, year)
+        if uri:
             return uri
-        except IndexError:
-            return None
+        uri = self._search_uri(song_name, year, artist)
+        if uri:
+            _track_index().add(song_name, artist, year, uri)
+        return uri
 
-    def create_playlist_from_songs(self, date_str, song_list, custom_name=None):
+    def _search_uri(self, song_name, year, artist):
         """
-        Tworzy playlistę na koncie zalogowanego użytkownika.
-        Zwraca link do playlisty.
+        Odpytuje Spotify bez udziału cache, zwraca URI pierwszego trafienia albo None.
         """
-        user_id = self.get_user_id()
-        year = date_str.split("-")[0]
+        query = _search_query(song_name, year, artist)
+        return _first_uri(self._call(self._client().search, q=query, type="track"))
+
+    def iter_resolved(self, song_list, year, years=None):
+        """
+        Wyszukuje utwory (ChartEntry albo tytuły), najwyżej max_workers naraz,
+        i zwraca je kolejno (URI albo None) w kolejności song_list, gdy tylko są gotowe.
+        years podaje rok osobno dla każdego utworu (zamiast wspólnego year).
+        """
+        def search(song, song_year):
+            title, artist = _song_fields(song)
+            return self.search_song(title, song_year, artist)
 
-        # Tworzymy URI dla piosenek
-        song_uris = []
-        for song in song_list:
-            uri = self.search_song(song, year)
-            if uri:
-                song_uris.append(uri)
+        years = years or [year] * len(song_list)
+        if self.max_workers <= 1 or len(song_list) <= 1:
+            for song, song_year in zip(song_list, years):
+                yield search(song, song_year)
+            return
 
-        # Ustaw nazwę playlisty
-        playlist_name = custom_name if custom_name else f"{date_str} Billboard 100"
+        # Obiekt spotipy tworzymy tutaj - wątki robocze nie mają dostępu do sesji Flask
+        self._client()
+        # Wątki dostają kopię kontekstu, żeby pomiary trafiły do bieżącego śledzenia
+        context = contextvars.copy_context()
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            yield from executor.map(lambda song, song_year: context.copy().run(search, song, song_year),
+                                    song_list, years)
 
-        # Tworzymy playlistę
-        playlist = self.sp.user_playlist_create(
+    @metrics.timed("resolve_songs")
+    def resolve_songs(self, song_list, year):
+        """
+        Zwraca listę URI (None dla nieznalezionych) w kolejności song_list.
+        """
+        return list(self.iter_resolved(song_list, year))
+
+    @metrics.timed("add_tracks")
+    def add_tracks(self, playlist_id, uris):
+        """
+        Dodaje utwory do playlisty paczkami po PLAYLIST_ADD_LIMIT, zachowując kolejność.
+        Paczka, której nie udało się dodać z powodu błędu przejściowego, jest
+        ponawiana osobno; pozostałe błędy przerywają dodawanie.
+        """
+        for chunk in chunk_list(list(uris), PLAYLIST_ADD_LIMIT):
+            for attempt in range(ADD_CHUNK_RETRIES + 1):
+                try:
+                    self._call(self._client().playlist_add_items,
+                               playlist_id=playlist_id, items=chunk)
+                    break
+                except Exception as e:
+                    delay = _add_retry_delay(_is_transient(e), attempt)
+                    if delay is None:
+                        raise
+                    time.sleep(delay)
+
+    def _create_playlist(self, name, description):
+        """
+        Tworzy pustą, prywatną playlistę zalogowanego użytkownika.
+        """
+        user_id = self.get_user_id()
+        return self._call(
+            self.sp.user_playlist_create,
             user=user_id,
-            name=playlist_name,
+            name=name,
             public=False,
-            description=f"Top songs from {date_str}"
+            description=description
         )
-        # Dodajemy utwory
-        if song_uris:
-            self.sp.playlist_add_items(playlist_id=playlist["id"], items=song_uris)
 
-        return playlist["external_urls"]["spotify"]
\ No newline at end of file
+    def _add_resolved(self, playlist_id, song_list, year, progress=None, unique=False, years=None):
+        """
+        Wyszukuje utwory i dodaje znalezione do playlisty paczkami po
+        PLAYLIST_FLUSH_SIZE już w trakcie wyszukiwania kolejnych. Przy unique=True
+        ten sam URI dodawany jest raz. years - jak w iter_resolved.
+        Zwraca listę URI (None dla nieznalezionych) w kolejności song_list.
+        """
+        uris = []
+        batch = []
+        added = set()
+        for done, uri in enumerate(self.iter_resolved(song_list, year, years), start=1):
+            if progress:
+                progress(done, len(song_list))
+            uris.append(uri)
+            if uri and not (unique and uri in added):
+                added.add(uri)
+                batch.append(uri)
+            if len(batch) == PLAYLIST_FLUSH_SIZE:
+                self.add_tracks(playlist_id, batch)
+                batch = []
+        if batch:
+            self.add_tracks(playlist_id, batch)
+        return uris
+
+    @metrics.timed("create_playlist")
+    def create_playlist_from_songs(self, date_str, song_list, custom_name=None, progress=None,
+                                   chart_id=DEFAULT_CHART):
+        """
+        Tworzy playlistę na koncie zalogowanego użytkownika z listy chart_id.
+        Opcjonalny progress(done, total) wywoływany jest po każdym wyszukanym utworze.
+        Zwraca link do playlisty.
+        """
+        year = date_str.split("-")[0]
+        chart = get_chart(chart_id)
+
+        # Tworzymy playlistę
+        playlist = self._create_playlist(*_playlist_details(date_str, custom_name, chart))
+        # Ten sam tydzień był już dopasowany - wystarczy dodać gotowe URI
+        key, fingerprint, uris = _load_resolved(date_str, song_list, year, chart.id)
+        if uris is not None:
+            if progress:
+                progress(len(song_list), len(song_list))
+            self.add_tracks(playlist["id"], [uri for uri in uris if uri])
+            return playlist["external_urls"]["spotify"]
+
+        uris = self._add_resolved(playlist["id"], song_list, year, progress)
+        _save_resolved(key, fingerprint, uris)
+        return playlist["external_urls"]["spotify"]
+
+    @metrics.timed("create_playlist")
+    def create_playlist_from_range(self, start_str, end_str, song_list, custom_name=None,
+                                   progress=None, top=100, chart_id=DEFAULT_CHART):
+        """
+        Tworzy jedną playlistę z utworów wielu tygodni. song_list to pary
+        (tydzień, utwór) z scraper.get_chart_range(..., with_weeks=True), już bez
+        powtórzeń - każdy utwór jest wyszukiwany raz (bez wykonawcy - z rokiem
+        swojego tygodnia), a utwory, które Spotify zwróciło pod tym samym URI,
+        dodawane są raz. Zwraca link do playlisty.
+        """
+        chart = get_chart(chart_id)
+        playlist_name = custom_name if custom_name else f"{start_str} - {end_str} {chart.name} Top {top}"
+        playlist = self._create_playlist(
+            playlist_name, f"Top {top} songs of every {chart.name} week from {start_str} to {end_str}"
+        )
+        songs = [song for _, song in song_list]
+        years = [week.split("-")[0] for week, _ in song_list]
+        self._add_resolved(playlist["id"], songs, start_str.split("-")[0], progress, unique=True, years=years)
+        return playlist["external_urls"]["spotify"]
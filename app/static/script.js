@@ -37,6 +37,34 @@ if (form) {
     });
 }
 
+// Odpytywanie o postęp budowania playlisty (strona zadania)
+const jobCard = document.querySelector('.job-card');
+if (jobCard) {
+    const statusUrl = jobCard.dataset.statusUrl;
+    const resultUrl = jobCard.dataset.resultUrl;
+    const message = jobCard.querySelector('.job-message');
+    const fill = jobCard.querySelector('.progress-fill');
+    
+    const poll = function() {
+        fetch(statusUrl)
+            .then(response => response.json())
+            .then(job => {
+                if (job.status === 'done' || job.status === 'failed' || job.error) {
+                    // Strona zadania pokaże wynik albo błąd
+                    window.location.href = resultUrl;
+                    return;
+                }
+                if (job.total) {
+                    message.textContent = `Matched ${job.done} of ${job.total} songs`;
+                    fill.style.width = Math.floor(100 * job.done / job.total) + '%';
+                }
+                setTimeout(poll, 1000);
+            })
+            .catch(() => setTimeout(poll, 3000));
+    };
+    setTimeout(poll, 1000);
+}
+
 // Animacja pól input przy focusie
 const inputs = document.querySelectorAll('input[type="date"], input[type="text"]');
 inputs.forEach(input => {
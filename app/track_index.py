@@ -0,0 +1,165 @@
+"""
+Lokalny indeks utworów znalezionych już w Spotify.
+
+Każdy utwór, który wyszukiwanie w Spotify odnalazło, zapisywany jest w
+indeksie (tytuł, wykonawca, rok, URI). Przed zapytaniem do API
+SpotifyClient.search_song sprawdza, czy indeks nie zna już tego utworu
+pod trochę inną nazwą - starsze listy powtarzają w kolejnych tygodniach
+w większości te same utwory, więc większość wyszukiwań kończy się lokalnie.
+
+Indeks podzielony jest na wpisy cache (przestrzeń nazw "track_index")
+według wykonawcy, więc przy backendzie SQLite/Redis widzą go wszystkie
+procesy. Tytuły porównywane są przez trigramy kanonicznych kluczy
+(normalize.title_key); tytuły z różnymi liczbami ("Part 1" i "Part 2") albo
+z inną liczbą słów ("Baby" i "Baby Baby") nigdy nie są uznawane za ten sam
+utwór, a krótkie tytuły muszą być podobne bardziej niż pozostałe.
+
+Konfiguracja: TRACK_INDEX_THRESHOLD - minimalne podobieństwo tytułu
+(0-1, domyślnie 0.85); 1 wyłącza dopasowanie przybliżone.
+"""
+import os
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from .cache import LOCK_TTL
+from .normalize import artist_key, title_key
+from .utils import safe_float
+
+DEFAULT_THRESHOLD = 0.85
+# Krótkie tytuły różnią się kilkoma trigramami - dla nich próg jest wyższy
+# ("Yesterday" i "Yesterdays" to 0.86)
+SHORT_TITLE_LENGTH = 12
+SHORT_TITLE_THRESHOLD = 0.9
+# Utwory w indeksie trzymamy tyle, co znalezione utwory w cache
+INDEX_TTL = 30 * 24 * 60 * 60
+# Ilu utworów jednego wykonawcy najwyżej pilnujemy
+MAX_TRACKS_PER_ARTIST = 2000
+# Co ile sekund sprawdzamy, czy inny proces zwolnił wpis wykonawcy
+ADD_LOCK_POLL_INTERVAL = 0.01
+
+# Wątki procesu czekają na siebie tutaj, procesy - na blokadzie w backendzie cache
+_lock = threading.Lock()
+
+
+def trigrams(text):
+    """
+    Trigramy znaków (z odstępami na brzegach słów) z liczbą wystąpień -
+    powtórzone słowa ("baby baby") liczą się tyle razy, ile występują.
+    """
+    padded = f"  {text} "
+    return Counter(padded[i:i + 3] for i in range(len(padded) - 2))
+
+
+def similarity(a, b):
+    """
+    Podobieństwo dwóch znormalizowanych tekstów (współczynnik Dice trigramów, 0-1).
+    """
+    if a == b:
+        return 1.0
+    grams_a, grams_b = trigrams(a), trigrams(b)
+    if not grams_a or not grams_b:
+        return 0.0
+    common = sum((grams_a & grams_b).values())
+    return 2 * common / (sum(grams_a.values()) + sum(grams_b.values()))
+
+
+def _numbers(text):
+    """
+    Liczby w znormalizowanym tytule ("rock and roll part 2" -> ("2",)).
+    """
+    return tuple(word for word in text.split() if word.isdigit())
+
+
+def _year(value):
+    try:
+        return int(str(value)[:4])
+    except (TypeError, ValueError):
+        return None
+
+
+class TrackIndex:
+    """
+    Indeks utworów na wybranym Cache. version oddziela wpisy różnych
+    wersji algorytmu dopasowania.
+    """
+
+    def __init__(self, cache, version=1, threshold=None):
+        self.cache = cache
+        self.version = version
+        if threshold is None:
+            threshold = safe_float(os.environ.get("TRACK_INDEX_THRESHOLD"), default=DEFAULT_THRESHOLD)
+        self.threshold = threshold
+
+    def _key(self, artist):
+        return f"v{self.version}|{artist_key(artist)}"
+
+    def add(self, title, artist, year, uri):
+        """
+        Zapisuje znaleziony utwór. Utwory bez wykonawcy nie trafiają do indeksu.
+        """
+        if not artist_key(artist) or not uri:
+            return
+        normalized = title_key(title)
+        key = self._key(artist)
+        with _lock, self._artist_lock(key):
+            tracks = self.cache.get(key) or []
+            tracks = [track for track in tracks if track[0] != normalized]
+            tracks.append([normalized, _year(year), uri])
+            self.cache.set(key, tracks[-MAX_TRACKS_PER_ARTIST:], ttl=INDEX_TTL)
+
+    @contextmanager
+    def _artist_lock(self, key):
+        """
+        Blokada wpisu wykonawcy w backendzie cache, żeby procesy dopisujące
+        równocześnie utwory tego samego wykonawcy nie nadpisały sobie zmian.
+        Po LOCK_TTL sekund zapisujemy mimo to - właściciel blokady mógł paść.
+        """
+        lock_key = self.cache._key(key) + "|add"
+        backend = self.cache.backend
+        locked = backend.acquire_lock(lock_key, LOCK_TTL)
+        deadline = time.monotonic() + LOCK_TTL
+        while not locked and time.monotonic() < deadline:
+            time.sleep(ADD_LOCK_POLL_INTERVAL)
+            locked = backend.acquire_lock(lock_key, LOCK_TTL)
+        try:
+            yield
+        finally:
+            if locked:
+                backend.release_lock(lock_key)
+
+    def match(self, title, artist, year=None):
+        """
+        Zwraca (uri, podobieństwo) najlepiej pasującego utworu tego wykonawcy
+        albo None, jeśli żaden nie przekracza progu.
+        """
+        if not artist_key(artist):
+            return None
+        tracks = self.cache.get(self._key(artist))
+        if not tracks:
+            return None
+
+        normalized = title_key(title)
+        numbers = _numbers(normalized)
+        words = len(normalized.split())
+        threshold = self.threshold
+        if len(normalized) < SHORT_TITLE_LENGTH:
+            threshold = max(threshold, SHORT_TITLE_THRESHOLD)
+        target_year = _year(year)
+        best = None
+        for indexed_title, indexed_year, uri in tracks:
+            # "Baby" i "Baby Baby" albo "Part 1" i "Part 2" są do siebie podobne,
+            # ale to różne utwory
+            if len(indexed_title.split()) != words or _numbers(indexed_title) != numbers:
+                continue
+            score = similarity(normalized, indexed_title)
+            if score < threshold:
+                continue
+            # Przy równym podobieństwie wygrywa utwór z najbliższego roku
+            distance = abs(target_year - indexed_year) if target_year and indexed_year else 0
+            candidate = (score, -distance, uri)
+            if best is None or candidate > best:
+                best = candidate
+        if best is None:
+            return None
+        return best[2], best[0]
@@ -1,4 +1,17 @@
-from datetime import datetime
+from datetime import datetime, timedelta
+from .normalize import clean_text
+
+# Pierwsze notowanie Hot 100
+FIRST_CHART_DATE = datetime(1958, 8, 4)
+# Do końca 1961 notowania datowane były na poniedziałek, od 1962 - na sobotę
+LAST_MONDAY_CHART_DATE = datetime(1961, 12, 25)
+FIRST_SATURDAY_CHART_DATE = datetime(1962, 1, 6)
+# Billboard publikuje notowanie we wtorek, 4 dni przed datą notowania (sobotą)
+PUBLISH_LEAD = timedelta(days=4)
+
+
+def _today():
+    return datetime.combine(datetime.now().date(), datetime.min.time())
 
 
 def validate_date(date_str):
@@ -15,13 +28,55 @@ def validate_date(date_str):
         return False
 
 
+def chart_week(date_str):
+    """
+    Zamienia dowolną datę (YYYY-MM-DD) na datę notowania Billboard, które ją obejmuje:
+    najbliższą sobotę (przed 1962 - poniedziałek) w tej dacie lub po niej.
+    Notowanie, które nie zostało jeszcze opublikowane (np. dla niedzieli
+    i poniedziałku bieżącego tygodnia), zastępuje ostatnie opublikowane.
+    Zwraca datę w formacie YYYY-MM-DD albo None dla niepoprawnej daty.
+    """
+    if not validate_date(date_str):
+        return None
+    day = datetime.strptime(date_str, "%Y-%m-%d")
+    if day <= FIRST_CHART_DATE:
+        return FIRST_CHART_DATE.strftime("%Y-%m-%d")
+
+    if day <= LAST_MONDAY_CHART_DATE:
+        chart_date = day + timedelta(days=-day.weekday() % 7)
+    else:
+        chart_date = max(day + timedelta(days=(5 - day.weekday()) % 7),
+                         FIRST_SATURDAY_CHART_DATE)
+        published = _today() + PUBLISH_LEAD
+        if chart_date > published:
+            # Ostatnia sobota nie później niż dziś + 4 dni
+            chart_date = published - timedelta(days=(published.weekday() - 5) % 7)
+    return chart_date.strftime("%Y-%m-%d")
+
+
+def iter_chart_weeks(start_str, end_str):
+    """
+    Zwraca kolejne daty notowań (YYYY-MM-DD) od tygodnia start_str do tygodnia end_str.
+    """
+    week = chart_week(start_str)
+    last = chart_week(end_str)
+    if week is None or last is None:
+        raise ValueError("Invalid date range")
+    while week <= last:
+        yield week
+        next_day = datetime.strptime(week, "%Y-%m-%d") + timedelta(days=1)
+        next_week = chart_week(next_day.strftime("%Y-%m-%d"))
+        # Po ostatnim opublikowanym notowaniu chart_week nie idzie już dalej
+        if next_week <= week:
+            break
+        week = next_week
+
+
 def clean_song_title(title):
     """
-    Czyści tytuł utworu ze zbędnych spacji i znaków nowej linii.
+    Czyści tytuł utworu ze zbędnych spacji i znaków nowej linii (zob. normalize.clean_text).
     """
-    if not isinstance(title, str):
-        return ""
-    return title.strip()
+    return clean_text(title)
 
 
 def chunk_list(lst, n):
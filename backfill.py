@@ -0,0 +1,159 @@
+"""
+Wstępne pobranie archiwalnych list Billboard do lokalnego cache.
+
+Po przejściu całego archiwum zapytania użytkowników nie czekają na
+billboard.com, a aplikacja działa nawet przy jego awarii.
+
+Uruchomienie:
+    python backfill.py --start 1958-08-04 --end 2024-12-31 --rate 1 --workers 2 --processes 4
+
+Strony pobierają wątki (--workers), a parsują procesy (--processes, domyślnie
+liczba rdzeni bez jednego; 0 - parsowanie w wątkach pobierających, domyślne
+na 1-2 rdzeniach), zob. app/ingest.py.
+
+Postęp zapisywany jest w pliku checkpointu, więc przerwane pobieranie
+można wznowić tym samym poleceniem.
+
+Z --archive DIR pobrane listy trafiają też do kolumnowego archiwum
+(app/archive.py), z którego scraper czyta, gdy ustawione jest CHART_ARCHIVE_DIR=DIR.
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from app import cache, ingest
+from app.archive import ChartArchive
+from app.charts import CHARTS, DEFAULT_CHART, get_chart
+from app.models import ChartEntry
+from app.scraper import RateLimiter, get_chart_entries
+from app.utils import iter_chart_weeks, validate_date
+
+DEFAULT_CHECKPOINT = "backfill_checkpoint.json"
+# Co ile pobranych tygodni zapisujemy checkpoint
+CHECKPOINT_EVERY = 10
+
+
+def load_checkpoint(path):
+    """
+    Zwraca zbiór tygodni pobranych w poprzednich uruchomieniach.
+    """
+    if not os.path.exists(path):
+        return set()
+    with open(path, encoding="utf-8") as f:
+        return set(json.load(f).get("done", []))
+
+
+def save_checkpoint(path, done):
+    # Zapis przez plik tymczasowy - przerwanie w trakcie nie psuje checkpointu
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"done": sorted(done)}, f)
+    os.replace(tmp_path, path)
+
+
+def _stored(chart, week, archive=None):
+    """
+    Czy pobrany tydzień nadal jest zapisany - w archiwum, a bez niego w cache.
+    Checkpoint nie wystarcza: cache mógł zostać wyczyszczony albo zmieniony.
+    """
+    if archive is not None:
+        return week in archive
+    return cache.get_cache("chart").get(chart.cache_key(week)) is not None
+
+
+def backfill(weeks, rate=1.0, workers=2, checkpoint=DEFAULT_CHECKPOINT, log=print, chart_id=DEFAULT_CHART,
+             processes=0, archive=None):
+    """
+    Pobiera podane tygodnie listy chart_id do cache. Zwraca listę tygodni,
+    których nie udało się pobrać. Dla processes > 0 strony parsuje pula
+    procesów (ingest.iter_charts). Podane archive (ChartArchive) dostaje
+    każdy pobrany tydzień, którego jeszcze nie ma.
+    """
+    chart = get_chart(chart_id)
+    # W checkpoincie tygodnie zapisywane są jak w cache - z id listy innej niż Hot 100
+    done = load_checkpoint(checkpoint)
+    pending = [week for week in weeks if chart.cache_key(week) not in done or not _stored(chart, week, archive)]
+    log(f"{len(pending)} weeks to fetch, {len(done)} already done")
+
+    limiter = RateLimiter(rate)
+    lock = threading.Lock()
+    failed = []
+
+    def finished(week, entries=None, error=None):
+        with lock:
+            if error is not None:
+                log(f"{week}: {error}")
+                failed.append(week)
+                return
+            if archive is not None and entries is not None:
+                archive.append(week, entries)
+            done.add(chart.cache_key(week))
+            if len(done) % CHECKPOINT_EVERY == 0:
+                save_checkpoint(checkpoint, done)
+                log(f"{len(done)} weeks done")
+
+    def fetch(week):
+        chart_cache = cache.get_cache("chart")
+        cached = chart_cache.get(chart.cache_key(week))
+        if cached is not None:
+            finished(week, [ChartEntry.from_list(values) for values in cached])
+            return
+        limiter.wait()
+        try:
+            entries = get_chart_entries(chart.id, week)
+        except Exception as e:
+            finished(week, error=e)
+            return
+        finished(week, entries)
+
+    if processes > 0:
+        for week, entries, error in ingest.iter_charts(chart.id, pending, fetch_workers=workers,
+                                                       processes=processes, throttle=limiter.wait):
+            finished(week, entries, error)
+    else:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            list(executor.map(fetch, pending))
+    save_checkpoint(checkpoint, done)
+    return sorted(failed)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Prefetch Billboard charts into the local cache.")
+    parser.add_argument("--chart", default=DEFAULT_CHART, choices=sorted(CHARTS), help="chart id")
+    parser.add_argument("--start", default="1958-08-04", help="first date (YYYY-MM-DD)")
+    parser.add_argument("--end", default=datetime.now().strftime("%Y-%m-%d"), help="last date (YYYY-MM-DD)")
+    parser.add_argument("--rate", type=float, default=1.0, help="max requests per second to billboard.com")
+    parser.add_argument("--workers", type=int, default=2, help="max concurrent fetches")
+    parser.add_argument("--processes", type=int, default=ingest.default_processes(),
+                        help="parser processes (0 parses in the fetch threads)")
+    parser.add_argument("--checkpoint", default=DEFAULT_CHECKPOINT, help="checkpoint file for resuming")
+    parser.add_argument("--archive", default=None,
+                        help="also append the charts to a columnar archive in this directory")
+    parser.add_argument("--cache-url", default=None, help="cache URL (defaults to CACHE_URL)")
+    parser.add_argument("--max-entries", type=int, default=None,
+                        help="cache size limit (archived charts do not count towards it)")
+    args = parser.parse_args(argv)
+
+    if not (validate_date(args.start) and validate_date(args.end)):
+        parser.error("Invalid date format. Use YYYY-MM-DD.")
+
+    cache.configure(args.cache_url, max_entries=args.max_entries)
+    # Tygodnie sprzed pierwszego notowania listy nie istnieją
+    first_date = get_chart(args.chart).first_date
+    weeks = [week for week in iter_chart_weeks(args.start, args.end) if week >= first_date]
+    archive = ChartArchive(os.path.join(args.archive, args.chart), args.chart) if args.archive else None
+    failed = backfill(weeks, rate=args.rate, workers=args.workers, checkpoint=args.checkpoint,
+                      chart_id=args.chart, processes=args.processes, archive=archive)
+    if failed:
+        print(f"{len(failed)} weeks failed, run again to retry: {', '.join(failed[:10])}")
+        return 1
+    print(f"Done: {len(weeks)} weeks cached")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
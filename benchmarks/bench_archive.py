@@ -0,0 +1,114 @@
+"""
+Benchmark kolumnowego archiwum list (app/archive.py) na wygenerowanej historii
+w skali całego Hot 100: rozmiar na dysku w porównaniu z JSON-em każdego
+tygodnia, czas zapisu, otwarcia, odczytu tygodnia i przeglądu całej historii
+utworu (song_weeks) oraz pamięć zajmowana przy odczytach.
+
+Uruchomienie:
+    python -m benchmarks.bench_archive [--weeks 3500] [--turnover 8] [--queries 200]
+"""
+import argparse
+import json
+import random
+import tempfile
+import time
+import tracemalloc
+
+from app.archive import ChartArchive
+from app.models import ChartEntry
+from benchmarks.bench_pipeline import _weeks
+from benchmarks.fixtures import _title
+
+
+def history(weeks, turnover, seed=0):
+    """
+    Generuje (tydzień, pozycje): co tydzień turnover utworów wypada z listy
+    i tyle samo nowych wchodzi, reszta zmienia pozycje.
+    """
+    rng = random.Random(seed)
+    counter = iter(range(10 ** 9))
+
+    def new_song():
+        return [f"{_title(rng)} {next(counter)}", f"Artist {rng.randint(1, 3000)}", 0, 100]
+
+    chart = [new_song() for _ in range(100)]
+    for week in weeks:
+        chart.sort(key=lambda song: rng.random() + song[2] * 0.02)
+        chart[-turnover:] = [new_song() for _ in range(turnover)]
+        entries = []
+        for rank, song in enumerate(chart, start=1):
+            song[2] += 1
+            song[3] = min(song[3], rank)
+            entries.append(ChartEntry(rank, song[0], song[1], song[2], song[3]))
+        yield week, entries
+
+
+def run_queries(path, first, queries, weeks):
+    """
+    Otwiera archiwum i wykonuje zapytania. Zwraca czasy (s): otwarcia,
+    pierwszego song_weeks, średni song_weeks i średni get(week).
+    """
+    start = time.perf_counter()
+    chart_archive = ChartArchive(path)
+    opened = time.perf_counter() - start
+
+    start = time.perf_counter()
+    assert chart_archive.song_weeks(*first)
+    first_query = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for title, artist in queries:
+        chart_archive.song_weeks(title, artist)
+    query = (time.perf_counter() - start) / len(queries)
+
+    start = time.perf_counter()
+    for week in weeks:
+        chart_archive.get(week)
+    read = (time.perf_counter() - start) / len(weeks)
+    return opened, first_query, query, read
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--weeks", type=int, default=3500)
+    parser.add_argument("--turnover", type=int, default=8, help="songs replaced each week")
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+
+    weeks = _weeks(args.weeks)
+    with tempfile.TemporaryDirectory() as path:
+        chart_archive = ChartArchive(path)
+        json_bytes = 0
+        songs = []
+        start = time.perf_counter()
+        for week, entries in history(weeks, args.turnover):
+            chart_archive.append(week, entries)
+            json_bytes += len(json.dumps([entry.to_list() for entry in entries]))
+            songs.append((entries[0].title, entries[0].artist))
+        write = time.perf_counter() - start
+        stats = chart_archive.stats()
+
+        rng = random.Random(1)
+        queries = [rng.choice(songs) for _ in range(args.queries)]
+        sample = rng.sample(weeks, min(len(weeks), args.queries))
+        opened, first_query, query, read = run_queries(path, songs[0], queries, sample)
+
+        # Pamięć mierzona w osobnym przebiegu - tracemalloc spowalnia pomiary czasu
+        tracemalloc.start()
+        run_queries(path, songs[0], queries, sample)
+        _, peak_memory = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    print(f"{stats['weeks']} weeks, {stats['rows']} rows, {stats['songs']} songs")
+    print(f"archive on disk:   {stats['bytes'] / 1024 / 1024:.1f} MB "
+          f"(JSON per week: {json_bytes / 1024 / 1024:.1f} MB)")
+    print(f"append:            {write / len(weeks) * 1000:.2f} ms/week")
+    print(f"open:              {opened * 1000:.1f} ms")
+    print(f"song_weeks:        {query * 1000:.2f} ms/query "
+          f"(first query, with title index build: {first_query * 1000:.1f} ms)")
+    print(f"get(week):         {read * 1000:.3f} ms")
+    print(f"peak Python heap:  {peak_memory / 1024 / 1024:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Benchmark: wyszukiwanie utworów przez SpotifyClient (pula wątków) vs
+AsyncSpotifyClient (jedna pętla zdarzeń), na lokalnym fałszywym serwerze Spotify.
+
+Wymaga httpx (`pip install httpx`).
+
+Uruchomienie:
+    python -m benchmarks.bench_async [--latency 0.2] [--songs 2000] [--workers 32] [--concurrency 1000]
+"""
+import argparse
+import asyncio
+import os
+import time
+import spotipy
+
+from app import aio, cache, rate_limit
+from app.spotify import SpotifyClient
+from benchmarks.fake_spotify import FakeSpotifyServer
+
+
+def run_threads(server, songs, workers):
+    """
+    Zwraca czas (s) rozwiązania listy pulą wątków.
+    """
+    cache.configure("memory://")
+    client = SpotifyClient(max_workers=workers)
+    client.sp = spotipy.Spotify(auth="bench", retries=0, status_retries=0)
+    client.sp.prefix = server.url
+
+    start = time.perf_counter()
+    uris = client.resolve_songs(songs, "2024")
+    elapsed = time.perf_counter() - start
+    assert len(uris) == len(songs)
+    return elapsed
+
+
+def run_async(server, songs, concurrency):
+    """
+    Zwraca czas (s) rozwiązania listy w jednej pętli zdarzeń.
+    """
+    cache.configure("memory://")
+    aio.SPOTIFY_API_URL = server.url
+    client = aio.AsyncSpotifyClient({"access_token": "bench"}, max_concurrency=concurrency)
+
+    async def resolve():
+        try:
+            return await client.resolve_songs(songs, "2024")
+        finally:
+            await aio.close_clients()
+
+    start = time.perf_counter()
+    uris = asyncio.run(resolve())
+    elapsed = time.perf_counter() - start
+    assert len(uris) == len(songs)
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--latency", type=float, default=0.2)
+    parser.add_argument("--songs", type=int, default=2000)
+    parser.add_argument("--workers", type=int, default=32, help="threads for SpotifyClient")
+    parser.add_argument("--concurrency", type=int, default=1000, help="in-flight searches for AsyncSpotifyClient")
+    parser.add_argument("--pool-size", type=int, default=1000, help="HTTP connections per host")
+    args = parser.parse_args()
+
+    if aio.httpx is None:
+        parser.error("httpx is not installed (pip install httpx)")
+
+    os.environ["HTTP_POOL_SIZE"] = str(args.pool_size)
+    rate_limit.configure("memory://", rate=0)
+    songs = [f"Song {i}" for i in range(args.songs)]
+    with FakeSpotifyServer(latency=args.latency) as server:
+        threaded = run_threads(server, songs, args.workers)
+        asynchronous = run_async(server, songs, args.concurrency)
+
+    print(f"threads ({args.workers:>4} workers):   {threaded:.3f}s, {args.songs / threaded:,.0f} songs/s")
+    print(f"async ({args.concurrency:>4} in flight):  {asynchronous:.3f}s, {args.songs / asynchronous:,.0f} songs/s")
+    print(f"speedup:                   {threaded / asynchronous:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
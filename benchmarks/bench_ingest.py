@@ -0,0 +1,57 @@
+"""
+Benchmark hurtowego pobierania list (ingest.iter_charts) na lokalnym fałszywym
+serwerze Billboard: parsowanie w wątku vs w puli procesów o rosnącej liczbie
+procesów. Każdy przebieg zaczyna od pustego cache.
+
+Uruchomienie:
+    python -m benchmarks.bench_ingest [--weeks 200] [--latency 0.05] [--workers 8] [--processes 1 2 4]
+"""
+import argparse
+import os
+import time
+
+from app import cache, charts, ingest
+from benchmarks.bench_pipeline import _weeks
+from benchmarks.fake_billboard import FakeBillboardServer
+
+
+def run(weeks, workers, processes):
+    """
+    Zwraca czas (s) pobrania i sparsowania wszystkich tygodni.
+    """
+    cache.configure("memory://")
+    start = time.perf_counter()
+    results = list(ingest.iter_charts(charts.DEFAULT_CHART, weeks, fetch_workers=workers, processes=processes))
+    elapsed = time.perf_counter() - start
+    assert [week for week, _, _ in results] == weeks
+    assert all(error is None for _, _, error in results)
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--weeks", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--workers", type=int, default=8, help="fetch threads")
+    parser.add_argument("--processes", type=int, nargs="+",
+                        default=sorted({1, 2, os.cpu_count() or 1}), help="parser process counts to compare")
+    args = parser.parse_args()
+
+    weeks = _weeks(args.weeks)
+    base_url = charts.BASE_URL
+    with FakeBillboardServer(latency=args.latency) as billboard:
+        charts.BASE_URL = billboard.url
+        try:
+            baseline = run(weeks, args.workers, 0)
+            print(f"{os.cpu_count()} cores, {args.weeks} weeks, {args.workers} fetch threads")
+            print(f"parse in thread:   {baseline:.2f}s, {args.weeks / baseline:,.0f} pages/s")
+            for processes in args.processes:
+                elapsed = run(weeks, args.workers, processes)
+                print(f"{processes:>2} processes:      {elapsed:.2f}s, {args.weeks / elapsed:,.0f} pages/s "
+                      f"({baseline / elapsed:.1f}x)")
+        finally:
+            charts.BASE_URL = base_url
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Benchmark normalizacji tytułów: ile różnych kluczy daje surowy tytuł,
+a ile kanoniczny (normalize.track_key), oraz przepustowość z pustą i
+wypełnioną pamięcią LRU.
+
+Korpus to listy z cache (przestrzeń "chart") dla podanego zakresu tygodni -
+po backfillu cała historia. Gdy cache jest pusty, korpus jest generowany:
+każdy tytuł w kilku zapisach, jakie spotyka się na billboard.com.
+
+Uruchomienie:
+    python -m benchmarks.bench_normalize [--start 1958-08-04] [--end 2024-12-31]
+    python -m benchmarks.bench_normalize --synthetic 50000
+"""
+import argparse
+import random
+import time
+
+from app import normalize
+from app.cache import get_cache
+from app.utils import iter_chart_weeks
+from benchmarks.fixtures import _WORDS
+
+_VARIANTS = (
+    lambda title, artist: (title, artist),
+    lambda title, artist: (title.upper(), artist),
+    lambda title, artist: (title.replace("'", "’"), artist),
+    lambda title, artist: (title + " (Remix)", artist),
+    lambda title, artist: (title, artist + " Featuring Guest"),
+    lambda title, artist: (title + " (feat. Guest)", artist.replace("e", "é")),
+)
+
+
+def chart_corpus(start, end):
+    """
+    Pary (tytuł, wykonawca) ze wszystkich tygodni zapisanych w cache.
+    """
+    chart_cache = get_cache("chart")
+    corpus = []
+    for week in iter_chart_weeks(start, end):
+        for values in chart_cache.get(week) or []:
+            corpus.append((values[1], values[2]))
+    return corpus
+
+
+def synthetic_corpus(size, seed=0):
+    """
+    Wygenerowane pary (tytuł, wykonawca), każda piosenka w kilku wariantach zapisu.
+    """
+    rng = random.Random(seed)
+    songs = []
+    for _ in range(max(1, size // len(_VARIANTS))):
+        title = " ".join(rng.choice(_WORDS).capitalize() for _ in range(rng.randint(1, 4)))
+        title = title.replace("Baby", "Don't Baby", 1)
+        artist = f"The {rng.choice(_WORDS).capitalize()} {rng.choice(_WORDS).capitalize()}"
+        songs.append((title, artist))
+    corpus = [rng.choice(_VARIANTS)(*rng.choice(songs)) for _ in range(size)]
+    return corpus
+
+
+def run(corpus):
+    """
+    Zwraca czas (s) wyliczenia kluczy całego korpusu.
+    """
+    start = time.perf_counter()
+    for title, artist in corpus:
+        normalize.track_key(title, artist)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--start", default="1958-08-04")
+    parser.add_argument("--end", default="2024-12-31")
+    parser.add_argument("--synthetic", type=int, default=0, help="use N generated titles instead of the cache")
+    args = parser.parse_args()
+
+    corpus = [] if args.synthetic else chart_corpus(args.start, args.end)
+    source = "chart cache"
+    if not corpus:
+        corpus = synthetic_corpus(args.synthetic or 50000)
+        source = "synthetic"
+
+    raw_keys = {(title, artist) for title, artist in corpus}
+    canonical_keys = {normalize.track_key(title, artist) for title, artist in corpus}
+
+    normalize.cache_clear()
+    cold = run(corpus)
+    warm = run(corpus)
+    info = normalize.cache_info()["title_key"]
+
+    print(f"corpus:            {len(corpus)} entries ({source})")
+    print(f"raw keys:          {len(raw_keys)}")
+    print(f"canonical keys:    {len(canonical_keys)} "
+          f"({(1 - len(canonical_keys) / len(raw_keys)) * 100:.1f}% fewer)")
+    print(f"cold:              {len(corpus) / cold:,.0f} keys/s")
+    print(f"memoized:          {len(corpus) / warm:,.0f} keys/s")
+    print(f"title_key LRU:     {info.hits} hits, {info.misses} misses, {info.currsize} entries")
+
+
+if __name__ == "__main__":
+    main()
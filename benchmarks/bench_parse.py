@@ -0,0 +1,49 @@
+"""
+Benchmark parserów strony Billboard (stream / lxml / bs4) na wygenerowanych
+stronach w układzie billboard.com.
+
+Uruchomienie:
+    python -m benchmarks.bench_parse [--pages 5] [--repeat 3]
+"""
+import argparse
+import time
+
+from app import parsers
+from benchmarks.fixtures import chart_page
+
+
+def run(backend, pages, repeat):
+    """
+    Zwraca najlepszy czas (s) sparsowania wszystkich stron danym backendem.
+    """
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for html in pages:
+            titles = parsers.PARSERS[backend](html)
+            assert len(titles) == 100
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--pages", type=int, default=5)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    pages = [chart_page(seed) for seed in range(args.pages)]
+    size_kb = sum(len(page) for page in pages) / len(pages) / 1024
+    print(f"{args.pages} pages, ~{size_kb:.0f} KB each")
+
+    backends = ["bs4", "stream"] + (["lxml"] if parsers.lxml is not None else [])
+    baseline = None
+    for backend in backends:
+        elapsed = run(backend, pages, args.repeat) / args.pages
+        baseline = baseline or elapsed
+        print(f"{backend:<7} {elapsed * 1000:8.1f} ms/page  {baseline / elapsed:5.1f}x")
+
+
+if __name__ == "__main__":
+    main()
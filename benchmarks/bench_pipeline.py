@@ -0,0 +1,281 @@
+"""
+Benchmark całej ścieżki budowania playlisty na lokalnych, fałszywych
+serwerach Billboard i Spotify (bez dostępu do internetu).
+
+Mierzy:
+- get_top_100          - pobranie i parsowanie listy (zimny cache), osobno samo parsowanie
+- revalidate           - ponowne pobranie bieżącego tygodnia: pełne vs odpowiedź 304
+- create_playlist      - czas budowania playlisty ze 100 utworów (zimny cache utworów)
+- routes               - przepustowość /create_playlist przy równoległych klientach
+
+Wyniki zapisywane są jako JSON, który można porównać z wynikiem z innego commita.
+
+Uruchomienie:
+    python -m benchmarks.bench_pipeline --output before.json
+    python -m benchmarks.bench_pipeline --output after.json --compare before.json
+"""
+import argparse
+import contextlib
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+import spotipy
+
+from app import app as flask_app
+from app import cache, charts, jobs, parsers, rate_limit, scraper
+from app import spotify as spotify_module
+from app.cache import MemoryBackend
+from app.sessions import ServerSideSessionInterface
+from app.spotify import SpotifyClient
+from app.utils import chart_week
+from benchmarks.fake_billboard import FakeBillboardServer
+from benchmarks.fake_spotify import FakeSpotifyServer
+
+FIRST_WEEK = datetime(2000, 1, 1)
+
+
+def _weeks(count):
+    """Kolejne daty notowań (soboty) od 2000-01-01."""
+    return [(FIRST_WEEK + timedelta(weeks=i)).strftime("%Y-%m-%d") for i in range(count)]
+
+
+def _summary(samples):
+    """Statystyki próbek czasu (s)."""
+    ordered = sorted(samples)
+    return {
+        "runs": len(ordered),
+        "mean": statistics.fmean(ordered),
+        "p50": ordered[len(ordered) // 2],
+        "p95": ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))],
+        "min": ordered[0],
+        "max": ordered[-1],
+    }
+
+
+def _git_commit():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+@contextlib.contextmanager
+def local_services(billboard, spotify):
+    """
+    Kieruje scraper i klientów spotipy na lokalne serwery, a cache,
+    sesje i kolejkę zadań ustawia w pamięci procesu.
+    """
+    class LocalSpotify(spotipy.Spotify):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            self.prefix = spotify.url
+
+    base_url, spotify_class = charts.BASE_URL, spotify_module.spotipy.Spotify
+    session_interface = flask_app.session_interface
+    charts.BASE_URL = billboard.url
+    spotify_module.spotipy.Spotify = LocalSpotify
+    flask_app.session_interface = ServerSideSessionInterface(backend=MemoryBackend())
+    jobs.configure("eager")
+    # Obiekt OAuth wymaga danych aplikacji, choć nie wysyła żadnych zapytań
+    for name, value in (("SPOTIPY_CLIENT_ID", "bench"), ("SPOTIPY_CLIENT_SECRET", "bench"),
+                        ("SPOTIPY_REDIRECT_URI", "http://127.0.0.1/callback")):
+        os.environ.setdefault(name, value)
+    try:
+        yield
+    finally:
+        charts.BASE_URL = base_url
+        spotify_module.spotipy.Spotify = spotify_class
+        flask_app.session_interface = session_interface
+
+
+def _token(user):
+    return {
+        "access_token": f"bench-{user}",
+        "refresh_token": f"bench-refresh-{user}",
+        "token_type": "Bearer",
+        "expires_at": int(time.time()) + 3600,
+    }
+
+
+def bench_top_100(billboard, weeks):
+    """
+    Czas get_top_100 dla kolejnych tygodni przy pustym cache i samego parsowania.
+    """
+    cache.configure("memory://")
+    fetch, parse = [], []
+    for week in weeks:
+        start = time.perf_counter()
+        entries = scraper.get_top_100(week)
+        fetch.append(time.perf_counter() - start)
+        assert len(entries) == 100
+
+        html = billboard.page(week)
+        start = time.perf_counter()
+        parsers.parse_chart(html)
+        parse.append(time.perf_counter() - start)
+    return {
+        "parser": parsers.DEFAULT_PARSER,
+        "fetch_and_parse": _summary(fetch),
+        "parse": _summary(parse),
+    }
+
+
+def bench_revalidate(billboard, runs):
+    """
+    Czas get_top_100 dla bieżącego tygodnia po wygaśnięciu listy w cache:
+    bez zapamiętanych walidatorów (pełne pobranie) i z nimi (304).
+    """
+    cache.configure("memory://")
+    week = chart_week(datetime.now().strftime("%Y-%m-%d"))
+    full, revalidated = [], []
+    for _ in range(runs):
+        for samples, keep_validators in ((full, False), (revalidated, True)):
+            cache.get_cache("chart").delete(week)
+            if not keep_validators:
+                cache.get_cache("chart_validators").delete(week)
+            start = time.perf_counter()
+            scraper.get_top_100(week)
+            samples.append(time.perf_counter() - start)
+    return {
+        "full": _summary(full),
+        "not_modified": _summary(revalidated),
+        "not_modified_responses": billboard.not_modified_count,
+    }
+
+
+def bench_create_playlist(weeks, workers):
+    """
+    Czas create_playlist_from_songs dla kolejnych tygodni przy pustym cache utworów.
+    """
+    samples = []
+    for i, week in enumerate(weeks):
+        songs = scraper.get_top_100(week)
+        cache.get_cache("track").backend.clear()
+        cache.get_cache("resolved").backend.clear()
+        cache.get_cache("track_index").backend.clear()
+        client = SpotifyClient(max_workers=workers, token_info=_token(i))
+
+        start = time.perf_counter()
+        client.create_playlist_from_songs(week, songs)
+        samples.append(time.perf_counter() - start)
+    return {"workers": workers, "wall_time": _summary(samples)}
+
+
+def bench_routes(weeks, clients, requests_count):
+    """
+    Przepustowość /create_playlist: każdy klient to osobny użytkownik z własną sesją,
+    a zadanie budowania playlisty wykonywane jest w ramach zapytania.
+    """
+    cache.configure("memory://")
+    flask_app.config["TESTING"] = True
+
+    def one_request(i):
+        client = flask_app.test_client()
+        with client.session_transaction() as sess:
+            sess["selected_date"] = weeks[i % len(weeks)]
+            sess["spotify_token"] = _token(i)
+        start = time.perf_counter()
+        response = client.get("/create_playlist")
+        elapsed = time.perf_counter() - start
+        assert response.status_code == 302 and "/jobs/" in response.location
+        return elapsed
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as executor:
+        latencies = list(executor.map(one_request, range(requests_count)))
+    elapsed = time.perf_counter() - start
+    return {
+        "clients": clients,
+        "requests": requests_count,
+        "requests_per_second": requests_count / elapsed,
+        "latency": _summary(latencies),
+    }
+
+
+def compare(old, new):
+    """
+    Wypisuje zmianę głównych wskaźników między dwoma wynikami.
+    """
+    metrics = [
+        ("get_top_100 fetch+parse p50", ("get_top_100", "fetch_and_parse", "p50"), False),
+        ("get_top_100 parse p50", ("get_top_100", "parse", "p50"), False),
+        ("revalidate 304 p50", ("revalidate", "not_modified", "p50"), False),
+        ("create_playlist p50", ("create_playlist", "wall_time", "p50"), False),
+        ("routes requests/s", ("routes", "requests_per_second"), True),
+    ]
+    print(f"\ncompared with {old.get('commit')}:")
+    for name, path, higher_is_better in metrics:
+        try:
+            before, after = old["results"], new["results"]
+            for key in path:
+                before, after = before[key], after[key]
+        except KeyError:
+            continue
+        change = (after - before) / before * 100 if before else 0.0
+        better = change > 0 if higher_is_better else change < 0
+        print(f"  {name:<30}{before:>10.4f} -> {after:<10.4f}{change:+7.1f}% {'better' if better else 'worse'}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--weeks", type=int, default=5, help="charts measured in each stage")
+    parser.add_argument("--billboard-latency", type=float, default=0.05)
+    parser.add_argument("--spotify-latency", type=float, default=0.02)
+    parser.add_argument("--rate-limit-every", type=int, default=0, help="fake Spotify answers 429 every N requests")
+    parser.add_argument("--retry-after", type=int, default=0)
+    parser.add_argument("--rate", type=float, default=0, help="client-side Spotify rate limit (0 = none)")
+    parser.add_argument("--workers", type=int, default=spotify_module.DEFAULT_SEARCH_WORKERS)
+    parser.add_argument("--clients", type=int, default=4, help="concurrent clients in the routes stage")
+    parser.add_argument("--requests", type=int, default=20, help="requests in the routes stage")
+    parser.add_argument("--pages-dir", default=None, help="directory with recorded chart HTML")
+    parser.add_argument("--output", default=None, help="write JSON results to this file")
+    parser.add_argument("--compare", default=None, help="JSON results of an earlier run")
+    args = parser.parse_args(argv)
+
+    rate_limit.configure("memory://", rate=args.rate)
+    weeks = _weeks(args.weeks)
+    with FakeBillboardServer(args.billboard_latency, args.pages_dir) as billboard, \
+            FakeSpotifyServer(args.spotify_latency, args.rate_limit_every, args.retry_after) as spotify, \
+            local_services(billboard, spotify):
+        results = {
+            "get_top_100": bench_top_100(billboard, weeks),
+            "revalidate": bench_revalidate(billboard, len(weeks)),
+            "create_playlist": bench_create_playlist(weeks, args.workers),
+            "routes": bench_routes(_weeks(args.requests), args.clients, args.requests),
+        }
+        results["spotify"] = {
+            "requests": spotify.request_count,
+            "scheduler": rate_limit.scheduler_stats(),
+        }
+
+    report = {
+        "commit": _git_commit(),
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "params": vars(args),
+        "results": results,
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            compare(json.load(f), report)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,60 @@
+"""
+Benchmark: wyszukiwanie 100 utworów po kolei vs równolegle,
+na lokalnym fałszywym serwerze Spotify.
+
+Uruchomienie:
+    python -m benchmarks.bench_resolve [--latency 0.05] [--workers 8] [--rate 0]
+
+--rate ogranicza tempo zapytań wspólnym harmonogramem (0 = bez limitu),
+a --rate-limit-every każe serwerowi odpowiadać 429 co N-te zapytanie.
+"""
+import argparse
+import time
+import spotipy
+
+from app import cache, rate_limit
+from app.spotify import SpotifyClient
+from benchmarks.fake_spotify import FakeSpotifyServer
+
+
+def run(server, workers, songs, rate=0):
+    """
+    Zwraca czas (s) rozwiązania listy utworów przy danej liczbie wątków.
+    """
+    cache.configure("memory://")
+    rate_limit.configure("memory://", rate=rate)
+    client = SpotifyClient(max_workers=workers)
+    client.sp = spotipy.Spotify(auth="bench", retries=0, status_retries=0)
+    client.sp.prefix = server.url
+
+    start = time.perf_counter()
+    uris = client.resolve_songs(songs, "2024")
+    elapsed = time.perf_counter() - start
+    assert len(uris) == len(songs)
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--songs", type=int, default=100)
+    parser.add_argument("--rate", type=float, default=0)
+    parser.add_argument("--rate-limit-every", type=int, default=0)
+    args = parser.parse_args()
+
+    songs = [f"Song {i}" for i in range(args.songs)]
+    with FakeSpotifyServer(latency=args.latency, rate_limit_every=args.rate_limit_every) as server:
+        sequential = run(server, 1, songs, args.rate)
+        concurrent = run(server, args.workers, songs, args.rate)
+
+    print(f"sequential:          {sequential:.3f}s")
+    print(f"concurrent ({args.workers:>2} workers): {concurrent:.3f}s")
+    print(f"speedup:             {sequential / concurrent:.1f}x")
+    stats = rate_limit.scheduler_stats()
+    print(f"scheduler:           {stats['throttled']} x 429, "
+          f"max wait {stats['wait_seconds_max']:.3f}s")
+
+
+if __name__ == "__main__":
+    main()
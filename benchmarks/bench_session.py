@@ -0,0 +1,94 @@
+"""
+Porównanie sesji w podpisanym ciasteczku (domyślna sesja Flask) z sesją
+trzymaną po stronie serwera: rozmiar ciasteczka i czas obsługi zapytania
+z tokenem Spotify w sesji.
+
+Uruchomienie:
+    python -m benchmarks.bench_session [--requests 2000]
+"""
+import argparse
+import os
+import random
+import string
+import tempfile
+import time
+
+from flask import Flask, session
+from flask.sessions import SecureCookieSessionInterface
+
+from app.cache import MemoryBackend, SQLiteBackend
+from app.sessions import ServerSideSessionInterface
+
+_random = random.Random(0)
+
+
+def _token_string(length):
+    # Losowe znaki - podpisane ciasteczko Flask kompresuje powtarzalne dane
+    return "".join(_random.choice(string.ascii_letters + string.digits) for _ in range(length))
+
+
+# Rozmiary zbliżone do prawdziwego tokenu Spotify
+TOKEN = {
+    "access_token": _token_string(250),
+    "refresh_token": _token_string(130),
+    "token_type": "Bearer",
+    "scope": "playlist-modify-private playlist-modify-public",
+    "expires_in": 3600,
+    "expires_at": 1700000000,
+}
+
+
+def build_app(interface):
+    app = Flask(__name__)
+    app.secret_key = "bench_secret_key"
+    app.session_interface = interface
+
+    @app.route("/login")
+    def login():
+        session["spotify_token"] = TOKEN
+        session["date"] = "2024-01-20"
+        return "ok"
+
+    @app.route("/read")
+    def read():
+        return session["spotify_token"]["token_type"]
+
+    return app
+
+
+def run(interface, requests_count):
+    """
+    Zwraca (rozmiar ciasteczka w bajtach, średni czas zapytania w µs).
+    """
+    client = build_app(interface).test_client()
+    response = client.get("/login")
+    cookie_size = len(response.headers["Set-Cookie"].split(";")[0])
+
+    start = time.perf_counter()
+    for _ in range(requests_count):
+        client.get("/read")
+    elapsed = time.perf_counter() - start
+    return cookie_size, elapsed / requests_count * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=2000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        interfaces = {
+            "cookie": SecureCookieSessionInterface(),
+            "server (memory)": ServerSideSessionInterface(backend=MemoryBackend()),
+            "server (sqlite)": ServerSideSessionInterface(
+                backend=SQLiteBackend(os.path.join(tmp, "sessions.db"))
+            ),
+        }
+        print(f"{'session':<18}{'cookie B':>10}{'µs/request':>12}")
+        for name, interface in interfaces.items():
+            cookie_size, per_request = run(interface, args.requests)
+            print(f"{name:<18}{cookie_size:>10}{per_request:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
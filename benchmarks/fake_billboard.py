@@ -0,0 +1,123 @@
+"""
+Lokalny, fałszywy serwer billboard.com do benchmarków.
+Serwuje strony list z katalogu z nagranym HTML-em albo wygenerowane
+przez benchmarks.fixtures.
+"""
+import gzip
+import hashlib
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from benchmarks.fixtures import chart_page
+
+
+class FakeBillboardServer:
+    """
+    Serwer HTTP udający billboard.com/charts/<lista>/<data>; każda lista
+    dostaje te same strony.
+
+    pages_dir - katalog z nagranymi stronami (<data>.html albo dowolne *.html,
+                serwowane po kolei); bez niego strony są generowane.
+    latency   - opóźnienie każdej odpowiedzi w sekundach.
+
+    Odpowiedzi mają ETag i Last-Modified (304 na zapytania warunkowe)
+    i są kompresowane gzipem, jeśli klient o to prosi.
+    """
+
+    def __init__(self, latency=0.0, pages_dir=None):
+        self.latency = latency
+        self.request_count = 0
+        self.not_modified_count = 0
+        self.last_modified = "Sat, 06 Jan 2024 00:00:00 GMT"
+        self._lock = threading.Lock()
+        self._pages = {}
+        self._recorded = []
+        if pages_dir:
+            for name in sorted(os.listdir(pages_dir)):
+                if name.endswith(".html"):
+                    with open(os.path.join(pages_dir, name), encoding="utf-8") as f:
+                        html = f.read()
+                    self._pages[name[:-len(".html")]] = html
+                    self._recorded.append(html)
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address
+        return f"http://{host}:{port}/charts/"
+
+    def page(self, date_str):
+        """
+        Zwraca HTML strony dla daty: nagrany, jeśli jest, inaczej wygenerowany.
+        """
+        with self._lock:
+            html = self._pages.get(date_str)
+            if html is None:
+                if self._recorded:
+                    html = self._recorded[len(self._pages) % len(self._recorded)]
+                else:
+                    html = chart_page(seed=sum(map(ord, date_str)))
+                self._pages[date_str] = html
+            return html
+
+    def _handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # Nagłówki i treść w jednym zapisie - bez opóźnień Nagle/delayed ACK
+            wbufsize = 64 * 1024
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                with fake._lock:
+                    fake.request_count += 1
+                time.sleep(fake.latency)
+
+                parts = self.path.strip("/").split("/")
+                if len(parts) != 3 or parts[0] != "charts":
+                    self.send_error(404)
+                    return
+                body = fake.page(parts[2]).encode("utf-8")
+                etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+                if self.headers.get("If-None-Match") == etag:
+                    with fake._lock:
+                        fake.not_modified_count += 1
+                    self.send_response(304)
+                    self.send_header("ETag", etag)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("ETag", etag)
+                self.send_header("Last-Modified", fake.last_modified)
+                if "gzip" in self.headers.get("Accept-Encoding", ""):
+                    body = gzip.compress(body, compresslevel=6)
+                    self.send_header("Content-Encoding", "gzip")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        return Handler
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
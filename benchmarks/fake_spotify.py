@@ -0,0 +1,106 @@
+"""
+Lokalny, fałszywy serwer Spotify Web API do benchmarków.
+Obsługuje tylko endpointy używane przez SpotifyClient.
+"""
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+
+class FakeSpotifyServer:
+    """
+    Serwer HTTP udający api.spotify.com z konfigurowalnym opóźnieniem.
+    Co rate_limit_every-te zapytanie kończy się odpowiedzią 429 z Retry-After.
+    """
+
+    def __init__(self, latency=0.05, rate_limit_every=0, retry_after=0):
+        self.latency = latency
+        self.rate_limit_every = rate_limit_every
+        self.retry_after = retry_after
+        self.request_count = 0
+        self.search_count = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address
+        return f"http://{host}:{port}/v1/"
+
+    def _handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # Nagłówki i treść w jednym zapisie - bez opóźnień Nagle/delayed ACK
+            wbufsize = 64 * 1024
+
+            def log_message(self, *args):
+                pass
+
+            def _send(self, status, payload, headers=None):
+                body = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _handle(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                if length:
+                    self.rfile.read(length)
+                with fake._lock:
+                    fake.request_count += 1
+                    count = fake.request_count
+                time.sleep(fake.latency)
+
+                if fake.rate_limit_every and count % fake.rate_limit_every == 0:
+                    self._send(429, {"error": {"status": 429, "message": "rate limited"}},
+                               {"Retry-After": str(fake.retry_after)})
+                    return
+
+                url = urlparse(self.path)
+                if url.path.rstrip("/") == "/v1/me":
+                    self._send(200, {"id": "bench_user"})
+                elif url.path == "/v1/search":
+                    with fake._lock:
+                        fake.search_count += 1
+                    query = parse_qs(url.query).get("q", [""])[0]
+                    uri = f"spotify:track:{abs(hash(query)) % 10 ** 22:022d}"
+                    self._send(200, {"tracks": {"items": [{"uri": uri}]}})
+                elif url.path.endswith("/playlists"):
+                    self._send(201, {
+                        "id": "0benchplaylist000000000",
+                        "external_urls": {"spotify": "https://open.spotify.com/playlist/bench"},
+                    })
+                elif url.path.endswith("/tracks") or url.path.endswith("/items"):
+                    self._send(201, {"snapshot_id": "bench"})
+                else:
+                    self._send(404, {"error": {"status": 404, "message": "not found"}})
+
+            do_GET = _handle
+            do_POST = _handle
+
+        return Handler
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
@@ -0,0 +1,77 @@
+"""
+Generator stron w układzie billboard.com do benchmarków i fałszywego serwera.
+Strona ma ~kilkaset KB, jak prawdziwa: nawigacja, skrypty i 100 wierszy listy.
+"""
+import random
+
+_WORDS = ("love", "night", "heart", "baby", "dance", "fire", "summer", "tonight",
+          "dream", "money", "girl", "rain", "forever", "crazy", "home", "blue")
+
+
+def _title(rng):
+    return " ".join(rng.choice(_WORDS).capitalize() for _ in range(rng.randint(1, 4)))
+
+
+def _row(rank, title, artist, last_week, peak, weeks):
+    return f"""
+<div class="o-chart-results-list-row-container">
+  <ul class="o-chart-results-list-row // lrv-a-unstyle-list lrv-u-flex u-height-100">
+    <li class="o-chart-results-list__item // lrv-u-background-color-black lrv-u-width-100p">
+      <span class="c-label a-font-primary-bold-l u-font-size-32@tablet">
+        {rank}
+      </span>
+    </li>
+    <li class="o-chart-results-list__item // c-chart-results-list__image">
+      <img class="c-lazy-image__img" src="https://charts-static.billboard.com/img/{rank}.jpg" alt="">
+    </li>
+    <li class="lrv-u-width-100p">
+      <ul class="lrv-a-unstyle-list lrv-u-flex lrv-u-height-100p">
+        <li class="o-chart-results-list__item // lrv-u-flex-grow-1 lrv-u-flex">
+          <h3 id="title-of-a-story" class="c-title a-no-trucate a-font-primary-bold-s">
+            {title}
+          </h3>
+          <span class="c-label a-no-trucate a-font-primary-s lrv-u-font-size-14@mobile-max">
+            {artist}
+          </span>
+        </li>
+        <li class="o-chart-results-list__item // a-chart-color u-width-72"><span class="c-label a-font-primary-m">{last_week}</span></li>
+        <li class="o-chart-results-list__item // a-chart-color u-width-72"><span class="c-label a-font-primary-m">{peak}</span></li>
+        <li class="o-chart-results-list__item // a-chart-color u-width-72"><span class="c-label a-font-primary-m">{weeks}</span></li>
+      </ul>
+    </li>
+  </ul>
+</div>"""
+
+
+def chart_entries(seed=0, size=100):
+    """
+    Zwraca listę krotek (rank, title, artist, last_week, peak, weeks).
+    """
+    rng = random.Random(seed)
+    entries = []
+    for rank in range(1, size + 1):
+        weeks = rng.randint(1, 40)
+        peak = rng.randint(1, rank)
+        last_week = "-" if weeks == 1 else str(rng.randint(1, 100))
+        entries.append((rank, f"{_title(rng)} {rank}", f"Artist {rng.randint(1, 500)}",
+                        last_week, peak, weeks))
+    return entries
+
+
+def chart_page(seed=0, size=100):
+    """
+    Zwraca HTML strony listy z losowymi, ale powtarzalnymi (seed) danymi.
+    """
+    nav = "".join(
+        f'<li class="menu-item"><a href="/c/{i}">Category {i}</a><ul><li><a href="/s/{i}">Sub</a></li></ul></li>'
+        for i in range(200)
+    )
+    script = "<script>window.__data = " + "{\"k\": \"" + "x" * 50000 + "\"};</script>"
+    rows = "".join(_row(*entry) for entry in chart_entries(seed, size))
+    return (
+        "<!DOCTYPE html><html><head><meta charset='utf-8'><title>Billboard Hot 100</title>"
+        + script + "</head><body><nav><ul>" + nav + "</ul></nav>"
+        + "<div class='chart-results-list'>" + rows + "</div>"
+        + "<footer>" + "<p>Footer text</p>" * 500 + "</footer>" + script
+        + "</body></html>"
+    )
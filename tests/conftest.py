@@ -9,6 +9,9 @@ import os
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 from app import app as flask_app
+from app import archive, cache, jobs, metrics, rate_limit, spotify
+from app.cache import MemoryBackend
+from app.sessions import ServerSideSessionInterface
 
 
 @pytest.fixture
@@ -19,6 +22,8 @@ def app():
         "SECRET_KEY": "test_secret_key",
         "WTF_CSRF_ENABLED": False
     })
+    # Sesje w pamięci zamiast pliku sessions.db
+    flask_app.session_interface = ServerSideSessionInterface(backend=MemoryBackend())
     yield flask_app
 
 
@@ -32,3 +37,48 @@ def client(app):
 def runner(app):
     """Fixture zwracający CLI runner"""
     return app.test_cli_runner()
+
+
+@pytest.fixture(autouse=True)
+def memory_cache():
+    """Każdy test dostaje świeży cache w pamięci zamiast pliku SQLite"""
+    cache.configure("memory://")
+    yield
+    cache.configure("memory://")
+
+
+@pytest.fixture(autouse=True)
+def eager_jobs():
+    """Zadania w tle wykonywane od razu, w wątku testu"""
+    jobs.configure("eager")
+    yield
+
+
+@pytest.fixture(autouse=True)
+def fresh_spotify_clients():
+    """Współdzielone obiekty OAuth i klienci Spotify nie przechodzą między testami"""
+    spotify.reset_clients()
+    yield
+    spotify.reset_clients()
+
+
+@pytest.fixture(autouse=True)
+def unlimited_spotify_rate():
+    """Świeży harmonogram zapytań Spotify, bez limitu tempa"""
+    rate_limit.configure("memory://", rate=0)
+    yield
+
+
+@pytest.fixture(autouse=True)
+def fresh_metrics():
+    """Liczniki i histogramy zaczynają każdy test od zera"""
+    metrics.reset()
+    yield
+
+
+@pytest.fixture(autouse=True)
+def no_chart_archive():
+    """Scraper nie czyta z archiwum kolumnowego ustawionego w środowisku"""
+    archive.configure("")
+    yield
+    archive.configure("")
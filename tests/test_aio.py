@@ -0,0 +1,265 @@
+"""
+Testy dla modułu aio (asynchroniczny scraper i klient Spotify)
+"""
+import asyncio
+import json
+import pytest
+import threading
+from datetime import datetime
+from unittest.mock import patch
+from app import aio, cache, metrics, rate_limit
+from app.aio import AsyncSpotifyClient
+from app.cache import get_cache
+from app.spotify import SpotifyClient
+from app.utils import chart_week
+from spotipy.exceptions import SpotifyException
+
+CHART_HTML = """
+<html><li><ul><li><h3>Song 1</h3><span>Artist 1</span></li></ul></li>
+<li><ul><li><h3>Song 2</h3><span>Artist 2</span></li></ul></li></html>
+"""
+
+
+class FakeResponse:
+    """Odpowiedź w stylu httpx.Response"""
+
+    def __init__(self, status_code=200, body=None, text=None, headers=None):
+        if text is None:
+            text = json.dumps(body) if body is not None else ""
+        self.status_code = status_code
+        self.text = text
+        self.content = text.encode("utf-8")
+        self.headers = headers or {}
+        self.num_bytes_downloaded = len(self.content)
+
+    def json(self):
+        return json.loads(self.text)
+
+    def raise_for_status(self):
+        # Jak httpx: błąd dla każdej odpowiedzi spoza 2xx, także 3xx
+        if not 200 <= self.status_code < 300:
+            raise Exception(f"HTTP {self.status_code}")
+
+
+class FakeHTTP:
+    """Klient w stylu httpx.AsyncClient: handler(method, url, kwargs) zwraca FakeResponse"""
+
+    def __init__(self, handler, latency=0.0):
+        self.handler = handler
+        self.latency = latency
+        self.calls = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def request(self, method, url, **kwargs):
+        self.calls.append((method, url, kwargs))
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.latency)
+            return self.handler(method, url, kwargs)
+        finally:
+            self.in_flight -= 1
+
+    async def get(self, url, **kwargs):
+        return await self.request("GET", url, **kwargs)
+
+
+def spotify_api(method, url, kwargs):
+    """Atrapa Web API: każde wyszukiwanie znajduje utwór o id z tytułu"""
+    path = url[len(aio.SPOTIFY_API_URL):]
+    if path == "me":
+        return FakeResponse(body={"id": "user123"})
+    if path == "search":
+        title = kwargs["params"]["q"].split(" artist:")[0].split(" year:")[0][len("track:"):]
+        return FakeResponse(body={"tracks": {"items": [{"uri": f"spotify:track:{title.replace(' ', '_')}"}]}})
+    if path == "users/user123/playlists":
+        return FakeResponse(201, body={"id": "pl1", "external_urls": {"spotify": "https://spotify.com/playlist/pl1"}})
+    if path == "playlists/pl1/tracks":
+        return FakeResponse(201, body={"snapshot_id": "s"})
+    return FakeResponse(404, body={"error": "not found"})
+
+
+def _client(handler=spotify_api, **kwargs):
+    http = FakeHTTP(handler, latency=kwargs.pop("latency", 0.0))
+    token = {"access_token": "token", "refresh_token": "refresh", "expires_at": 2 ** 40}
+    return AsyncSpotifyClient(token, client=http, **kwargs), http
+
+
+class TestAsyncScraper:
+    """Testy asynchronicznego pobierania list"""
+
+    def test_get_top_100_parses_and_caches(self):
+        """Test pobrania, parsowania i zapisu w cache wspólnym z wersją synchroniczną"""
+        http = FakeHTTP(lambda method, url, kwargs: FakeResponse(text=CHART_HTML))
+
+        entries = asyncio.run(aio.get_top_100("2024-01-15", client=http))
+
+        assert [entry.title for entry in entries] == ["Song 1", "Song 2"]
+        assert http.calls[0][1].endswith("/charts/hot-100/2024-01-20")
+        assert get_cache("chart").get("2024-01-20")[0][1] == "Song 1"
+
+    def test_concurrent_requests_share_one_fetch(self):
+        """Test, że równoczesne zapytania o ten sam tydzień pobierają stronę raz"""
+        http = FakeHTTP(lambda method, url, kwargs: FakeResponse(text=CHART_HTML), latency=0.05)
+
+        async def run():
+            return await asyncio.gather(*(aio.get_top_100("2024-01-15", client=http) for _ in range(20)))
+
+        results = asyncio.run(run())
+
+        assert all(len(result) == 2 for result in results)
+        assert len(http.calls) == 1
+
+    def test_not_modified_returns_stored_entries(self):
+        """Test zapytania warunkowego: po 304 wracają zapamiętane pozycje, bez parsowania"""
+        week = chart_week(datetime.now().strftime("%Y-%m-%d"))
+        get_cache("chart_validators").set(week, {
+            "etag": '"v1"', "last_modified": None, "size": 100,
+            "entries": [[1, "Stored Song", "Artist", 1, 1]],
+        })
+        http = FakeHTTP(lambda method, url, kwargs: FakeResponse(304))
+
+        with patch("app.aio._parse_page") as mock_parse:
+            entries = asyncio.run(aio.get_top_100(week, client=http))
+
+        assert [entry.title for entry in entries] == ["Stored Song"]
+        assert http.calls[0][2]["headers"]["If-None-Match"] == '"v1"'
+        mock_parse.assert_not_called()
+
+    def test_http_error(self):
+        """Test błędu HTTP"""
+        http = FakeHTTP(lambda method, url, kwargs: FakeResponse(500, text="error"))
+
+        with pytest.raises(Exception):
+            asyncio.run(aio.get_top_100("2024-01-15", client=http))
+        assert get_cache("chart").get("2024-01-20") is None
+
+
+class TestAsyncSpotifyClient:
+    """Testy asynchronicznego klienta Spotify"""
+
+    def test_create_playlist(self):
+        """Test utworzenia playlisty: wyszukanie, utworzenie i dodanie w kolejności"""
+        client, http = _client()
+        progress = []
+
+        url = asyncio.run(client.create_playlist_from_songs(
+            "2024-01-15", ["Song A", "Song B"], progress=lambda done, total: progress.append(done)
+        ))
+
+        assert url == "https://spotify.com/playlist/pl1"
+        add = [call for call in http.calls if call[1].endswith("playlists/pl1/tracks")]
+        assert add[0][2]["json"] == {"uris": ["spotify:track:Song_A", "spotify:track:Song_B"]}
+        create = [call for call in http.calls if call[1].endswith("users/user123/playlists")]
+        assert create[0][2]["json"]["name"] == "2024-01-15 Billboard 100"
+        assert sorted(progress) == [1, 2]
+        assert all(call[2]["headers"]["Authorization"] == "Bearer token" for call in http.calls)
+
+    def test_shares_track_cache_with_sync_client(self):
+        """Test, że utwór znaleziony przez klienta synchronicznego nie jest szukany ponownie"""
+        from unittest.mock import MagicMock
+        sync = SpotifyClient(max_workers=1)
+        sync.sp = MagicMock()
+        sync.sp.search.return_value = {"tracks": {"items": [{"uri": "spotify:track:sync"}]}}
+        sync.search_song("Hello", "2015", "Adele")
+
+        client, http = _client()
+        uri = asyncio.run(client.search_song("HELLO", "2016", "Adele"))
+
+        assert uri == "spotify:track:sync"
+        assert http.calls == []
+
+    def test_concurrency_limit(self):
+        """Test ograniczenia liczby wyszukiwań w locie"""
+        client, http = _client(max_concurrency=5, latency=0.01)
+        songs = [f"Song {i}" for i in range(50)]
+
+        uris = asyncio.run(client.resolve_songs(songs, "2024"))
+
+        assert uris == [f"spotify:track:Song_{i}" for i in range(50)]
+        assert http.max_in_flight == 5
+
+    def test_thousands_in_flight(self):
+        """Test wielu równoczesnych wyszukiwań w jednej pętli, bez wątków"""
+        client, http = _client(max_concurrency=1000, latency=0.05)
+        songs = [f"Song {i}" for i in range(2000)]
+
+        uris = asyncio.run(client.resolve_songs(songs, "2024"))
+
+        assert len(uris) == 2000 and None not in uris
+        assert http.max_in_flight == 1000
+
+    def test_rate_limited_retry(self):
+        """Test ponowienia po 429 i wstrzymania kubełka"""
+        responses = iter([FakeResponse(429, text="", headers={"Retry-After": "0"})])
+
+        def handler(method, url, kwargs):
+            return next(responses, None) or spotify_api(method, url, kwargs)
+
+        client, http = _client(handler)
+        with patch("app.rate_limit.TokenBucket.pause") as mock_pause:
+            uri = asyncio.run(client.search_song("Song", "2024"))
+
+        assert uri == "spotify:track:Song"
+        assert len(http.calls) == 2
+        mock_pause.assert_called_once_with(0)
+        from app.rate_limit import scheduler_stats
+        assert scheduler_stats()["throttled"] == 1
+
+    def test_error_raises_spotify_exception(self):
+        """Test błędu API zgłaszanego jak w spotipy"""
+        client, _ = _client(lambda method, url, kwargs: FakeResponse(401, body={"error": "expired"}))
+
+        with pytest.raises(SpotifyException) as excinfo:
+            asyncio.run(client.get_user_id())
+        assert excinfo.value.http_status == 401
+
+    def test_expiring_token_refreshed(self):
+        """Test odświeżenia tokenu przed zapytaniem"""
+        client, http = _client()
+        client.token_info["expires_at"] = 0
+        with patch("app.aio.get_oauth_manager") as mock_oauth:
+            mock_oauth.return_value.refresh_access_token.return_value = {"access_token": "new"}
+            asyncio.run(client.get_user_id())
+
+        assert http.calls[0][2]["headers"]["Authorization"] == "Bearer new"
+
+    def test_metrics(self):
+        """Test pomiarów korutyn"""
+        client, _ = _client()
+        asyncio.run(client.resolve_songs(["Song"], "2024"))
+
+        rendered = metrics.render()
+        assert 'stage="resolve_songs"' in rendered
+        assert 'playlist_scraper_spotify_api_calls_total{method="search"} 1' in rendered
+
+    def test_blocking_backends_off_event_loop(self, tmp_path):
+        """Test, że SQLite i kubełek spoza procesu nie są odpytywane w wątku pętli zdarzeń"""
+        cache.configure(f"sqlite:///{tmp_path / 'cache.db'}")
+        threads = set()
+
+        class RemoteBucket:
+            """Kubełek jak RedisTokenBucket - każde wywołanie to zapytanie sieciowe"""
+
+            def try_acquire(self):
+                threads.add(threading.current_thread())
+                return 0.0
+
+            def pause(self, seconds):
+                threads.add(threading.current_thread())
+
+        rate_limit._scheduler = rate_limit.Scheduler(RemoteBucket())
+        backend_get = cache.SQLiteBackend.get
+
+        def recording_get(backend, key):
+            threads.add(threading.current_thread())
+            return backend_get(backend, key)
+
+        responses = iter([FakeResponse(429, text="", headers={"Retry-After": "0"})])
+        client, _ = _client(lambda method, url, kwargs: next(responses, None) or spotify_api(method, url, kwargs))
+        with patch.object(cache.SQLiteBackend, "get", recording_get):
+            url = asyncio.run(client.create_playlist_from_songs("2024-01-15", ["Song"]))
+
+        assert url == "https://spotify.com/playlist/pl1"
+        assert threads and threading.main_thread() not in threads
@@ -0,0 +1,128 @@
+"""
+Testy dla modułu archive (kolumnowe archiwum historii list)
+"""
+import os
+from unittest.mock import patch
+import backfill
+from app import archive
+from app.archive import ChartArchive
+from app.models import ChartEntry
+from app.scraper import get_top_100
+
+
+def _chart(*songs):
+    return [ChartEntry(rank, title, artist, rank * 2, None if rank == 1 else rank)
+            for rank, (title, artist) in enumerate(songs, start=1)]
+
+
+WEEK_1 = _chart(("Hello", "Adele"), ("Shake It Off", "Taylor Swift"))
+WEEK_2 = _chart(("Shake It Off", "Taylor Swift"), ("HELLO", "Adele Featuring Guest"), ("Hello", "Lionel Richie"))
+
+
+class TestChartArchive:
+    """Testy zapisu i odczytu archiwum"""
+
+    def test_round_trip(self, tmp_path):
+        """Test zapisu i odczytu listy bez utraty danych"""
+        chart_archive = ChartArchive(str(tmp_path))
+
+        assert chart_archive.append("2015-11-14", WEEK_1)
+        assert chart_archive.get("2015-11-14") == WEEK_1
+        assert chart_archive.get("2015-11-21") is None
+        assert chart_archive.get("2015-11-14")[0].peak is None
+
+    def test_strings_interned(self, tmp_path):
+        """Test, że powtarzające się tytuły i utwory zapisywane są raz"""
+        chart_archive = ChartArchive(str(tmp_path))
+        chart_archive.append("2015-11-14", WEEK_1)
+        chart_archive.append("2015-11-21", WEEK_2)
+
+        with open(tmp_path / "titles.txt", encoding="utf-8") as f:
+            assert f.read().splitlines() == ["Hello", "Shake It Off", "HELLO"]
+        assert chart_archive.stats()["songs"] == 4
+        assert chart_archive.stats()["rows"] == 5
+
+    def test_duplicate_week_skipped(self, tmp_path):
+        """Test, że tydzień dopisywany jest tylko raz"""
+        chart_archive = ChartArchive(str(tmp_path))
+
+        assert chart_archive.append("2015-11-14", WEEK_1)
+        assert not chart_archive.append("2015-11-14", WEEK_2)
+        assert chart_archive.get("2015-11-14") == WEEK_1
+
+    def test_reopen(self, tmp_path):
+        """Test odczytu archiwum w nowej instancji"""
+        ChartArchive(str(tmp_path)).append("2015-11-21", WEEK_2)
+        ChartArchive(str(tmp_path)).append("2015-11-14", WEEK_1)
+
+        chart_archive = ChartArchive(str(tmp_path))
+
+        assert chart_archive.weeks() == ["2015-11-14", "2015-11-21"]
+        assert chart_archive.get("2015-11-21") == WEEK_2
+        assert "2015-11-14" in chart_archive and len(chart_archive) == 2
+
+    def test_song_weeks(self, tmp_path):
+        """Test wyszukania wszystkich notowań utworu (porównanie kanoniczne)"""
+        chart_archive = ChartArchive(str(tmp_path))
+        chart_archive.append("2015-11-21", WEEK_2)
+        chart_archive.append("2015-11-14", WEEK_1)
+
+        assert chart_archive.song_weeks("Hello", "Adele") == [("2015-11-14", 1), ("2015-11-21", 2)]
+        assert chart_archive.song_weeks("Hello") == [("2015-11-14", 1), ("2015-11-21", 2), ("2015-11-21", 3)]
+        assert chart_archive.song_weeks("Unknown", "Nobody") == []
+
+    def test_song_weeks_sees_new_weeks(self, tmp_path):
+        """Test, że indeks utworów uwzględnia tygodnie dopisane po pierwszym zapytaniu"""
+        chart_archive = ChartArchive(str(tmp_path))
+        chart_archive.append("2015-11-14", WEEK_1)
+        chart_archive.song_weeks("Hello", "Adele")
+
+        ChartArchive(str(tmp_path)).append("2015-11-21", WEEK_2)
+
+        assert len(chart_archive.song_weeks("Shake It Off", "Taylor Swift")) == 2
+
+    def test_interrupted_append_ignored(self, tmp_path):
+        """Test, że dane przerwanego dopisania (bez commitu) są pomijane i obcinane"""
+        chart_archive = ChartArchive(str(tmp_path))
+        chart_archive.append("2015-11-14", WEEK_1)
+        with patch.object(archive._Column, "append", side_effect=[None, None, OSError("disk full")]):
+            try:
+                chart_archive.append("2015-11-21", WEEK_2)
+            except OSError:
+                pass
+        with open(tmp_path / "titles.txt", "ab") as f:
+            f.write(b"Torn")
+
+        reopened = ChartArchive(str(tmp_path))
+        assert reopened.weeks() == ["2015-11-14"]
+        assert reopened.get("2015-11-14") == WEEK_1
+
+        reopened.append("2015-11-21", WEEK_2)
+        assert ChartArchive(str(tmp_path)).get("2015-11-21") == WEEK_2
+        assert os.path.getsize(tmp_path / "song.i32") == 5 * 4
+
+
+class TestArchiveReads:
+    """Testy odczytu list przez scraper i zapisu przez backfill"""
+
+    def test_scraper_reads_archive(self, tmp_path):
+        """Test, że zarchiwizowany tydzień nie jest pobierany z billboard.com"""
+        archive.configure(str(tmp_path))
+        archive.get_archive().append("2015-11-14", WEEK_1)
+
+        with patch("app.scraper._fetch_chart") as mock_fetch:
+            entries = get_top_100("2015-11-10")
+
+        assert entries == WEEK_1
+        mock_fetch.assert_not_called()
+
+    def test_backfill_appends_to_archive(self, tmp_path):
+        """Test dopisywania pobranych tygodni do archiwum"""
+        chart_archive = ChartArchive(str(tmp_path / "hot-100"))
+
+        with patch.object(backfill, "get_chart_entries", side_effect=[WEEK_1, WEEK_2]):
+            backfill.backfill(["2015-11-14", "2015-11-21"], rate=0, workers=1, log=lambda m: None,
+                              checkpoint=str(tmp_path / "c.json"), archive=chart_archive)
+
+        assert chart_archive.weeks() == ["2015-11-14", "2015-11-21"]
+        assert chart_archive.get("2015-11-21") == WEEK_2
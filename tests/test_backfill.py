@@ -0,0 +1,98 @@
+"""
+Testy dla skryptu backfill (wstępne pobieranie archiwum list)
+"""
+import json
+import pytest
+from unittest.mock import patch
+import backfill
+from app.cache import get_cache
+
+
+class TestBackfill:
+    """Testy pobierania archiwum do cache"""
+    
+    def test_fetches_all_weeks_and_checkpoints(self, tmp_path):
+        """Test pobrania wszystkich tygodni i zapisu checkpointu"""
+        checkpoint = str(tmp_path / "checkpoint.json")
+        weeks = ["2024-01-06", "2024-01-13", "2024-01-20"]
+        
+        with patch.object(backfill, 'get_chart_entries') as mock_get:
+            failed = backfill.backfill(weeks, rate=0, workers=2, checkpoint=checkpoint, log=lambda m: None)
+        
+        assert failed == []
+        assert sorted(c[0][1] for c in mock_get.call_args_list) == weeks
+        with open(checkpoint) as f:
+            assert json.load(f)["done"] == weeks
+    
+    def test_resumes_from_checkpoint(self, tmp_path):
+        """Test wznowienia - pobrane tygodnie są pomijane"""
+        checkpoint = str(tmp_path / "checkpoint.json")
+        backfill.save_checkpoint(checkpoint, {"2024-01-06"})
+        get_cache("chart").set("2024-01-06", [[1, "Song", "", None, None]])
+        
+        with patch.object(backfill, 'get_chart_entries') as mock_get:
+            backfill.backfill(["2024-01-06", "2024-01-13"], rate=0, checkpoint=checkpoint, log=lambda m: None)
+        
+        mock_get.assert_called_once_with("hot-100", "2024-01-13")
+    
+    def test_checkpointed_week_missing_from_cache_refetched(self, tmp_path):
+        """Test ponownego pobrania tygodnia z checkpointu, którego nie ma już w cache"""
+        checkpoint = str(tmp_path / "checkpoint.json")
+        backfill.save_checkpoint(checkpoint, {"2024-01-06"})
+        
+        with patch.object(backfill, 'get_chart_entries') as mock_get:
+            backfill.backfill(["2024-01-06"], rate=0, checkpoint=checkpoint, log=lambda m: None)
+        
+        mock_get.assert_called_once_with("hot-100", "2024-01-06")
+    
+    def test_skips_weeks_already_cached(self, tmp_path):
+        """Test pomijania tygodni, które są już w cache"""
+        get_cache("chart").set("2024-01-06", [[1, "Song", "", None, None]])
+        
+        with patch.object(backfill, 'get_chart_entries') as mock_get:
+            backfill.backfill(["2024-01-06"], rate=0, checkpoint=str(tmp_path / "c.json"), log=lambda m: None)
+        
+        mock_get.assert_not_called()
+    
+    def test_failed_weeks_are_retried_next_run(self, tmp_path):
+        """Test czy nieudane tygodnie nie trafiają do checkpointu"""
+        checkpoint = str(tmp_path / "checkpoint.json")
+        
+        def fake_get(chart_id, week):
+            if week == "2024-01-13":
+                raise Exception("Billboard unavailable")
+        
+        with patch.object(backfill, 'get_chart_entries', side_effect=fake_get):
+            failed = backfill.backfill(["2024-01-06", "2024-01-13"], rate=0,
+                                       checkpoint=checkpoint, log=lambda m: None)
+        
+        assert failed == ["2024-01-13"]
+        assert backfill.load_checkpoint(checkpoint) == {"2024-01-06"}
+    
+    def test_other_chart_uses_own_keys(self, tmp_path):
+        """Test, że tygodnie innej listy mają w cache i checkpoincie własne klucze"""
+        checkpoint = str(tmp_path / "checkpoint.json")
+        get_cache("chart").set("2024-01-06", [[1, "Song", "", None, None]])
+        
+        with patch.object(backfill, 'get_chart_entries') as mock_get:
+            backfill.backfill(["2024-01-06"], rate=0, checkpoint=checkpoint, log=lambda m: None,
+                              chart_id="country-songs")
+        
+        mock_get.assert_called_once_with("country-songs", "2024-01-06")
+        assert backfill.load_checkpoint(checkpoint) == {"country-songs|2024-01-06"}
+    
+    def test_rate_limiter_spaces_requests(self):
+        """Test odstępów między zapytaniami"""
+        limiter = backfill.RateLimiter(rate=2)
+        with patch('app.scraper.time.monotonic', return_value=100.0), \
+                patch('app.scraper.time.sleep') as mock_sleep:
+            limiter.wait()
+            limiter.wait()
+            limiter.wait()
+        
+        assert [c[0][0] for c in mock_sleep.call_args_list] == [0.5, 1.0]
+    
+    def test_main_rejects_invalid_dates(self):
+        """Test walidacji dat w CLI"""
+        with pytest.raises(SystemExit):
+            backfill.main(["--start", "not-a-date"])
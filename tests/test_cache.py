@@ -0,0 +1,211 @@
+"""
+Testy dla modułu cache
+"""
+import pytest
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+from app.cache import (
+    MemoryBackend,
+    SQLiteBackend,
+    Cache,
+    backend_from_url,
+    configure,
+    get_cache,
+    cache_stats
+)
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def backend(request, tmp_path):
+    """Fixture zwracający backend każdego typu z limitem 3 wpisów"""
+    if request.param == "memory":
+        return MemoryBackend(max_entries=3)
+    return SQLiteBackend(str(tmp_path / "cache.db"), max_entries=3)
+
+
+class TestBackends:
+    """Testy backendów cache"""
+    
+    def test_set_and_get(self, backend):
+        """Test zapisu i odczytu"""
+        backend.set("a", "1")
+        assert backend.get("a") == "1"
+        assert backend.get("missing") is None
+    
+    def test_ttl_expiry(self, backend):
+        """Test wygasania wpisów"""
+        with patch('app.cache.time.time', return_value=1000.0):
+            backend.set("a", "1", ttl=10)
+        with patch('app.cache.time.time', return_value=1005.0):
+            assert backend.get("a") == "1"
+        with patch('app.cache.time.time', return_value=1011.0):
+            assert backend.get("a") is None
+    
+    def test_evicts_least_recently_used(self, backend):
+        """Test usuwania najdawniej używanych wpisów po przekroczeniu limitu"""
+        for i, key in enumerate(["a", "b", "c"]):
+            with patch('app.cache.time.time', return_value=1000.0 + i):
+                backend.set(key, key, ttl=3600)
+        with patch('app.cache.time.time', return_value=1010.0):
+            backend.get("a")
+        with patch('app.cache.time.time', return_value=1020.0):
+            backend.set("d", "d", ttl=3600)
+        
+        with patch('app.cache.time.time', return_value=1030.0):
+            assert len(backend) == 3
+            assert backend.get("b") is None
+            assert backend.get("a") == "a"
+            assert backend.get("d") == "d"
+    
+    def test_entries_without_ttl_not_evicted(self, backend):
+        """Test, że wpisy bez TTL (archiwalne listy) nie są usuwane ani liczone do limitu"""
+        backend.set("chart", "week")
+        for key in ["a", "b", "c", "d", "e"]:
+            backend.set(key, key, ttl=3600)
+        
+        assert backend.get("chart") == "week"
+        assert len(backend) == 4
+        
+        # Wpis bez TTL zapisany ponownie z TTL wraca pod limit
+        backend.set("chart", "week", ttl=3600)
+        backend.set("f", "f", ttl=3600)
+        assert len(backend) == 3
+    
+    def test_delete_and_clear(self, backend):
+        """Test usuwania wpisów"""
+        backend.set("a", "1")
+        backend.set("b", "2")
+        backend.delete("a")
+        assert backend.get("a") is None
+        backend.clear()
+        assert len(backend) == 0
+    
+    def test_sweep_removes_expired(self, backend):
+        """Test usuwania wygasłych wpisów bez ich odczytu"""
+        with patch('app.cache.time.time', return_value=1000.0):
+            backend.set("a", "1", ttl=10)
+            backend.set("b", "2")
+        with patch('app.cache.time.time', return_value=1011.0):
+            backend.sweep()
+        assert len(backend) == 1
+        assert backend.get("b") == "2"
+
+
+class TestCache:
+    """Testy przestrzeni nazw cache"""
+    
+    def test_json_roundtrip_and_counters(self):
+        """Test serializacji i liczników trafień"""
+        cache = Cache("chart", MemoryBackend())
+        assert cache.get("2024-01-20") is None
+        cache.set("2024-01-20", ["Song 1", "Song 2"])
+        assert cache.get("2024-01-20") == ["Song 1", "Song 2"]
+        
+        assert cache.stats() == {"hits": 1, "misses": 1, "hit_rate": 0.5}
+    
+    def test_namespaces_are_separate(self):
+        """Test czy przestrzenie nazw się nie mieszają"""
+        backend = MemoryBackend()
+        Cache("chart", backend).set("key", 1)
+        assert Cache("track", backend).get("key") is None
+    
+    def test_backend_from_url(self, tmp_path):
+        """Test wyboru backendu po adresie"""
+        assert isinstance(backend_from_url("memory://"), MemoryBackend)
+        assert isinstance(backend_from_url(f"sqlite:///{tmp_path}/c.db"), SQLiteBackend)
+        with pytest.raises(ValueError):
+            backend_from_url("ftp://nope")
+    
+    def test_sqlite_persists_between_instances(self, tmp_path):
+        """Test czy cache SQLite przeżywa ponowne otwarcie"""
+        url = f"sqlite:///{tmp_path}/c.db"
+        configure(url)
+        get_cache("chart").set("2024-01-20", ["Song"])
+        configure(url)
+        assert get_cache("chart").get("2024-01-20") == ["Song"]
+        assert cache_stats()["chart"]["hits"] == 1
+
+    def test_sqlite_compresses_large_values(self, tmp_path):
+        """Test kompresji dużych wartości w pliku SQLite"""
+        backend = SQLiteBackend(str(tmp_path / "c.db"))
+        value = "Song Title " * 1000
+        backend.set("big", value)
+        backend.set("small", "x")
+        
+        stored = backend._conn.execute("SELECT value FROM cache WHERE key = 'big'").fetchone()[0]
+        assert isinstance(stored, bytes)
+        assert len(stored) < len(value) / 10
+        assert backend.get("big") == value
+        assert backend.get("small") == "x"
+
+
+class TestGetOrLoad:
+    """Testy pobierania z łączeniem równoczesnych zapytań"""
+    
+    def test_concurrent_misses_call_loader_once(self):
+        """Test czy równoczesne chybienia wywołują loader raz"""
+        cache = Cache("chart", MemoryBackend())
+        calls = []
+        
+        def loader():
+            calls.append(1)
+            time.sleep(0.1)
+            return ["Song"]
+        
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            results = list(executor.map(lambda _: cache.get_or_load("2024-01-20", loader), range(8)))
+        
+        assert results == [["Song"]] * 8
+        assert len(calls) == 1
+        assert cache.get("2024-01-20") == ["Song"]
+    
+    def test_ttl_from_value(self):
+        """Test TTL wyliczanego z wartości"""
+        backend = MemoryBackend()
+        cache = Cache("track", backend)
+        with patch('app.cache.time.time', return_value=1000.0):
+            cache.get_or_load("miss", lambda: {"uri": None}, ttl=lambda v: 10 if v["uri"] is None else 100)
+        
+        assert backend._data["track:miss"][1] == 1010.0
+    
+    def test_waits_for_other_process(self, tmp_path):
+        """Test czekania na wynik, gdy blokadę trzyma inny proces"""
+        path = str(tmp_path / "c.db")
+        other_process = SQLiteBackend(path)
+        assert other_process.acquire_lock("chart:2024-01-20", 30)
+        
+        def finish_other():
+            time.sleep(0.2)
+            other_process.set("chart:2024-01-20", '["From other process"]')
+            other_process.release_lock("chart:2024-01-20")
+        
+        threading.Thread(target=finish_other).start()
+        cache = Cache("chart", SQLiteBackend(path))
+        loader_calls = []
+        
+        value = cache.get_or_load("2024-01-20", lambda: loader_calls.append(1) or ["Own"])
+        
+        assert value == ["From other process"]
+        assert loader_calls == []
+    
+    def test_lock_is_released_after_error(self, tmp_path):
+        """Test zwolnienia blokady po błędzie loadera"""
+        backend = SQLiteBackend(str(tmp_path / "c.db"))
+        cache = Cache("chart", backend)
+        
+        def failing():
+            raise Exception("Billboard unavailable")
+        
+        with pytest.raises(Exception):
+            cache.get_or_load("2024-01-20", failing)
+        assert backend.acquire_lock("chart:2024-01-20", 30)
+    
+    def test_expired_lock_can_be_taken(self, backend):
+        """Test przejęcia wygasłej blokady"""
+        with patch('app.cache.time.time', return_value=1000.0):
+            assert backend.acquire_lock("k", 10)
+            assert not backend.acquire_lock("k", 10)
+        with patch('app.cache.time.time', return_value=1011.0):
+            assert backend.acquire_lock("k", 10)
@@ -0,0 +1,38 @@
+"""
+Testy dla rejestru list Billboard
+"""
+import pytest
+from unittest.mock import patch
+from app import charts
+from app.charts import CHARTS, DEFAULT_CHART, Chart, get_chart
+from app.models import ChartEntry
+
+
+class TestRegistry:
+    """Testy rejestru list"""
+    
+    def test_default_chart(self):
+        """Test domyślnej listy"""
+        assert get_chart() is CHARTS[DEFAULT_CHART]
+        assert get_chart().size == 100
+    
+    def test_unknown_chart(self):
+        """Test nieznanej listy"""
+        with pytest.raises(ValueError):
+            get_chart("no-such-chart")
+    
+    def test_url_uses_base(self):
+        """Test adresu strony listy"""
+        with patch.object(charts, 'BASE_URL', "http://127.0.0.1/charts/"):
+            assert get_chart("country-songs").url("2024-01-06") == "http://127.0.0.1/charts/country-songs/2024-01-06"
+    
+    def test_cache_keys(self):
+        """Test kluczy cache - Hot 100 bez prefiksu, pozostałe z id listy"""
+        assert get_chart("hot-100").cache_key("2024-01-06") == "2024-01-06"
+        assert get_chart("billboard-global-200").cache_key("2024-01-06") == "billboard-global-200|2024-01-06"
+    
+    def test_parse_truncates_to_size(self):
+        """Test obcięcia wyniku parsera do rozmiaru listy"""
+        chart = Chart("test", "Test", size=2,
+                      parser=lambda html: [ChartEntry(i, f"Song {i}") for i in range(1, 5)])
+        assert [entry.rank for entry in chart.parse("")] == [1, 2]
@@ -0,0 +1,100 @@
+"""
+Testy dla modułu http_pool (współdzielone sesje HTTP)
+"""
+import pytest
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+import spotipy
+from app.http_pool import get_session, reset_sessions, pool_stats
+from app.rate_limit import scheduler_stats
+from app.spotify import SpotifyClient
+from benchmarks.fake_spotify import FakeSpotifyServer
+
+
+class _OkHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header("Content-Length", "2")
+        self.end_headers()
+        self.wfile.write(b"ok")
+
+
+@pytest.fixture
+def local_server():
+    """Fixture uruchamiający lokalny serwer HTTP z keep-alive"""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _OkHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    host, port = server.server_address
+    yield f"http://{host}:{port}/"
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture(autouse=True)
+def fresh_sessions():
+    """Każdy test zaczyna bez otwartych sesji"""
+    reset_sessions()
+    yield
+    reset_sessions()
+
+
+class TestSessions:
+    """Testy współdzielonych sesji"""
+    
+    def test_same_name_same_session(self):
+        """Test czy sesja jest współdzielona w procesie"""
+        assert get_session("billboard") is get_session("billboard")
+        assert get_session("billboard") is not get_session("spotify")
+    
+    @patch.dict('os.environ', {'HTTP_POOL_SIZE': '5', 'HTTP_RETRIES': '1'})
+    def test_pool_configuration(self):
+        """Test konfiguracji puli przez zmienne środowiskowe"""
+        adapter = get_session("billboard").get_adapter("https://www.billboard.com/")
+        
+        assert adapter._pool_maxsize == 5
+        assert adapter.max_retries.total == 1
+        assert 503 in adapter.max_retries.status_forcelist
+    
+    def test_connection_reuse_stats(self, local_server):
+        """Test liczników ponownego użycia połączeń"""
+        session = get_session("billboard")
+        for _ in range(4):
+            assert session.get(local_server, timeout=5).text == "ok"
+        
+        stats = pool_stats()["billboard"]
+        assert stats["requests"] == 4
+        assert stats["connections"] == 1
+        assert stats["reuse_rate"] == 0.75
+    
+    def test_spotify_session_leaves_429_to_scheduler(self):
+        """Test, że sesja Spotify nie ponawia 429 sama - robi to harmonogram"""
+        retry = get_session("spotify").get_adapter("https://api.spotify.com/").max_retries
+        
+        assert not retry.respect_retry_after_header
+        assert 429 not in retry.status_forcelist
+        assert get_session("billboard").get_adapter("https://www.billboard.com/").max_retries.respect_retry_after_header
+    
+    def test_spotify_429_throttles_scheduler(self):
+        """Test, że 429 z prawdziwego serwera HTTP wstrzymuje kubełek harmonogramu"""
+        with FakeSpotifyServer(latency=0, rate_limit_every=2, retry_after=0) as server:
+            client = SpotifyClient(max_workers=1)
+            client.sp = spotipy.Spotify(auth="token", requests_session=get_session("spotify"))
+            client.sp.prefix = server.url
+            
+            uris = client.resolve_songs(["Song 1", "Song 2"], "2024")
+        
+        assert None not in uris
+        assert server.request_count == 3
+        assert scheduler_stats()["throttled"] == 1
+    
+    def test_stats_empty_session(self):
+        """Test statystyk sesji bez zapytań"""
+        get_session("spotify")
+        assert pool_stats()["spotify"] == {"requests": 0, "connections": 0, "reuse_rate": 0.0}
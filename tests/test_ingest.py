@@ -0,0 +1,147 @@
+"""
+Testy dla modułu ingest (pobieranie i parsowanie list w osobnych etapach)
+"""
+import random
+import threading
+import time
+from unittest.mock import MagicMock, patch
+import backfill
+from app import ingest
+from app.cache import get_cache
+
+
+def _page(week):
+    """Strona listy z dwoma utworami, których tytuły zawierają datę"""
+    return f"""
+    <html><li><ul><li><h3>{week} A</h3><span>Artist</span></li></ul></li>
+    <li><ul><li><h3>{week} B</h3><span>Artist</span></li></ul></li></html>
+    """
+
+
+class FakeSession:
+    """Sesja w stylu requests.Session z losowym opóźnieniem odpowiedzi"""
+
+    def __init__(self, latency=0.0, fail=()):
+        self.latency = latency
+        self.fail = set(fail)
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def get(self, url, headers=None, timeout=None):
+        week = url.rsplit("/", 1)[-1]
+        with self._lock:
+            self.calls.append(week)
+        time.sleep(random.uniform(0, self.latency))
+        response = MagicMock()
+        response.status_code = 200
+        response.text = "<html></html>" if week in self.fail else _page(week)
+        response.content = response.text.encode("utf-8")
+        response.headers = {}
+        return response
+
+
+WEEKS = [f"2000-{month:02d}-{day:02d}" for month in (1, 2, 3) for day in (1, 8, 15, 22)]
+
+
+class TestIterCharts:
+    """Testy potoku pobieranie -> parsowanie"""
+
+    def test_results_in_order(self):
+        """Test, że wyniki wracają w kolejności tygodni mimo różnych czasów pobrania"""
+        session = FakeSession(latency=0.02)
+
+        results = list(ingest.iter_charts("hot-100", WEEKS, fetch_workers=4, processes=0, session=session))
+
+        assert [week for week, _, _ in results] == WEEKS
+        assert all(error is None for _, _, error in results)
+        assert [entry.title for entry in results[0][1]] == ["2000-01-01 A", "2000-01-01 B"]
+        assert get_cache("chart").get("2000-03-22")[1][1] == "2000-03-22 B"
+
+    def test_process_pool(self):
+        """Test parsowania w puli procesów"""
+        session = FakeSession()
+
+        results = list(ingest.iter_charts("country-songs", WEEKS[:4], processes=2, session=session))
+
+        assert [entries[0].title for _, entries, _ in results] == [f"{week} A" for week in WEEKS[:4]]
+        assert get_cache("chart").get("country-songs|2000-01-08")[0][1] == "2000-01-08 A"
+
+    def test_cached_weeks_not_fetched(self):
+        """Test pomijania tygodni zapisanych w cache"""
+        get_cache("chart").set("2000-01-01", [[1, "Cached", "", None, None]])
+        session = FakeSession()
+
+        results = list(ingest.iter_charts("hot-100", WEEKS[:2], processes=0, session=session))
+
+        assert results[0][1][0].title == "Cached"
+        assert session.calls == ["2000-01-08"]
+
+    def test_errors_reported_per_week(self):
+        """Test, że błąd jednego tygodnia nie zatrzymuje pozostałych"""
+        session = FakeSession(fail=["2000-01-08"])
+
+        results = list(ingest.iter_charts("hot-100", WEEKS[:3], processes=0, session=session))
+
+        assert [error is None for _, _, error in results] == [True, False, True]
+        assert results[1][1] is None
+        assert "Could not parse" in str(results[1][2])
+        assert get_cache("chart").get("2000-01-08") is None
+
+    def test_bounded_queues(self):
+        """Test, że pobieranie nie wyprzedza odbioru wyników o więcej niż kolejki"""
+        session = FakeSession()
+
+        results = ingest.iter_charts("hot-100", WEEKS, fetch_workers=2, processes=0, queue_size=2,
+                                     session=session)
+        next(results)
+        time.sleep(0.05)
+
+        # Po jednej kolejce pobierania i parsowania oraz odebrany wynik
+        assert len(session.calls) <= 5
+        assert len(list(results)) == len(WEEKS) - 1
+
+    def test_throttle_before_each_fetch(self):
+        """Test wywołania throttle przed każdym zapytaniem"""
+        throttle = MagicMock()
+
+        list(ingest.iter_charts("hot-100", WEEKS[:3], processes=0, session=FakeSession(), throttle=throttle))
+
+        assert throttle.call_count == 3
+
+
+class TestDefaultProcesses:
+    """Testy domyślnej liczby procesów parsujących"""
+
+    def test_few_cores_parse_in_thread(self):
+        """Test, że na 1-2 rdzeniach parsowanie odbywa się w wątku"""
+        for cores in (1, 2):
+            with patch.object(ingest, "_available_cores", return_value=cores):
+                assert ingest.default_processes() == 0
+
+    def test_one_core_left_for_fetching(self):
+        """Test, że jeden rdzeń zostaje dla pobierania i zapisu"""
+        with patch.object(ingest, "_available_cores", return_value=8):
+            assert ingest.default_processes() == 7
+
+    def test_env_overrides_default(self, monkeypatch):
+        """Test liczby procesów z INGEST_PROCESSES"""
+        monkeypatch.setenv("INGEST_PROCESSES", "3")
+        with patch.object(ingest, "_available_cores", return_value=1):
+            assert ingest.default_processes() == 3
+
+
+class TestBackfillWithProcesses:
+    """Test backfillu przez potok z pulą procesów"""
+
+    def test_backfill_uses_pipeline(self, tmp_path, monkeypatch):
+        """Test checkpointu i nieudanych tygodni przy processes > 0"""
+        session = FakeSession(fail=["2000-01-15"])
+        real_iter_charts = ingest.iter_charts
+        monkeypatch.setattr(ingest, "iter_charts",
+                            lambda *args, **kwargs: real_iter_charts(*args, session=session, **kwargs))
+
+        failed = backfill.backfill(WEEKS[:3], rate=0, checkpoint=str(tmp_path / "c.json"),
+                                   log=lambda m: None, processes=1)
+
+        assert failed == ["2000-01-15"]
+        assert backfill.load_checkpoint(str(tmp_path / "c.json")) == {"2000-01-01", "2000-01-08"}
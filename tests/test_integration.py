@@ -21,7 +21,7 @@ class TestFullFlow:
         mock_spotify.create_playlist_from_songs.return_value = "https://open.spotify.com/playlist/abc123"
         
         routes_module = sys.modules['app.routes']
-        with patch.object(routes_module, 'get_top_100', return_value=mock_scraper_result):
+        with patch.object(routes_module, 'get_chart_entries', return_value=mock_scraper_result):
             with patch.object(routes_module, 'SpotifyClient', return_value=mock_spotify):
                 # Krok 1: Odwiedź stronę główną
                 response = client.get('/')
@@ -49,7 +49,7 @@ class TestFullFlow:
                 assert response.status_code == 200
                 
                 # Sprawdź czy wszystkie funkcje zostały wywołane
-                routes_module.get_top_100.assert_called_once_with('2024-01-15')
+                routes_module.get_chart_entries.assert_called_once_with('hot-100', '2024-01-15')
                 mock_spotify.fetch_token.assert_called_once_with('test_auth_code')
                 mock_spotify.create_playlist_from_songs.assert_called_once()
 
@@ -60,7 +60,7 @@ class TestErrorHandling:
     def test_scraper_failure_handling(self, client):
         """Test obsługi błędu scrapera"""
         routes_module = sys.modules['app.routes']
-        with patch.object(routes_module, 'get_top_100', side_effect=Exception("Billboard unavailable")):
+        with patch.object(routes_module, 'get_chart_entries', side_effect=Exception("Billboard unavailable")):
             with client.session_transaction() as sess:
                 sess['selected_date'] = '2024-01-15'
             
@@ -76,7 +76,7 @@ class TestErrorHandling:
         mock_spotify.create_playlist_from_songs.side_effect = Exception("Spotify API error")
         
         routes_module = sys.modules['app.routes']
-        with patch.object(routes_module, 'get_top_100', return_value=mock_scraper_result):
+        with patch.object(routes_module, 'get_chart_entries', return_value=mock_scraper_result):
             with patch.object(routes_module, 'SpotifyClient', return_value=mock_spotify):
                 with client.session_transaction() as sess:
                     sess['selected_date'] = '2024-01-15'
@@ -0,0 +1,90 @@
+"""
+Testy dla modułu jobs (zadania w tle)
+"""
+import pytest
+import threading
+from app import jobs
+from app.cache import get_cache
+
+
+@jobs.task("test_add")
+def _add(job, a, b):
+    job.progress(1, 1)
+    return a + b
+
+
+@jobs.task("test_evicted")
+def _evicted(job):
+    # Stan zadania wypchnięty z cache w trakcie pracy (limit wpisów)
+    get_cache("job").delete(job.id)
+    job.progress(1, 2)
+    return "ok"
+
+
+@jobs.task("test_fail")
+def _fail(job):
+    raise Exception("Something broke")
+
+
+class TestJobs:
+    """Testy kolejki zadań"""
+    
+    def test_eager_job_result(self):
+        """Test wykonania zadania od razu"""
+        job_id = jobs.enqueue("test_add", a=2, b=3)
+        
+        state = jobs.get_job(job_id)
+        assert state["status"] == "done"
+        assert state["result"] == 5
+        assert state["done"] == state["total"] == 1
+    
+    def test_failed_job_keeps_error(self):
+        """Test zapisu komunikatu błędu"""
+        job_id = jobs.enqueue("test_fail")
+        
+        state = jobs.get_job(job_id)
+        assert state["status"] == "failed"
+        assert state["error"] == "Something broke"
+    
+    def test_evicted_job_state_recreated(self):
+        """Test odtworzenia stanu zadania wypchniętego z cache w trakcie pracy"""
+        job_id = jobs.enqueue("test_evicted")
+        
+        state = jobs.get_job(job_id)
+        assert state["status"] == "done"
+        assert state["result"] == "ok"
+        assert state["done"] == 1 and state["total"] == 2
+    
+    def test_thread_mode_returns_before_job_finishes(self):
+        """Test czy w trybie wątków enqueue nie czeka na zadanie"""
+        release = threading.Event()
+        finished = threading.Event()
+        
+        @jobs.task("test_wait")
+        def _wait(job):
+            release.wait(5)
+            finished.set()
+            return "ok"
+        
+        jobs.configure("thread", workers=1)
+        job_id = jobs.enqueue("test_wait")
+        assert jobs.get_job(job_id)["status"] in ("queued", "running")
+        
+        release.set()
+        assert finished.wait(5)
+        jobs._executor.shutdown(wait=True)
+        assert jobs.get_job(job_id)["status"] == "done"
+    
+    def test_unknown_task(self):
+        """Test nieznanego zadania"""
+        with pytest.raises(ValueError):
+            jobs.enqueue("no_such_task")
+    
+    def test_missing_job(self):
+        """Test nieistniejącego zadania"""
+        assert jobs.get_job("missing") is None
+    
+    def test_invalid_mode(self):
+        """Test niepoprawnego trybu kolejki"""
+        with pytest.raises(ValueError):
+            jobs.configure("carrier-pigeon")
@@ -0,0 +1,119 @@
+"""
+Testy dla modułu metrics
+"""
+import asyncio
+import contextvars
+import logging
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+from app import metrics
+
+
+class TestTimers:
+    """Testy pomiarów etapów"""
+    
+    def test_timer_observes_histogram(self):
+        """Test zapisu czasu etapu w histogramie"""
+        with patch('app.metrics.time.perf_counter', side_effect=[10.0, 10.2]):
+            with metrics.timer("billboard_fetch"):
+                pass
+        
+        output = metrics.render()
+        assert 'playlist_scraper_stage_seconds_count{stage="billboard_fetch"} 1' in output
+        assert 'playlist_scraper_stage_seconds_bucket{stage="billboard_fetch",le="0.25"} 1' in output
+        assert 'playlist_scraper_stage_seconds_bucket{stage="billboard_fetch",le="0.1"} 0' in output
+    
+    def test_timer_records_on_error(self):
+        """Test pomiaru także wtedy, gdy etap rzuci wyjątek"""
+        with pytest.raises(ValueError):
+            with metrics.timer("parse"):
+                raise ValueError("boom")
+        assert 'stage_seconds_count{stage="parse"} 1' in metrics.render()
+    
+    def test_counter_with_labels(self):
+        """Test licznika z etykietami"""
+        metrics.inc("spotify_api_calls", method="search")
+        metrics.inc("spotify_api_calls", method="search")
+        metrics.inc("spotify_api_calls", method="me")
+        
+        output = metrics.render()
+        assert 'playlist_scraper_spotify_api_calls_total{method="search"} 2' in output
+        assert 'playlist_scraper_spotify_api_calls_total{method="me"} 1' in output
+        assert output.count('# TYPE playlist_scraper_spotify_api_calls_total counter') == 1
+    
+    def test_timed_coroutine(self):
+        """Test dekoratora timed dla korutyny - mierzy czas do jej zakończenia"""
+        @metrics.timed("async_stage")
+        async def work():
+            await asyncio.sleep(0.02)
+            return 1
+        
+        with metrics.trace("job") as trace:
+            assert asyncio.run(work()) == 1
+        
+        assert trace.summary()["stages"]["async_stage"]["seconds"] >= 0.02
+
+
+class TestTrace:
+    """Testy śledzenia pojedynczego zapytania"""
+    
+    def test_trace_collects_stages_from_threads(self):
+        """Test zbierania pomiarów z wątków uruchomionych z kopią kontekstu"""
+        def work(_):
+            with metrics.timer("search_song"):
+                metrics.inc("spotify_api_calls", method="search")
+        
+        with metrics.trace("build") as trace:
+            context = contextvars.copy_context()
+            with ThreadPoolExecutor(max_workers=4) as executor:
+                list(executor.map(lambda i: context.copy().run(work, i), range(10)))
+        
+        summary = trace.summary()
+        assert summary["stages"]["search_song"]["count"] == 10
+        assert summary["counters"] == {"spotify_api_calls": 10}
+        assert metrics.current_trace() is None
+    
+    def test_nested_trace_reports_to_parent(self):
+        """Test przekazywania pomiarów zagnieżdżonego śledzenia do nadrzędnego"""
+        with metrics.trace("request") as outer:
+            with metrics.trace("job"):
+                with metrics.timer("get_top_100"):
+                    pass
+        assert outer.summary()["stages"]["get_top_100"]["count"] == 1
+    
+    @patch.dict('os.environ', {'METRICS_TRACE': '1'})
+    def test_trace_logged_when_enabled(self, caplog):
+        """Test zapisu podsumowania w logu przy METRICS_TRACE=1"""
+        with caplog.at_level(logging.INFO, logger="app.metrics"):
+            with metrics.trace("GET /create_playlist"):
+                with metrics.timer("spotify_api", method="search"):
+                    pass
+        assert "trace GET /create_playlist" in caplog.text
+        assert "spotify_api[search]=1x" in caplog.text
+    
+    def test_trace_not_logged_by_default(self, caplog):
+        """Test braku logu bez METRICS_TRACE"""
+        with caplog.at_level(logging.INFO, logger="app.metrics"):
+            with metrics.trace("job"):
+                pass
+        assert caplog.text == ""
+
+
+class TestRender:
+    """Testy formatu Prometheus"""
+    
+    def test_includes_cache_and_scheduler_stats(self):
+        """Test metryk cache i harmonogramu Spotify"""
+        from app.cache import get_cache
+        get_cache("chart").get("2024-01-20")
+        
+        output = metrics.render()
+        assert 'playlist_scraper_cache_misses_total{namespace="chart"} 1' in output
+        assert 'playlist_scraper_spotify_queue_depth{priority="interactive"} 0' in output
+        assert '# TYPE playlist_scraper_spotify_throttled_total counter' in output
+    
+    def test_label_values_escaped(self):
+        """Test escape'owania cudzysłowów w etykietach"""
+        metrics.inc("events", title='say "hi"')
+        assert 'playlist_scraper_events_total{title="say \\"hi\\""} 1' in metrics.render()
@@ -0,0 +1,129 @@
+"""
+Testy dla modułu normalize
+"""
+import pytest
+from app.normalize import (
+    clean_text,
+    fold,
+    split_artist,
+    split_title,
+    featured_artists,
+    title_key,
+    artist_key,
+    track_key,
+    cache_info
+)
+
+
+class TestFold:
+    """Testy sprowadzania tekstu do postaci porównywalnej"""
+    
+    def test_case_and_whitespace(self):
+        """Test wielkości liter i spacji"""
+        assert fold("  Bad   GUY ") == "bad guy"
+    
+    def test_diacritics(self):
+        """Test usuwania akcentów (NFKD)"""
+        assert fold("Déjà Vu") == "deja vu"
+        assert fold("Beyoncé") == "beyonce"
+    
+    def test_apostrophes_and_quotes(self):
+        """Test apostrofów prostych i typograficznych"""
+        assert fold("Don't") == fold("Don’t") == fold("Dont") == "dont"
+        assert fold("Rock 'N' Roll") == "rock n roll"
+    
+    def test_punctuation_and_ampersand(self):
+        """Test interpunkcji i znaku &"""
+        assert fold("Rock & Roll") == fold("Rock and Roll") == "rock and roll"
+        assert fold("Hey Ya!") == "hey ya"
+        assert fold("P.Y.T. (Pretty Young Thing)") == "p y t pretty young thing"
+    
+    def test_empty(self):
+        """Test pustych wartości"""
+        assert fold("") == ""
+        assert fold(None) == ""
+
+
+class TestArtists:
+    """Testy rozdzielania wykonawców"""
+    
+    def test_split_featuring(self):
+        """Test wydzielenia gości"""
+        assert split_artist("Doja Cat Featuring SZA, Nicki Minaj & Cardi B") == (
+            "Doja Cat", ("SZA", "Nicki Minaj", "Cardi B")
+        )
+        assert split_artist("Drake feat. Rihanna") == ("Drake", ("Rihanna",))
+    
+    def test_comma_in_band_name(self):
+        """Test nazwy zespołu z przecinkiem"""
+        assert split_artist("Crosby, Stills") == ("Crosby, Stills", ())
+    
+    @pytest.mark.parametrize("artist", [
+        "Simon & Garfunkel",
+        "Kool & The Gang",
+        "Hall & Oates",
+        "Earth, Wind & Fire",
+        "Crosby, Stills, Nash & Young",
+    ])
+    def test_ampersand_in_band_name(self, artist):
+        """Test, że "&" i przecinek nie odcinają części nazwy zespołu"""
+        assert split_artist(artist) == (artist, ())
+        assert split_artist(f"{artist} Featuring Guest") == (artist, ("Guest",))
+    
+    def test_band_artist_key(self):
+        """Test klucza wykonawcy z "&" w nazwie"""
+        assert artist_key("Simon & Garfunkel") == "simon and garfunkel"
+        assert artist_key("Kool & The Gang") == "kool and the gang"
+        assert artist_key("Earth, Wind & Fire") == artist_key("Earth, Wind and Fire") == "earth wind and fire"
+        assert artist_key("Simon & Garfunkel") != artist_key("Simon")
+    
+    def test_artist_key(self):
+        """Test klucza wykonawcy"""
+        assert artist_key("The Weeknd Featuring Daft Punk") == "weeknd"
+        assert artist_key("Beyoncé") == artist_key("BEYONCE") == "beyonce"
+        assert artist_key("") == ""
+
+
+class TestTitles:
+    """Testy tytułów"""
+    
+    def test_split_title_featuring(self):
+        """Test gości w tytule"""
+        assert split_title("Old Town Road (feat. Billy Ray Cyrus)") == ("Old Town Road", ("Billy Ray Cyrus",))
+        assert split_title("Song ft. X & Y") == ("Song", ("X", "Y"))
+        assert split_title("Hello") == ("Hello", ())
+    
+    def test_title_key_removes_brackets(self):
+        """Test usuwania dopisków w nawiasach"""
+        assert title_key("Déjà Vu (Remix)") == "deja vu"
+        assert title_key("(I Can't Get No) Satisfaction") == "satisfaction"
+        assert title_key("(Remix)") == "remix"
+    
+    def test_featured_artists(self):
+        """Test gości z tytułu i wykonawcy bez powtórzeń"""
+        assert featured_artists("Song (feat. SZA)", "Doja Cat Featuring SZA & Cardi B") == ["SZA", "Cardi B"]
+    
+    @pytest.mark.parametrize("title, artist", [
+        ("Don't Stop Believin'", "Journey"),
+        ("DONT STOP BELIEVIN", "journey"),
+        ("Don’t Stop Believin’ (Remastered)", "The Journey Featuring Nobody"),
+    ])
+    def test_track_key_variants(self, title, artist):
+        """Test, że warianty zapisu dają ten sam klucz"""
+        assert track_key(title, artist) == "dont stop believin|journey"
+
+
+class TestCleanText:
+    """Testy tekstu do wyświetlania"""
+    
+    def test_clean_text(self):
+        """Test NFC i białych znaków"""
+        assert clean_text("  Café \n Song ") == "Café Song"
+        assert clean_text(None) == ""
+    
+    def test_memoized(self):
+        """Test zapamiętywania wyników"""
+        title_key("Memo Test Title")
+        hits = cache_info()["title_key"].hits
+        title_key("Memo Test Title")
+        assert cache_info()["title_key"].hits == hits + 1
@@ -0,0 +1,99 @@
+"""
+Testy dla modułu parsers
+"""
+import pytest
+from unittest.mock import patch
+from app import parsers
+from app.models import ChartEntry
+from app.parsers import parse_chart
+
+CHART_HTML = '''
+<html><head><script>var x = "<li><ul><li><h3>Not a song</h3>";</script></head>
+<body>
+    <nav><ul><li><a href="/">Home</a></li></ul></nav>
+    <ul class="o-chart-results-list-row">
+        <li><span class="c-label">1</span></li>
+        <li class="lrv-u-width-100p">
+            <ul>
+                <li>
+                    <img src="cover.jpg">
+                    <h3 id="title-of-a-story" class="c-title">
+                        Lovin On Me
+                    </h3>
+                    <span class="c-label">Jack Harlow</span>
+                </li>
+                <li><span class="c-label">2</span></li>
+                <li><span class="c-label">1</span></li>
+                <li><span class="c-label">9</span></li>
+            </ul>
+        </li>
+    </ul>
+    <ul class="o-chart-results-list-row">
+        <li class="lrv-u-width-100p">
+            <ul>
+                <li><h3>Rock &amp; Roll <b>Part</b>  2</h3></li>
+            </ul>
+        </li>
+    </ul>
+    <h3>Outside of chart</h3>
+</body></html>
+'''
+
+BACKENDS = [
+    "stream",
+    "bs4",
+    pytest.param("lxml", marks=pytest.mark.skipif(parsers.lxml is None, reason="lxml not installed")),
+]
+
+
+class TestParsers:
+    """Testy backendów parsera strony Billboard"""
+    
+    @pytest.mark.parametrize("backend", BACKENDS)
+    def test_extracts_chart_entries(self, backend):
+        """Test czy każdy backend zwraca te same pozycje"""
+        entries = parsers.PARSERS[backend](CHART_HTML)
+        assert entries == [
+            ChartEntry(1, "Lovin On Me", "Jack Harlow", weeks_on_chart=9, peak=1),
+            ChartEntry(2, "Rock & Roll Part 2", ""),
+        ]
+    
+    @pytest.mark.parametrize("backend", BACKENDS)
+    def test_unclosed_tags(self, backend):
+        """Test niezamkniętych znaczników li"""
+        html = "<li><ul><li><h3>Song 1</h3><li><h3>Song 2</h3></ul></li>"
+        titles = [entry.title for entry in parsers.PARSERS[backend](html)]
+        assert titles == ["Song 1", "Song 2"]
+    
+    def test_falls_back_to_bs4(self):
+        """Test powrotu do BeautifulSoup, gdy szybki parser nic nie znajdzie"""
+        with patch.dict(parsers.PARSERS, {"stream": lambda html: []}):
+            entries = parse_chart(CHART_HTML, backend="stream")
+        assert [entry.title for entry in entries] == ["Lovin On Me", "Rock & Roll Part 2"]
+    
+    @patch.dict('os.environ', {'CHART_PARSER': 'bs4'})
+    def test_backend_from_env(self):
+        """Test wyboru backendu zmienną środowiskową"""
+        with patch.dict(parsers.PARSERS, {"bs4": lambda html: ["From bs4"]}):
+            assert parse_chart(CHART_HTML) == ["From bs4"]
+    
+    def test_unknown_backend(self):
+        """Test nieznanego backendu"""
+        with pytest.raises(ValueError):
+            parse_chart(CHART_HTML, backend="regex")
+
+
+
+class TestChartEntry:
+    """Testy struktury ChartEntry"""
+    
+    def test_list_roundtrip(self):
+        """Test zapisu do listy i odtworzenia"""
+        entry = ChartEntry(1, "Lovin On Me", "Jack Harlow", 9, 1)
+        assert entry.to_list() == [1, "Lovin On Me", "Jack Harlow", 9, 1]
+        assert ChartEntry.from_list(entry.to_list()) == entry
+    
+    def test_uses_slots(self):
+        """Test czy obiekt nie ma __dict__"""
+        with pytest.raises(AttributeError):
+            ChartEntry(1, "Song").extra = 1
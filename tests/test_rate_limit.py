@@ -0,0 +1,145 @@
+"""
+Testy dla harmonogramu zapytań Spotify
+"""
+import pytest
+import threading
+import time
+from unittest.mock import patch, MagicMock
+from spotipy.exceptions import SpotifyException
+from app.rate_limit import (
+    TokenBucket,
+    Scheduler,
+    INTERACTIVE,
+    BACKGROUND,
+    configure,
+    scheduler_stats
+)
+
+
+@pytest.fixture
+def clock():
+    """Fixture podmieniający zegar modułu - sleep przesuwa czas zamiast czekać"""
+    now = [1000.0]
+    with patch('app.rate_limit.time') as mock_time:
+        mock_time.monotonic.side_effect = lambda: now[0]
+        mock_time.sleep.side_effect = lambda seconds: now.__setitem__(0, now[0] + seconds)
+        yield mock_time
+
+
+class FakeBucket:
+    """Kubełek wydający tylko tyle tokenów, ile doda test"""
+    
+    def __init__(self):
+        self.tokens = 0
+        self._lock = threading.Lock()
+    
+    def try_acquire(self):
+        with self._lock:
+            if self.tokens > 0:
+                self.tokens -= 1
+                return 0.0
+        return 0.01
+    
+    def pause(self, seconds):
+        pass
+
+
+def _wait_for(condition):
+    deadline = time.monotonic() + 5
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.005)
+
+
+class TestTokenBucket:
+    """Testy kubełka tokenów"""
+    
+    def test_burst_then_rate(self, clock):
+        """Test wydania zapasu tokenów, a potem oczekiwania według tempa"""
+        bucket = TokenBucket(rate=2, burst=2)
+        assert bucket.try_acquire() == 0.0
+        assert bucket.try_acquire() == 0.0
+        assert bucket.try_acquire() == pytest.approx(0.5)
+        
+        clock.sleep(0.5)
+        assert bucket.try_acquire() == 0.0
+    
+    def test_pause(self, clock):
+        """Test wstrzymania kubełka po 429"""
+        bucket = TokenBucket(rate=0, burst=1)
+        bucket.pause(3)
+        assert bucket.try_acquire() == pytest.approx(3.0)
+        clock.sleep(3)
+        assert bucket.try_acquire() == 0.0
+
+
+class TestScheduler:
+    """Testy harmonogramu zapytań"""
+    
+    def test_retry_after_pauses_and_retries(self, clock):
+        """Test oczekiwania Retry-After i ponowienia zapytania"""
+        scheduler = Scheduler(TokenBucket(rate=0, burst=1))
+        func = MagicMock(side_effect=[
+            SpotifyException(429, -1, "rate limited", headers={"Retry-After": "2"}),
+            "ok"
+        ])
+        
+        assert scheduler.call(func, q="x") == "ok"
+        clock.sleep.assert_called_once_with(2.0)
+        stats = scheduler.stats()
+        assert stats["throttled"] == 1
+        assert stats["calls"] == 2
+        assert stats["wait_seconds_max"] == pytest.approx(2.0)
+    
+    def test_other_errors_not_retried(self):
+        """Test, że błędy inne niż 429 przechodzą od razu"""
+        scheduler = Scheduler(TokenBucket(rate=0, burst=1))
+        func = MagicMock(side_effect=SpotifyException(500, -1, "server error"))
+        
+        with pytest.raises(SpotifyException):
+            scheduler.call(func)
+        assert func.call_count == 1
+    
+    def test_interactive_before_background(self):
+        """Test pierwszeństwa zapytań interaktywnych i statystyk kolejki"""
+        bucket = FakeBucket()
+        scheduler = Scheduler(bucket)
+        order = []
+        
+        def worker(name, priority):
+            scheduler.acquire(priority)
+            order.append(name)
+        
+        background = threading.Thread(target=worker, args=("background", BACKGROUND))
+        background.start()
+        _wait_for(lambda: scheduler.stats()["queue_depth"] == 1)
+        interactive = threading.Thread(target=worker, args=("interactive", INTERACTIVE))
+        interactive.start()
+        _wait_for(lambda: scheduler.stats()["queue_depth"] == 2)
+        assert scheduler.stats()["queued"] == {"interactive": 1, "background": 1}
+        
+        bucket.tokens = 1
+        _wait_for(lambda: order)
+        bucket.tokens = 1
+        background.join(5)
+        interactive.join(5)
+        
+        assert order == ["interactive", "background"]
+        assert scheduler.stats()["queue_depth"] == 0
+
+
+class TestConfigure:
+    """Testy konfiguracji harmonogramu"""
+    
+    @patch.dict('os.environ', {'SPOTIFY_RATE_LIMIT': '5', 'SPOTIFY_BURST': '7'})
+    def test_from_env(self):
+        """Test odczytu tempa z zmiennych środowiskowych"""
+        scheduler = configure()
+        assert scheduler.bucket.rate == 5.0
+        assert scheduler.bucket.burst == 7
+        assert scheduler_stats()["calls"] == 0
+    
+    def test_unsupported_url(self):
+        """Test błędu dla nieznanego adresu"""
+        with pytest.raises(ValueError):
+            configure("ftp://example.com")
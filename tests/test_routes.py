@@ -3,7 +3,8 @@ Testy dla routes (endpointy Flask)
 """
 import pytest
 import sys
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch, MagicMock, ANY
+from app.rate_limit import BACKGROUND
 
 
 class TestIndexRoute:
@@ -104,7 +105,7 @@ class TestCreatePlaylistRoute:
         mock_spotify.create_playlist_from_songs.return_value = 'https://spotify.com/playlist/123'
         
         routes_module = sys.modules['app.routes']
-        with patch.object(routes_module, 'get_top_100', return_value=mock_scraper_result):
+        with patch.object(routes_module, 'get_chart_entries', return_value=mock_scraper_result):
             with patch.object(routes_module, 'SpotifyClient', return_value=mock_spotify):
                 with client.session_transaction() as sess:
                     sess['selected_date'] = '2024-01-15'
@@ -114,12 +115,12 @@ class TestCreatePlaylistRoute:
                 response = client.get('/create_playlist', follow_redirects=True)
                 
                 assert response.status_code == 200
-                routes_module.get_top_100.assert_called_once_with('2024-01-15')
+                routes_module.get_chart_entries.assert_called_once_with('hot-100', '2024-01-15')
     
     def test_create_playlist_scraper_error(self, client):
         """Test błędu scrapera"""
         routes_module = sys.modules['app.routes']
-        with patch.object(routes_module, 'get_top_100', side_effect=Exception("Scraper error")):
+        with patch.object(routes_module, 'get_chart_entries', side_effect=Exception("Scraper error")):
             with client.session_transaction() as sess:
                 sess['selected_date'] = '2024-01-15'
             
@@ -127,3 +128,145 @@ class TestCreatePlaylistRoute:
             
             assert response.status_code == 200
             assert b'Failed' in response.data or b'error' in response.data.lower()
+
+
+class TestRangePlaylistRoute:
+    """Testy playlisty z zakresu dat"""
+    
+    def test_start_saves_range(self, client):
+        """Test zapisania zakresu w sesji"""
+        mock_spotify = MagicMock()
+        mock_spotify.get_auth_url.return_value = "https://spotify.com/auth"
+        
+        routes_module = sys.modules['app.routes']
+        with patch.object(routes_module, 'SpotifyClient', return_value=mock_spotify):
+            response = client.post('/start', data={
+                'date': '1985-01-01', 'end_date': '1985-12-31', 'top': '1'
+            })
+        
+        assert response.status_code == 302
+        with client.session_transaction() as sess:
+            assert sess['chart'] == 'hot-100'
+            assert sess['end_date'] == '1985-12-31'
+            assert sess['top'] == 1
+    
+    @pytest.mark.parametrize("data", [
+        {'date': '1985-01-01', 'chart': 'no-such-chart'},
+        {'date': '2015-01-01', 'chart': 'billboard-global-200'},
+        {'date': '1985-01-01', 'end_date': '1985-12-31', 'top': '100', 'chart': 'country-songs'},
+        {'date': '1985-12-31', 'end_date': '1985-01-01'},
+        {'date': '1960-01-01', 'end_date': '2020-01-01'},
+        {'date': '1985-01-01', 'end_date': '1985-12-31', 'top': '7'},
+        {'date': '1985-01-01', 'end_date': 'bad'},
+    ])
+    def test_start_invalid_range(self, client, data):
+        """Test odrzucenia niepoprawnego zakresu"""
+        response = client.post('/start', data=data)
+        
+        assert response.status_code == 302
+        assert response.location.endswith('/')
+    
+    def test_range_job(self, client):
+        """Test zadania budującego jedną playlistę z wielu tygodni"""
+        mock_spotify = MagicMock()
+        mock_spotify.create_playlist_from_range.return_value = 'https://spotify.com/playlist/range'
+        
+        routes_module = sys.modules['app.routes']
+        with patch.object(routes_module, 'get_chart_range', return_value=[('1985-01-05', 'Song 1')]) as mock_range:
+            with patch.object(routes_module, 'SpotifyClient', return_value=mock_spotify) as mock_client:
+                with client.session_transaction() as sess:
+                    sess['selected_date'] = '1985-01-01'
+                    sess['end_date'] = '1985-12-31'
+                    sess['top'] = 1
+                    sess['spotify_token'] = {'access_token': 'test_token'}
+                
+                response = client.get('/create_playlist', follow_redirects=True)
+        
+        mock_range.assert_called_once_with('1985-01-01', '1985-12-31', top=1, chart_id='hot-100', with_weeks=True)
+        # Wyszukiwania z zakresu dat ustępują zapytaniom użytkowników
+        assert mock_client.call_args.kwargs['priority'] == BACKGROUND
+        mock_spotify.create_playlist_from_range.assert_called_once_with(
+            '1985-01-01', '1985-12-31', [('1985-01-05', 'Song 1')], None, progress=ANY, top=1, chart_id='hot-100'
+        )
+        assert b'https://spotify.com/playlist/range' in response.data
+
+
+class TestJobRoutes:
+    """Testy dla stron zadania budowania playlisty"""
+    
+    def test_create_playlist_redirects_to_job(self, client):
+        """Test czy /create_playlist zwraca od razu przekierowanie do zadania"""
+        mock_spotify = MagicMock()
+        mock_spotify.create_playlist_from_songs.return_value = 'https://spotify.com/playlist/123'
+        
+        routes_module = sys.modules['app.routes']
+        with patch.object(routes_module, 'get_chart_entries', return_value=['Song 1']):
+            with patch.object(routes_module, 'SpotifyClient', return_value=mock_spotify) as mock_cls:
+                with client.session_transaction() as sess:
+                    sess['selected_date'] = '2024-01-15'
+                    sess['spotify_token'] = {'access_token': 'test_token'}
+                
+                response = client.get('/create_playlist', follow_redirects=False)
+                
+                assert response.status_code == 302
+                assert '/jobs/' in response.location
+                # Token z sesji przekazany do zadania
+                mock_cls.assert_called_once_with(token_info={'access_token': 'test_token'})
+                
+                response = client.get(response.location)
+                assert b'https://spotify.com/playlist/123' in response.data
+    
+    def test_job_status_json(self, client):
+        """Test endpointu ze stanem zadania"""
+        routes_module = sys.modules['app.routes']
+        with patch.object(routes_module, 'get_chart_entries', side_effect=Exception("boom")):
+            job_id = routes_module.jobs.enqueue(
+                "build_playlist", user_date='2024-01-15', playlist_name=None, token_info=None
+            )
+        
+        response = client.get(f'/jobs/{job_id}/status')
+        assert response.status_code == 200
+        assert response.get_json()['status'] == 'failed'
+        assert response.get_json()['error'] == 'Failed to fetch Billboard data.'
+    
+    def test_job_in_progress_page(self, client):
+        """Test strony postępu dla trwającego zadania"""
+        from app.cache import get_cache
+        get_cache("job").set("abc", {
+            "id": "abc", "status": "running", "done": 25, "total": 100,
+            "result": None, "error": None
+        })
+        
+        response = client.get('/jobs/abc')
+        assert response.status_code == 200
+        assert b'Matched 25 of 100 songs' in response.data
+        assert b'/jobs/abc/status' in response.data
+    
+    def test_unknown_job(self, client):
+        """Test nieistniejącego zadania"""
+        assert client.get('/jobs/missing').status_code == 404
+        assert client.get('/jobs/missing/status').status_code == 404
+
+
+class TestMetricsRoute:
+    """Testy endpointu /metrics"""
+    
+    def test_metrics_after_playlist_job(self, client):
+        """Test metryk Prometheus po zbudowaniu playlisty"""
+        mock_spotify = MagicMock()
+        mock_spotify.create_playlist_from_songs.return_value = 'https://spotify.com/playlist/123'
+        
+        routes_module = sys.modules['app.routes']
+        with patch.object(routes_module, 'get_chart_entries', return_value=['Song 1']):
+            with patch.object(routes_module, 'SpotifyClient', return_value=mock_spotify):
+                with client.session_transaction() as sess:
+                    sess['selected_date'] = '2024-01-15'
+                    sess['spotify_token'] = {'access_token': 'test_token'}
+                client.get('/create_playlist')
+        
+        response = client.get('/metrics')
+        
+        assert response.status_code == 200
+        assert response.mimetype == 'text/plain'
+        assert b'playlist_scraper_playlist_spotify_api_calls_count 1' in response.data
+        assert b'playlist_scraper_cache_hits_total{namespace="job"}' in response.data
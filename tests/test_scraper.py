@@ -4,13 +4,16 @@ Testy dla modułu scraper
 import pytest
 from unittest.mock import patch, MagicMock
 import requests
-from app.scraper import get_top_100
+from datetime import datetime
+from app.models import ChartEntry
+from app.scraper import get_top_100, get_chart_range, range_weeks, unique_entries, MAX_RANGE_WEEKS
+from app.utils import chart_week
 
 
 class TestGetTop100:
     """Testy dla funkcji get_top_100"""
     
-    @patch('app.scraper.requests.get')
+    @patch('app.scraper.requests.Session.get')
     def test_successful_scrape(self, mock_get):
         """Test pomyślnego scrapowania"""
         # Mock response
@@ -28,16 +31,18 @@ class TestGetTop100:
         result = get_top_100("2024-01-15")
         
         assert len(result) == 3
-        assert "Song 1" in result
-        assert "Song 2" in result
-        assert "Song 3" in result
+        titles = [entry.title for entry in result]
+        assert "Song 1" in titles
+        assert "Song 2" in titles
+        assert "Song 3" in titles
+        assert [entry.rank for entry in result] == [1, 2, 3]
         
-        # Sprawdź czy wywołano z poprawnymi parametrami
+        # Sprawdź czy wywołano z datą notowania (sobota tego tygodnia)
         mock_get.assert_called_once()
         call_args = mock_get.call_args
-        assert "2024-01-15" in call_args[0][0]
+        assert "2024-01-20" in call_args[0][0]
     
-    @patch('app.scraper.requests.get')
+    @patch('app.scraper.requests.Session.get')
     def test_network_error(self, mock_get):
         """Test błędu sieciowego"""
         mock_get.side_effect = requests.RequestException("Network error")
@@ -47,7 +52,7 @@ class TestGetTop100:
         
         assert "Error fetching Billboard page" in str(exc_info.value)
     
-    @patch('app.scraper.requests.get')
+    @patch('app.scraper.requests.Session.get')
     def test_http_error(self, mock_get):
         """Test błędu HTTP"""
         mock_response = MagicMock()
@@ -59,7 +64,7 @@ class TestGetTop100:
         
         assert "Error fetching Billboard page" in str(exc_info.value)
     
-    @patch('app.scraper.requests.get')
+    @patch('app.scraper.requests.Session.get')
     def test_no_songs_found(self, mock_get):
         """Test gdy nie znaleziono piosenek"""
         mock_response = MagicMock()
@@ -72,7 +77,7 @@ class TestGetTop100:
         
         assert "Could not parse" in str(exc_info.value)
     
-    @patch('app.scraper.requests.get')
+    @patch('app.scraper.requests.Session.get')
     def test_strips_whitespace(self, mock_get):
         """Test czy usuwa białe znaki z tytułów"""
         mock_response = MagicMock()
@@ -91,10 +96,10 @@ class TestGetTop100:
         result = get_top_100("2024-01-15")
         
         assert len(result) == 2
-        assert result[0] == "Song With Spaces"
-        assert result[1] == "Multiline Song"
+        assert result[0].title == "Song With Spaces"
+        assert result[1].title == "Multiline Song"
     
-    @patch('app.scraper.requests.get')
+    @patch('app.scraper.requests.Session.get')
     def test_timeout_parameter(self, mock_get):
         """Test czy używa timeoutu"""
         mock_response = MagicMock()
@@ -108,3 +113,249 @@ class TestGetTop100:
         call_kwargs = mock_get.call_args[1]
         assert 'timeout' in call_kwargs
         assert call_kwargs['timeout'] == 10
+    
+    @patch('app.scraper.requests.Session.get')
+    def test_other_chart(self, mock_get):
+        """Test pobrania innej listy z rejestru - własny adres i klucz cache"""
+        from app.scraper import get_chart_entries
+        from app.cache import get_cache
+        mock_response = MagicMock()
+        mock_response.status_code = 200
+        mock_response.text = '<html><li><ul><li><h3>Song</h3></li></ul></li></html>'
+        mock_get.return_value = mock_response
+        
+        result = get_chart_entries("country-songs", "2024-01-15")
+        
+        assert result[0].title == "Song"
+        assert mock_get.call_args[0][0].endswith("/charts/country-songs/2024-01-20")
+        assert get_cache("chart").get("country-songs|2024-01-20") is not None
+        assert get_cache("chart").get("2024-01-20") is None
+    
+    @patch('app.scraper.requests.Session.get')
+    def test_date_before_first_chart(self, mock_get):
+        """Test daty sprzed pierwszego notowania listy"""
+        from app.scraper import get_chart_entries
+        with pytest.raises(ValueError):
+            get_chart_entries("billboard-global-200", "2015-01-01")
+        mock_get.assert_not_called()
+    
+    @patch('app.scraper.requests.Session.get')
+    def test_second_call_served_from_cache(self, mock_get):
+        """Test czy powtórne zapytanie o ten sam tydzień nie odpytuje Billboard"""
+        mock_response = MagicMock()
+        mock_response.status_code = 200
+        mock_response.text = '<html><li><ul><li><h3>Song</h3></li></ul></li></html>'
+        mock_get.return_value = mock_response
+        
+        first = get_top_100("2024-01-15")
+        second = get_top_100("2024-01-15")
+        
+        assert first == second == [ChartEntry(1, "Song")]
+        mock_get.assert_called_once()
+    
+    @patch('app.scraper.requests.Session.get')
+    def test_errors_are_not_cached(self, mock_get):
+        """Test czy błędy nie trafiają do cache"""
+        mock_get.side_effect = requests.RequestException("Network error")
+        
+        with pytest.raises(Exception):
+            get_top_100("2024-01-15")
+        with pytest.raises(Exception):
+            get_top_100("2024-01-15")
+        
+        assert mock_get.call_count == 2
+    
+    @patch('app.scraper.requests.Session.get')
+    def test_dates_in_same_week_share_one_fetch(self, mock_get):
+        """Test czy różne dni tego samego tygodnia dają jedno pobranie"""
+        mock_response = MagicMock()
+        mock_response.status_code = 200
+        mock_response.text = '<html><li><ul><li><h3>Song</h3></li></ul></li></html>'
+        mock_get.return_value = mock_response
+        
+        for day in ["2024-01-14", "2024-01-15", "2024-01-18", "2024-01-20"]:
+            assert [entry.title for entry in get_top_100(day)] == ["Song"]
+        
+        mock_get.assert_called_once()
+    
+    @patch('app.scraper.requests.Session.get')
+    def test_invalid_date(self, mock_get):
+        """Test niepoprawnej daty - bez zapytania do Billboard"""
+        with pytest.raises(ValueError):
+            get_top_100("not-a-date")
+        
+        mock_get.assert_not_called()
+    
+    @patch('app.scraper.requests.Session.get')
+    def test_concurrent_requests_share_one_fetch(self, mock_get):
+        """Test czy równoczesne zapytania o ten sam tydzień pobierają stronę raz"""
+        import time
+        from concurrent.futures import ThreadPoolExecutor
+        
+        mock_response = MagicMock()
+        mock_response.status_code = 200
+        mock_response.text = '<html><li><ul><li><h3>Song</h3></li></ul></li></html>'
+        
+        def slow_get(*args, **kwargs):
+            time.sleep(0.1)
+            return mock_response
+        mock_get.side_effect = slow_get
+        
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            results = list(executor.map(get_top_100, ["2024-01-15"] * 8))
+        
+        assert all(len(result) == 1 for result in results)
+        mock_get.assert_called_once()
+
+
+def _chart(chart_id, date_str, session=None, throttle=None):
+    """Atrapa get_chart_entries: trzy utwory, #1 zmienia się co dwa tygodnie"""
+    number_one = {"2024-01-06": "Hit 0", "2024-01-13": "Hit 0", "2024-01-20": "Hit 1",
+                  "2024-01-27": "Hit 1", "2024-02-03": "Hit 2"}[date_str]
+    return [
+        ChartEntry(1, number_one, "Artist"),
+        ChartEntry(2, "Evergreen", "The Band Featuring Guest"),
+        ChartEntry(3, "Don't Stop", "Singer"),
+    ]
+
+
+class TestChartRange:
+    """Testy list z zakresu dat"""
+    
+    def test_unique_entries_keeps_first(self):
+        """Test usuwania powtórzeń po kanonicznym kluczu"""
+        entries = [
+            ChartEntry(1, "Don't Stop", "Singer"),
+            ChartEntry(2, "DONT STOP (Remix)", "Singer Featuring X"),
+            ChartEntry(3, "Don't Stop", "Other Singer"),
+        ]
+        assert unique_entries(entries) == [entries[0], entries[2]]
+    
+    def test_range_weeks(self):
+        """Test tygodni zakresu i jego granic"""
+        assert range_weeks("2024-01-01", "2024-01-31") == [
+            "2024-01-06", "2024-01-13", "2024-01-20", "2024-01-27", "2024-02-03"
+        ]
+        with pytest.raises(ValueError):
+            range_weeks("2024-02-01", "2024-01-01")
+        with pytest.raises(ValueError):
+            range_weeks("1960-01-01", f"{1960 + MAX_RANGE_WEEKS // 52 + 1}-01-01")
+    
+    @patch('app.scraper.get_chart_entries', side_effect=_chart)
+    def test_number_ones_deduplicated(self, mock_top):
+        """Test, że każdy tydzień jest pobierany raz, a utwory nie powtarzają się"""
+        entries = get_chart_range("2024-01-01", "2024-01-31", top=1)
+        
+        assert mock_top.call_count == 5
+        assert [entry.title for entry in entries] == ["Hit 0", "Hit 1", "Hit 2"]
+    
+    @patch('app.scraper.get_chart_entries', side_effect=_chart)
+    def test_order_is_chronological(self, mock_top):
+        """Test kolejności pierwszego wystąpienia przy pobieraniu równoległym"""
+        entries = get_chart_range("2024-01-01", "2024-01-31", top=3, max_workers=4)
+        
+        assert [entry.title for entry in entries] == ["Hit 0", "Evergreen", "Don't Stop", "Hit 1", "Hit 2"]
+    
+    @patch('app.scraper.get_chart_entries', side_effect=_chart)
+    def test_with_weeks(self, mock_top):
+        """Test zwracania tygodnia pierwszego wystąpienia każdego utworu"""
+        entries = get_chart_range("2024-01-01", "2024-01-31", top=1, with_weeks=True)
+        
+        assert [(week, entry.title) for week, entry in entries] == [
+            ("2024-01-06", "Hit 0"), ("2024-01-20", "Hit 1"), ("2024-02-03", "Hit 2")
+        ]
+    
+    @patch('app.scraper._fetch_chart', return_value=[ChartEntry(1, "Song", "Artist")])
+    def test_uncached_weeks_throttled(self, mock_fetch):
+        """Test, że tempo pobierania dotyczy tylko tygodni spoza cache"""
+        from app.cache import get_cache
+        get_cache("chart").set("2024-01-13", [[1, "Cached", "Artist", None, None]])
+        
+        with patch('app.scraper.RateLimiter.wait') as mock_wait:
+            entries = get_chart_range("2024-01-01", "2024-01-31", top=1)
+        
+        assert mock_fetch.call_count == 4
+        assert mock_wait.call_count == 4
+        assert [entry.title for entry in entries] == ["Song", "Cached"]
+
+
+def _response(status=200, text='<html><li><ul><li><h3>Song</h3></li></ul></li></html>', headers=None):
+    response = MagicMock()
+    response.status_code = status
+    response.text = text
+    response.content = text.encode("utf-8")
+    response.headers = headers or {}
+    response.raw.tell.return_value = 0
+    return response
+
+
+class TestConditionalGet:
+    """Testy zapytań warunkowych (ETag/Last-Modified)"""
+    
+    # Ostatnie opublikowane notowanie - może się jeszcze zmienić
+    CURRENT = chart_week(datetime.now().strftime("%Y-%m-%d"))
+    
+    @patch('app.scraper.requests.Session.get')
+    def test_not_modified_served_from_stored_result(self, mock_get):
+        """Test, że odpowiedź 304 zwraca zapamiętany wynik bez parsowania"""
+        from app.cache import get_cache
+        mock_get.side_effect = [
+            _response(headers={"ETag": '"v1"', "Last-Modified": "Sat, 02 Jan 2099 00:00:00 GMT"}),
+            _response(status=304, text=""),
+        ]
+        first = get_top_100(self.CURRENT)
+        get_cache("chart").delete(self.CURRENT)
+        
+        with patch('app.charts.Chart.parse') as mock_parse:
+            second = get_top_100(self.CURRENT)
+        
+        assert second == first
+        mock_parse.assert_not_called()
+        headers = mock_get.call_args_list[1][1]['headers']
+        assert headers['If-None-Match'] == '"v1"'
+        assert headers['If-Modified-Since'] == "Sat, 02 Jan 2099 00:00:00 GMT"
+        assert 'gzip' in headers['Accept-Encoding']
+    
+    @patch('app.scraper.requests.Session.get')
+    def test_changed_page_replaces_stored_result(self, mock_get):
+        """Test, że zmieniona strona (200) jest parsowana i zapamiętana na nowo"""
+        from app.cache import get_cache
+        mock_get.side_effect = [
+            _response(headers={"ETag": '"v1"'}),
+            _response(text='<html><li><ul><li><h3>New Song</h3></li></ul></li></html>', headers={"ETag": '"v2"'}),
+        ]
+        get_top_100(self.CURRENT)
+        get_cache("chart").delete(self.CURRENT)
+        
+        assert get_top_100(self.CURRENT)[0].title == "New Song"
+        assert get_cache("chart_validators").get(self.CURRENT)["etag"] == '"v2"'
+    
+    @patch('app.scraper.requests.Session.get')
+    def test_archive_weeks_not_validated(self, mock_get):
+        """Test, że dla archiwalnych tygodni nie są zapisywane walidatory"""
+        from app.cache import get_cache
+        mock_get.return_value = _response(headers={"ETag": '"v1"'})
+        
+        get_top_100("2000-01-01")
+        
+        assert get_cache("chart_validators").get("2000-01-01") is None
+        assert 'If-None-Match' not in mock_get.call_args[1]['headers']
+    
+    @patch('app.scraper.requests.Session.get')
+    def test_byte_counters(self, mock_get):
+        """Test liczników bajtów pobranych, po dekompresji i zaoszczędzonych"""
+        from app import metrics
+        from app.cache import get_cache
+        first = _response(headers={"ETag": '"v1"', "Content-Length": "12"})
+        mock_get.side_effect = [first, _response(status=304, text="")]
+        
+        get_top_100(self.CURRENT)
+        get_cache("chart").delete(self.CURRENT)
+        get_top_100(self.CURRENT)
+        
+        rendered = metrics.render()
+        size = len(first.content)
+        assert "playlist_scraper_billboard_bytes_received_total 12" in rendered
+        assert f"playlist_scraper_billboard_bytes_decoded_total {size}" in rendered
+        assert f"playlist_scraper_billboard_bytes_saved_total {size}" in rendered
+        assert "playlist_scraper_billboard_not_modified_total 1" in rendered
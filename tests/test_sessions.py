@@ -0,0 +1,94 @@
+"""
+Testy dla sesji trzymanych po stronie serwera
+"""
+import pytest
+from unittest.mock import patch
+from flask import Flask, session
+from app.cache import MemoryBackend
+from app.sessions import ServerSideSessionInterface
+
+
+@pytest.fixture
+def backend():
+    """Fixture zwracający backend sesji w pamięci"""
+    return MemoryBackend()
+
+
+@pytest.fixture
+def session_app(backend):
+    """Fixture zwracający małą aplikację z sesją po stronie serwera"""
+    app = Flask(__name__)
+    app.secret_key = "test_secret_key"
+    app.session_interface = ServerSideSessionInterface(backend=backend)
+
+    @app.route("/set/<value>")
+    def set_value(value):
+        session["token"] = {"access_token": value * 100, "refresh_token": "r"}
+        return "ok"
+
+    @app.route("/get")
+    def get_value():
+        token = session.get("token")
+        return token["access_token"][:10] if token else "none"
+
+    @app.route("/clear")
+    def clear():
+        session.clear()
+        return "ok"
+
+    return app
+
+
+class TestServerSideSession:
+    """Testy interfejsu sesji"""
+    
+    def test_cookie_contains_only_session_id(self, session_app, backend):
+        """Test, że ciasteczko nie zawiera danych sesji"""
+        client = session_app.test_client()
+        response = client.get("/set/abc")
+        cookie = response.headers["Set-Cookie"]
+        
+        assert "abc" not in cookie
+        assert len(cookie) < 200
+        assert len(backend) == 1
+    
+    def test_data_roundtrip(self, session_app):
+        """Test odczytu danych zapisanych w poprzednim zapytaniu"""
+        client = session_app.test_client()
+        client.get("/set/abc")
+        assert client.get("/get").data == b"abcabcabca"
+    
+    def test_unmodified_session_not_saved(self, session_app, backend):
+        """Test, że odczyt pustej sesji nie tworzy wpisu ani ciasteczka"""
+        client = session_app.test_client()
+        response = client.get("/get")
+        assert "Set-Cookie" not in response.headers
+        assert len(backend) == 0
+    
+    def test_tampered_cookie_starts_new_session(self, session_app):
+        """Test, że zmienione ciasteczko daje nową, pustą sesję"""
+        client = session_app.test_client()
+        client.get("/set/abc")
+        cookie = client.get_cookie("session")
+        client.set_cookie("session", cookie.value[:-2] + "xx")
+        assert client.get("/get").data == b"none"
+    
+    def test_clear_deletes_data_and_cookie(self, session_app, backend):
+        """Test, że wyczyszczona sesja znika z backendu i z ciasteczek"""
+        client = session_app.test_client()
+        client.get("/set/abc")
+        response = client.get("/clear")
+        
+        assert len(backend) == 0
+        assert "Expires=Thu, 01 Jan 1970" in response.headers["Set-Cookie"]
+    
+    def test_expired_sessions_are_swept(self, session_app, backend):
+        """Test okresowego usuwania wygasłych sesji"""
+        interface = session_app.session_interface
+        with patch('app.cache.time.time', return_value=1000.0):
+            backend.set("session:old", "{}", ttl=10)
+        with patch('app.sessions.time.monotonic', return_value=interface._last_sweep + 3600):
+            session_app.test_client().get("/set/abc")
+        
+        assert backend.get("session:old") is None
+        assert len(backend) == 1
@@ -0,0 +1,104 @@
+"""
+Testy dla modułu singleflight
+"""
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from app.singleflight import AsyncSingleFlight, SingleFlight
+
+
+class TestSingleFlight:
+    """Testy łączenia równoczesnych wywołań"""
+    
+    def test_concurrent_calls_share_one_execution(self):
+        """Test czy równoczesne wywołania wykonują funkcję raz"""
+        group = SingleFlight()
+        calls = []
+        
+        def slow():
+            calls.append(1)
+            time.sleep(0.1)
+            return "result"
+        
+        with ThreadPoolExecutor(max_workers=10) as executor:
+            results = list(executor.map(lambda _: group.do("key", slow), range(10)))
+        
+        assert results == ["result"] * 10
+        assert len(calls) == 1
+        assert group.in_flight() == 0
+    
+    def test_different_keys_run_separately(self):
+        """Test czy różne klucze nie są łączone"""
+        group = SingleFlight()
+        assert group.do("a", lambda: 1) == 1
+        assert group.do("b", lambda: 2) == 2
+    
+    def test_error_shared_with_waiters(self):
+        """Test czy wyjątek trafia do wszystkich czekających"""
+        group = SingleFlight()
+        started = threading.Event()
+        
+        def failing():
+            started.set()
+            time.sleep(0.1)
+            raise ValueError("boom")
+        
+        errors = []
+        
+        def call():
+            try:
+                group.do("key", failing)
+            except ValueError as e:
+                errors.append(str(e))
+        
+        leader = threading.Thread(target=call)
+        leader.start()
+        started.wait(1)
+        follower = threading.Thread(target=call)
+        follower.start()
+        leader.join()
+        follower.join()
+        
+        assert errors == ["boom", "boom"]
+    
+    def test_next_call_after_finish_runs_again(self):
+        """Test czy po zakończeniu kolejne wywołanie wykonuje funkcję ponownie"""
+        group = SingleFlight()
+        counter = iter(range(10))
+        assert group.do("key", lambda: next(counter)) == 0
+        assert group.do("key", lambda: next(counter)) == 1
+
+
+class TestAsyncSingleFlight:
+    """Testy łączenia równoczesnych korutyn"""
+    
+    def test_concurrent_calls_share_one_execution(self):
+        """Test czy równoczesne korutyny o ten sam klucz czekają na jedno wykonanie"""
+        group = AsyncSingleFlight()
+        calls = []
+        
+        async def load():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return "value"
+        
+        async def run():
+            return await asyncio.gather(*(group.do("key", load) for _ in range(10)))
+        
+        assert asyncio.run(run()) == ["value"] * 10
+        assert len(calls) == 1
+        assert group.in_flight() == 0
+    
+    def test_error_shared_with_waiters(self):
+        """Test czy wyjątek trafia do wszystkich czekających"""
+        group = AsyncSingleFlight()
+        
+        async def load():
+            await asyncio.sleep(0.01)
+            raise ValueError("boom")
+        
+        async def run():
+            return await asyncio.gather(*(group.do("key", load) for _ in range(3)), return_exceptions=True)
+        
+        assert [str(e) for e in asyncio.run(run())] == ["boom"] * 3
@@ -2,7 +2,7 @@
 Testy dla modułu spotify
 """
 import pytest
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch, MagicMock, ANY
 from app.spotify import SpotifyClient
 
 
@@ -50,8 +50,11 @@ class TestSpotifyClient:
             redirect_uri='http://localhost:8080/callback',
             scope="playlist-modify-public playlist-modify-private",
             show_dialog=True,
-            cache_path=None
+            cache_handler=ANY,
+            requests_session=client.requests_session
         )
+        # Współdzielony OAuth nie może pamiętać tokenów użytkowników
+        assert mock_oauth.call_args[1]['cache_handler'].get_cached_token() is None
     
     @patch.dict('os.environ', {
         'SPOTIPY_CLIENT_ID': 'test_id',
@@ -76,7 +79,12 @@ class TestSpotifyClient:
             client.fetch_token('test_code')
         
         mock_oauth_instance.get_access_token.assert_called_once_with('test_code')
-        mock_spotify.assert_called_once_with(auth='test_token')
+        mock_spotify.assert_called_once_with(
+            auth_manager=ANY,
+            requests_session=client.requests_session
+        )
+        user_token = mock_spotify.call_args[1]['auth_manager']
+        assert user_token.get_access_token() == 'test_token'
     
     @patch.dict('os.environ', {
         'SPOTIPY_CLIENT_ID': 'test_id',
@@ -194,3 +202,501 @@ class TestSpotifyClient:
         # Sprawdź czy użyto domyślnej nazwy
         create_call = mock_sp.user_playlist_create.call_args
         assert create_call[1]['name'] == "2024-01-15 Billboard 100"
+    
+    @patch.dict('os.environ', {
+        'SPOTIPY_CLIENT_ID': 'test_id',
+        'SPOTIPY_CLIENT_SECRET': 'test_secret',
+        'SPOTIPY_REDIRECT_URI': 'http://localhost:8080/callback'
+    })
+    def test_search_song_uses_cache(self):
+        """Test czy powtórne wyszukiwanie nie odpytuje Spotify"""
+        client = SpotifyClient()
+        
+        mock_sp = MagicMock()
+        mock_sp.search.return_value = {
+            'tracks': {
+                'items': [{'uri': 'spotify:track:123abc'}]
+            }
+        }
+        client.sp = mock_sp
+        
+        assert client.search_song("Test Song", "2024") == 'spotify:track:123abc'
+        # Inna wielkość liter i spacje - ten sam klucz cache
+        assert client.search_song("  test   SONG ", "2024") == 'spotify:track:123abc'
+        assert SpotifyClient().search_song("Test Song", "2024") == 'spotify:track:123abc'
+        
+        mock_sp.search.assert_called_once()
+    
+    @patch.dict('os.environ', {
+        'SPOTIPY_CLIENT_ID': 'test_id',
+        'SPOTIPY_CLIENT_SECRET': 'test_secret',
+        'SPOTIPY_REDIRECT_URI': 'http://localhost:8080/callback'
+    })
+    @patch('app.cache.time.time', return_value=1000.0)
+    def test_search_song_caches_misses_shorter(self, mock_time):
+        """Test czy brak wyniku zapisywany jest z krótszym TTL"""
+        from app.cache import get_cache
+        from app.spotify import TRACK_MISS_CACHE_TTL
+        
+        client = SpotifyClient()
+        client.sp = MagicMock()
+        client.sp.search.return_value = {'tracks': {'items': []}}
+        
+        assert client.search_song("Nonexistent Song", "2024") is None
+        
+        value, expires_at = get_cache("track").backend._data["track:v5|nonexistent song||2024"]
+        assert value == '{"uri": null}'
+        assert expires_at == 1000.0 + TRACK_MISS_CACHE_TTL
+    
+    @patch.dict('os.environ', {
+        'SPOTIPY_CLIENT_ID': 'test_id',
+        'SPOTIPY_CLIENT_SECRET': 'test_secret',
+        'SPOTIPY_REDIRECT_URI': 'http://localhost:8080/callback'
+    })
+    def test_cached_miss_skips_search(self):
+        """Test czy zapamiętany brak wyniku nie wymaga wyszukiwania"""
+        client = SpotifyClient()
+        client.sp = MagicMock()
+        client.sp.search.return_value = {'tracks': {'items': []}}
+        
+        assert client.search_song("Nonexistent Song", "2024") is None
+        assert client.search_song("Nonexistent Song", "2024") is None
+        
+        client.sp.search.assert_called_once()
+    
+    @patch.dict('os.environ', {
+        'SPOTIPY_CLIENT_ID': 'test_id',
+        'SPOTIPY_CLIENT_SECRET': 'test_secret',
+        'SPOTIPY_REDIRECT_URI': 'http://localhost:8080/callback'
+    })
+    def test_resolve_songs_keeps_order(self):
+        """Test czy równoległe wyszukiwanie zachowuje kolejność listy"""
+        import time as time_module
+        
+        def fake_search(q, type):
+            # Pierwsze utwory odpowiadają najwolniej
+            number = int(q.split()[1])
+            time_module.sleep((10 - number) * 0.002)
+            return {'tracks': {'items': [] if number == 3 else [{'uri': f'spotify:track:{number}'}]}}
+        
+        client = SpotifyClient(max_workers=4)
+        client.sp = MagicMock()
+        client.sp.search.side_effect = fake_search
+        
+        uris = client.resolve_songs([f"Song {i}" for i in range(10)], "2024")
+        
+        assert uris == [None if i == 3 else f'spotify:track:{i}' for i in range(10)]
+        assert client.sp.search.call_count == 10
+    
+    @patch.dict('os.environ', {
+        'SPOTIPY_CLIENT_ID': 'test_id',
+        'SPOTIPY_CLIENT_SECRET': 'test_secret',
+        'SPOTIPY_REDIRECT_URI': 'http://localhost:8080/callback',
+        'SPOTIFY_SEARCH_WORKERS': '3'
+    })
+    def test_max_workers_from_env(self):
+        """Test konfiguracji liczby wątków przez zmienną środowiskową"""
+        assert SpotifyClient().max_workers == 3
+        assert SpotifyClient(max_workers=5).max_workers == 5
+    
+    @patch.dict('os.environ', {
+        'SPOTIPY_CLIENT_ID': 'test_id',
+        'SPOTIPY_CLIENT_SECRET': 'test_secret',
+        'SPOTIPY_REDIRECT_URI': 'http://localhost:8080/callback'
+    })
+    @patch('app.rate_limit.time')
+    def test_search_retries_after_rate_limit(self, mock_time):
+        """Test czy po 429 czekamy Retry-After i ponawiamy zapytanie"""
+        from spotipy.exceptions import SpotifyException
+        
+        clock = [1000.0]
+        mock_time.monotonic.side_effect = lambda: clock[0]
+        mock_time.sleep.side_effect = lambda seconds: clock.__setitem__(0, clock[0] + seconds)
+        
+        client = SpotifyClient()
+        client.sp = MagicMock()
+        client.sp.search.side_effect = [
+            SpotifyException(429, -1, "rate limited", headers={"Retry-After": "2"}),
+            {'tracks': {'items': [{'uri': 'spotify:track:abc'}]}}
+        ]
+        
+        assert client.search_song("Test Song", "2024") == 'spotify:track:abc'
+        mock_time.sleep.assert_called_once_with(2.0)
+        assert client.sp.search.call_count == 2
+    
+    @patch.dict('os.environ', {
+        'SPOTIPY_CLIENT_ID': 'test_id',
+        'SPOTIPY_CLIENT_SECRET': 'test_secret',
+        'SPOTIPY_REDIRECT_URI': 'http://localhost:8080/callback'
+    })
+    def test_search_other_errors_not_retried(self):
+        """Test czy inne błędy niż 429 nie są ponawiane"""
+        from spotipy.exceptions import SpotifyException
+        
+        client = SpotifyClient()
+        client.sp = MagicMock()
+        client.sp.search.side_effect = SpotifyException(500, -1, "server error")
+        
+        with pytest.raises(SpotifyException):
+            client.search_song("Test Song", "2024")
+        assert client.sp.search.call_count == 1
+    
+    @patch.dict('os.environ', {
+        'SPOTIPY_CLIENT_ID': 'test_id',
+        'SPOTIPY_CLIENT_SECRET': 'test_secret',
+        'SPOTIPY_REDIRECT_URI': 'http://localhost:8080/callback'
+    })
+    def test_add_tracks_in_chunks(self):
+        """Test dodawania utworów paczkami po 100"""
+        client = SpotifyClient()
+        client.sp = MagicMock()
+        uris = [f'spotify:track:{i}' for i in range(250)]
+        
+        client.add_tracks('playlist123', uris)
+        
+        calls = client.sp.playlist_add_items.call_args_list
+        assert [len(c[1]['items']) for c in calls] == [100, 100, 50]
+        assert [uri for c in calls for uri in c[1]['items']] == uris
+    
+    @patch.dict('os.environ', {
+        'SPOTIPY_CLIENT_ID': 'test_id',
+        'SPOTIPY_CLIENT_SECRET': 'test_secret',
+        'SPOTIPY_REDIRECT_URI': 'http://localhost:8080/callback'
+    })
+    @patch('app.spotify.time.sleep')
+    def test_add_tracks_retries_failed_chunk(self, mock_sleep):
+        """Test ponawiania tylko paczki, która się nie powiodła"""
+        from spotipy.exceptions import SpotifyException
+        
+        client = SpotifyClient()
+        client.sp = MagicMock()
+        client.sp.playlist_add_items.side_effect = [None, SpotifyException(502, -1, "bad gateway"), None]
+        uris = [f'spotify:track:{i}' for i in range(150)]
+        
+        client.add_tracks('playlist123', uris)
+        
+        calls = client.sp.playlist_add_items.call_args_list
+        assert len(calls) == 3
+        assert calls[1][1]['items'] == calls[2][1]['items'] == uris[100:]
+    
+    @patch.dict('os.environ', {
+        'SPOTIPY_CLIENT_ID': 'test_id',
+        'SPOTIPY_CLIENT_SECRET': 'test_secret',
+        'SPOTIPY_REDIRECT_URI': 'http://localhost:8080/callback'
+    })
+    @patch('app.spotify.time.sleep')
+    def test_add_tracks_permanent_errors_not_retried(self, mock_sleep):
+        """Test, że błędy 4xx i przekroczony czas odpowiedzi nie są ponawiane"""
+        import requests
+        from spotipy.exceptions import SpotifyException
+        
+        for error in (SpotifyException(403, -1, "forbidden"), requests.exceptions.ReadTimeout("timeout")):
+            client = SpotifyClient()
+            client.sp = MagicMock()
+            client.sp.playlist_add_items.side_effect = error
+            
+            with pytest.raises(type(error)):
+                client.add_tracks('playlist123', ['spotify:track:1'])
+            assert client.sp.playlist_add_items.call_count == 1
+        mock_sleep.assert_not_called()
+    
+    @patch.dict('os.environ', {
+        'SPOTIPY_CLIENT_ID': 'test_id',
+        'SPOTIPY_CLIENT_SECRET': 'test_secret',
+        'SPOTIPY_REDIRECT_URI': 'http://localhost:8080/callback'
+    })
+    @patch('app.spotify.time.sleep')
+    def test_add_tracks_retries_unsent_request(self, mock_sleep):
+        """Test ponowienia, gdy nie udało się nawiązać połączenia"""
+        import requests
+        
+        client = SpotifyClient()
+        client.sp = MagicMock()
+        client.sp.playlist_add_items.side_effect = [requests.exceptions.ConnectTimeout("connect"), None]
+        
+        client.add_tracks('playlist123', ['spotify:track:1'])
+        
+        assert client.sp.playlist_add_items.call_count == 2
+    
+    @patch.dict('os.environ', {
+        'SPOTIPY_CLIENT_ID': 'test_id',
+        'SPOTIPY_CLIENT_SECRET': 'test_secret',
+        'SPOTIPY_REDIRECT_URI': 'http://localhost:8080/callback'
+    })
+    def test_create_playlist_over_100_songs(self):
+        """Test playlisty z ponad 100 utworami - kilka wywołań playlist_add_items"""
+        client = SpotifyClient(max_workers=4)
+        
+        mock_sp = MagicMock()
+        mock_sp.current_user.return_value = {'id': 'user123'}
+        mock_sp.search.side_effect = lambda q, type: {
+            'tracks': {'items': [{'uri': f"spotify:track:{q.split()[1]}"}]}
+        }
+        mock_sp.user_playlist_create.return_value = {
+            'id': 'playlist123',
+            'external_urls': {'spotify': 'https://spotify.com/playlist/123'}
+        }
+        client.sp = mock_sp
+        
+        client.create_playlist_from_songs("2024-01-15", [f"Song {i}" for i in range(150)])
+        
+        calls = mock_sp.playlist_add_items.call_args_list
+        added = [uri for c in calls for uri in c[1]['items']]
+        # Znalezione utwory dodawane są paczkami po PLAYLIST_FLUSH_SIZE w trakcie wyszukiwania
+        assert [len(c[1]['items']) for c in calls] == [25] * 6
+        assert added == [f'spotify:track:{i}' for i in range(150)]
+    
+    @patch.dict('os.environ', {
+        'SPOTIPY_CLIENT_ID': 'test_id',
+        'SPOTIPY_CLIENT_SECRET': 'test_secret',
+        'SPOTIPY_REDIRECT_URI': 'http://localhost:8080/callback'
+    })
+    def test_search_song_with_artist(self):
+        """Test wyszukiwania po tytule i głównym wykonawcy"""
+        client = SpotifyClient()
+        client.sp = MagicMock()
+        client.sp.search.return_value = {'tracks': {'items': [{'uri': 'spotify:track:abc'}]}}
+        
+        uri = client.search_song("Lovin On Me", "2024", artist="Jack Harlow Featuring Someone")
+        
+        assert uri == 'spotify:track:abc'
+        client.sp.search.assert_called_once_with(
+            q='track:Lovin On Me artist:Jack Harlow',
+            type='track'
+        )
+    
+    @patch.dict('os.environ', {
+        'SPOTIPY_CLIENT_ID': 'test_id',
+        'SPOTIPY_CLIENT_SECRET': 'test_secret',
+        'SPOTIPY_REDIRECT_URI': 'http://localhost:8080/callback'
+    })
+    def test_search_keeps_band_name(self):
+        """Test, że "&" i przecinek w nazwie zespołu zostają w zapytaniu"""
+        client = SpotifyClient()
+        client.sp = MagicMock()
+        client.sp.search.return_value = {'tracks': {'items': [{'uri': 'spotify:track:abc'}]}}
+        
+        client.search_song("September", "1978", artist="Earth, Wind & Fire")
+        client.search_song("The Boxer", "1969", artist="Simon & Garfunkel Featuring Guest")
+        
+        assert [c[1]['q'] for c in client.sp.search.call_args_list] == [
+            'track:September artist:Earth, Wind & Fire',
+            'track:The Boxer artist:Simon & Garfunkel',
+        ]
+    
+    @patch.dict('os.environ', {
+        'SPOTIPY_CLIENT_ID': 'test_id',
+        'SPOTIPY_CLIENT_SECRET': 'test_secret',
+        'SPOTIPY_REDIRECT_URI': 'http://localhost:8080/callback'
+    })
+    def test_resolve_chart_entries(self):
+        """Test wyszukiwania pozycji listy (ChartEntry) z wykonawcą"""
+        from app.models import ChartEntry
+        
+        client = SpotifyClient(max_workers=1)
+        client.sp = MagicMock()
+        client.sp.search.return_value = {'tracks': {'items': [{'uri': 'spotify:track:abc'}]}}
+        
+        client.resolve_songs([ChartEntry(1, "Paint The Town Red", "Doja Cat")], "2024")
+        
+        client.sp.search.assert_called_once_with(
+            q='track:Paint The Town Red artist:Doja Cat',
+            type='track'
+        )
+
+
+def _playlist_client():
+    """Klient z atrapą spotipy, który wyszukuje każdy tytuł jako osobny utwór"""
+    client = SpotifyClient(max_workers=1)
+    client.sp = MagicMock()
+    client.sp.current_user.return_value = {'id': 'user123'}
+    client.sp.search.side_effect = lambda q, type: {
+        'tracks': {'items': [{'uri': f"spotify:track:{q.split()[1]}"}]}
+    }
+    client.sp.user_playlist_create.return_value = {
+        'id': 'playlist123',
+        'external_urls': {'spotify': 'https://spotify.com/playlist/123'}
+    }
+    return client
+
+
+class TestRangePlaylist:
+    """Testy playlisty z wielu tygodni"""
+    
+    def test_same_uri_added_once(self):
+        """Test, że dwa wpisy z tym samym URI trafiają do playlisty raz"""
+        from app.models import ChartEntry
+        client = _playlist_client()
+        client.sp.search.side_effect = lambda q, type: {
+            'tracks': {'items': [{'uri': 'spotify:track:same' if 'Same' in q else f"spotify:track:{q.split()[0]}"}]}
+        }
+        songs = [("1985-01-05", ChartEntry(1, "Same", "A")), ("1985-01-05", ChartEntry(2, "Same Song", "A")),
+                 ("1985-01-12", ChartEntry(3, "Other", "B"))]
+        
+        url = client.create_playlist_from_range("1985-01-01", "1985-12-31", songs, top=1)
+        
+        assert url == 'https://spotify.com/playlist/123'
+        client.sp.playlist_add_items.assert_called_once_with(
+            playlist_id='playlist123', items=['spotify:track:same', 'spotify:track:track:Other']
+        )
+        assert client.sp.user_playlist_create.call_args.kwargs['name'] == "1985-01-01 - 1985-12-31 Billboard Hot 100 Top 1"
+    
+    def test_search_uses_year_of_each_week(self):
+        """Test, że utwory bez wykonawcy szukane są z rokiem swojego tygodnia"""
+        client = _playlist_client()
+        songs = [("1985-12-28", "Song A"), ("1986-01-04", "Song B")]
+        
+        client.create_playlist_from_range("1985-12-25", "1986-01-04", songs, top=1)
+        
+        assert sorted(c.kwargs['q'] for c in client.sp.search.call_args_list) == [
+            'track:Song A year:1985', 'track:Song B year:1986'
+        ]
+
+
+class TestChartPlaylists:
+    """Testy playlist z innych list niż Hot 100"""
+    
+    def test_other_chart_reuses_found_tracks(self):
+        """Test, że utwory znalezione dla jednej listy nie są szukane dla innej"""
+        songs = ["Song 1", "Song 2"]
+        _playlist_client().create_playlist_from_songs("2024-01-15", songs)
+        
+        client = _playlist_client()
+        client.create_playlist_from_songs("2024-01-15", songs, chart_id="country-songs")
+        
+        client.sp.search.assert_not_called()
+        assert client.sp.user_playlist_create.call_args.kwargs['name'] == "2024-01-15 Hot Country Songs"
+    
+    def test_resolved_lists_kept_per_chart(self):
+        """Test, że gotowe listy URI różnych list mają osobne wpisy"""
+        from app.cache import get_cache
+        _playlist_client().create_playlist_from_songs("2024-01-15", ["Song 1"])
+        _playlist_client().create_playlist_from_songs("2024-01-15", ["Song 2"], chart_id="country-songs")
+        
+        resolved = get_cache("resolved")
+        assert resolved.get("v5|2024-01-20")["uris"] == ["spotify:track:1"]
+        assert resolved.get("v5|country-songs|2024-01-20")["uris"] == ["spotify:track:2"]
+
+
+class TestTrackIndexLookup:
+    """Testy korzystania z lokalnego indeksu przy wyszukiwaniu"""
+    
+    def test_variant_title_skips_search(self):
+        """Test, że utwór znaleziony wcześniej pod inną nazwą nie jest szukany ponownie"""
+        client = SpotifyClient(max_workers=1)
+        client.sp = MagicMock()
+        client.sp.search.return_value = {'tracks': {'items': [{'uri': 'spotify:track:abc'}]}}
+        
+        first = client.search_song("Dont Stop Believin'", "1981", "Journey")
+        second = client.search_song("Don't Stop Believin", "1982", "Journey")
+        
+        assert first == second == 'spotify:track:abc'
+        client.sp.search.assert_called_once()
+    
+    def test_without_artist_always_searches(self):
+        """Test, że bez wykonawcy indeks nie jest używany"""
+        client = SpotifyClient(max_workers=1)
+        client.sp = MagicMock()
+        client.sp.search.return_value = {'tracks': {'items': [{'uri': 'spotify:track:abc'}]}}
+        
+        client.search_song("Hello", "2015")
+        client.search_song("Hello!", "2016")
+        
+        assert client.sp.search.call_count == 2
+
+
+class TestResolvedChartCache:
+    """Testy zapisu gotowych list URI dla tygodnia notowania"""
+    
+    def test_repeat_build_skips_search(self):
+        """Test, że druga playlista z tego samego tygodnia nie wyszukuje utworów"""
+        songs = [f"Song {i}" for i in range(3)]
+        _playlist_client().create_playlist_from_songs("2024-01-15", songs)
+        
+        client = _playlist_client()
+        progress = MagicMock()
+        with patch.object(SpotifyClient, 'iter_resolved') as mock_resolve:
+            client.create_playlist_from_songs("2024-01-18", songs, progress=progress)
+        
+        mock_resolve.assert_not_called()
+        client.sp.user_playlist_create.assert_called_once()
+        client.sp.playlist_add_items.assert_called_once_with(
+            playlist_id='playlist123',
+            items=['spotify:track:0', 'spotify:track:1', 'spotify:track:2']
+        )
+        progress.assert_called_with(3, 3)
+    
+    def test_different_songs_are_resolved_again(self):
+        """Test, że zmieniona lista tygodnia nie używa starych URI"""
+        _playlist_client().create_playlist_from_songs("2024-01-15", ["Song 1"])
+        
+        client = _playlist_client()
+        client.create_playlist_from_songs("2024-01-15", ["Song 1", "Song 2"])
+        
+        added = client.sp.playlist_add_items.call_args[1]['items']
+        assert added == ['spotify:track:1', 'spotify:track:2']
+    
+    def test_matching_version_change_invalidates(self):
+        """Test, że nowa wersja dopasowania nie korzysta z zapisanych wyników"""
+        _playlist_client().create_playlist_from_songs("2024-01-15", ["Song 1"])
+        
+        client = _playlist_client()
+        with patch('app.spotify.MATCHING_VERSION', 6):
+            client.create_playlist_from_songs("2024-01-15", ["Song 1"])
+        
+        client.sp.search.assert_called_once()
+
+
+class TestTokenManagement:
+    """Testy współdzielonego OAuth i odświeżania tokenów"""
+    
+    @patch('app.spotify.SpotifyOAuth')
+    def test_oauth_manager_shared_in_process(self, mock_oauth):
+        """Test czy SpotifyOAuth tworzony jest raz na proces"""
+        client = SpotifyClient()
+        with patch('app.spotify.session', {}):
+            client.get_auth_url()
+            SpotifyClient().get_auth_url()
+            SpotifyClient().fetch_token('code')
+        
+        mock_oauth.assert_called_once()
+    
+    @patch('app.spotify.time.time', return_value=1000.0)
+    def test_token_refreshed_before_expiry(self, mock_time):
+        """Test odświeżenia tokenu, który zaraz wygaśnie"""
+        from app.spotify import UserToken
+        oauth = MagicMock()
+        oauth.refresh_access_token.return_value = {
+            'access_token': 'new_token', 'refresh_token': 'refresh', 'expires_at': 4600
+        }
+        token = UserToken({'access_token': 'old_token', 'refresh_token': 'refresh',
+                           'expires_at': 1060}, oauth)
+        
+        assert token.get_access_token() == 'new_token'
+        assert token.get_access_token() == 'new_token'
+        oauth.refresh_access_token.assert_called_once_with('refresh')
+    
+    @patch('app.spotify.time.time', return_value=1000.0)
+    def test_valid_token_not_refreshed(self, mock_time):
+        """Test czy ważny token nie jest odświeżany"""
+        from app.spotify import UserToken
+        oauth = MagicMock()
+        token = UserToken({'access_token': 'token', 'refresh_token': 'refresh',
+                           'expires_at': 4600}, oauth)
+        
+        assert token.get_access_token() == 'token'
+        oauth.refresh_access_token.assert_not_called()
+    
+    @patch('app.spotify.SpotifyOAuth')
+    def test_spotipy_client_shared_per_user(self, mock_oauth):
+        """Test czy obiekt spotipy jest współdzielony dla tego samego użytkownika"""
+        alice = {'access_token': 'a', 'refresh_token': 'alice'}
+        bob = {'access_token': 'b', 'refresh_token': 'bob'}
+        
+        first = SpotifyClient(token_info=alice)._client()
+        second = SpotifyClient(token_info=dict(alice, access_token='a2'))._client()
+        other = SpotifyClient(token_info=bob)._client()
+        
+        assert first is second
+        assert first is not other
+        assert other.auth_manager.get_access_token() == 'b'
@@ -0,0 +1,110 @@
+"""
+Testy dla lokalnego indeksu utworów
+"""
+import pytest
+from unittest.mock import patch
+from app.cache import Cache, MemoryBackend
+from app.track_index import TrackIndex, similarity
+
+
+@pytest.fixture
+def index():
+    """Fixture zwracający pusty indeks w pamięci"""
+    return TrackIndex(Cache("track_index", MemoryBackend()), threshold=0.85)
+
+
+class TestSimilarity:
+    """Testy podobieństwa tytułów"""
+    
+    def test_similarity(self):
+        """Test podobieństwa trigramów"""
+        assert similarity("hello", "hello") == 1.0
+        assert similarity("stop believin", "stop believing") > 0.85
+        assert similarity("hello", "hell") < 0.85
+        assert similarity("baby", "baby baby") < 0.85
+
+
+class TestTrackIndex:
+    """Testy dopisywania i wyszukiwania w indeksie"""
+    
+    def test_match_variant_title(self, index):
+        """Test dopasowania tytułu zapisanego trochę inaczej"""
+        index.add("Don't Stop Believin'", "Journey", "1981", "spotify:track:1")
+        
+        uri, score = index.match("Dont Stop Believing", "Journey Featuring Nobody", "1982")
+        assert uri == "spotify:track:1"
+        assert score > 0.85
+    
+    def test_no_match_below_threshold(self, index):
+        """Test braku dopasowania dla innego tytułu tego samego wykonawcy"""
+        index.add("Open Arms", "Journey", "1982", "spotify:track:1")
+        assert index.match("Separate Ways", "Journey", "1983") is None
+    
+    def test_different_numbers_not_matched(self, index):
+        """Test, że tytuły różniące się liczbą to różne utwory"""
+        index.add("Rock And Roll Part 1", "Gary Glitter", "1972", "spotify:track:1")
+        
+        assert index.match("Rock And Roll Part 2", "Gary Glitter", "1972") is None
+        assert index.match("Rock & Roll Part 1", "Gary Glitter", "1972")[0] == "spotify:track:1"
+    
+    @pytest.mark.parametrize("indexed, title", [
+        ("Baby", "Baby Baby"),
+        ("Sorry", "Sorry Sorry"),
+        ("Girls Girls Girls", "Girls"),
+        ("Yesterday", "Yesterdays"),
+    ])
+    def test_near_miss_titles_not_matched(self, index, indexed, title):
+        """Test, że powtórzone słowa i krótkie tytuły nie łączą różnych utworów"""
+        index.add(indexed, "Artist", "2000", "spotify:track:1")
+        
+        assert index.match(title, "Artist", "2000") is None
+        assert index.match(indexed, "Artist", "2000")[0] == "spotify:track:1"
+    
+    def test_add_waits_for_backend_lock(self, index):
+        """Test, że dopisywanie czeka na blokadę wpisu trzymaną przez inny proces"""
+        backend = index.cache.backend
+        lock_key = "track_index:v1|adele|add"
+        assert backend.acquire_lock(lock_key, 30)
+        
+        # Inny proces zwalnia blokadę, gdy czekamy
+        with patch('app.track_index.time.sleep', side_effect=lambda s: backend.release_lock(lock_key)) as mock_sleep:
+            index.add("Hello", "Adele", "2015", "spotify:track:1")
+        
+        mock_sleep.assert_called_once()
+        assert index.match("Hello", "Adele", "2015")[0] == "spotify:track:1"
+        # Blokada zwolniona po zapisie
+        assert backend.acquire_lock(lock_key, 30)
+    
+    def test_other_artist_not_matched(self, index):
+        """Test, że indeks nie łączy utworów różnych wykonawców"""
+        index.add("Hello", "Adele", "2015", "spotify:track:1")
+        assert index.match("Hello", "Lionel Richie", "1984") is None
+    
+    def test_same_title_replaced(self, index):
+        """Test, że ten sam (po normalizacji) tytuł ma w indeksie jeden wpis"""
+        index.add("Hello (Live)", "Adele", "2016", "spotify:track:live")
+        index.add("Hello", "Adele", "2015", "spotify:track:studio")
+        
+        assert index.cache.get("v1|adele") == [["hello", 2015, "spotify:track:studio"]]
+        assert index.match("Hello", "Adele", "2015") == ("spotify:track:studio", 1.0)
+    
+    def test_without_artist_not_indexed(self, index):
+        """Test pomijania utworów bez wykonawcy"""
+        index.add("Hello", "", "2015", "spotify:track:1")
+        assert index.match("Hello", "", "2015") is None
+    
+    def test_versions_are_separate(self):
+        """Test oddzielenia wpisów różnych wersji dopasowania"""
+        cache = Cache("track_index", MemoryBackend())
+        TrackIndex(cache, version=1).add("Hello", "Adele", "2015", "spotify:track:1")
+        assert TrackIndex(cache, version=2).match("Hello", "Adele", "2015") is None
+    
+    @patch.dict('os.environ', {'TRACK_INDEX_THRESHOLD': '1'})
+    def test_threshold_from_env(self):
+        """Test progu z zmiennej środowiskowej - 1 to tylko dokładne dopasowanie"""
+        index = TrackIndex(Cache("track_index", MemoryBackend()))
+        index.add("Don't Stop Believin'", "Journey", "1981", "spotify:track:1")
+        
+        assert index.threshold == 1.0
+        assert index.match("Dont Stop Believing", "Journey", "1981") is None
+        assert index.match("DONT STOP BELIEVIN", "Journey", "1981")[0] == "spotify:track:1"
@@ -2,8 +2,12 @@
 Testy dla modułu utils
 """
 import pytest
+from datetime import datetime
+from unittest.mock import patch
 from app.utils import (
     validate_date,
+    chart_week,
+    iter_chart_weeks,
     clean_song_title,
     chunk_list,
     safe_int,
@@ -39,6 +43,72 @@ class TestValidateDate:
         assert validate_date("2024") is False
 
 
+class TestChartWeek:
+    """Testy zamiany daty na datę notowania"""
+    
+    def test_rounds_to_saturday(self):
+        """Test zaokrąglania do soboty tego samego tygodnia"""
+        assert chart_week("2024-01-14") == "2024-01-20"
+        assert chart_week("2024-01-15") == "2024-01-20"
+        assert chart_week("2024-01-20") == "2024-01-20"
+        assert chart_week("2024-01-21") == "2024-01-27"
+    
+    def test_monday_charts_before_1962(self):
+        """Test notowań datowanych na poniedziałek przed 1962"""
+        assert chart_week("1958-08-05") == "1958-08-11"
+        assert chart_week("1961-12-25") == "1961-12-25"
+        assert chart_week("1961-12-28") == "1962-01-06"
+    
+    def test_before_first_chart(self):
+        """Test dat sprzed pierwszego notowania"""
+        assert chart_week("1950-01-01") == "1958-08-04"
+    
+    def test_unpublished_week_clamped(self):
+        """Test, że niedziela i poniedziałek dają ostatnie opublikowane notowanie"""
+        # Notowanie z 2024-01-20 publikowane jest we wtorek 2024-01-16
+        with patch('app.utils._today', return_value=datetime(2024, 1, 14)):
+            assert chart_week("2024-01-14") == "2024-01-13"
+        with patch('app.utils._today', return_value=datetime(2024, 1, 15)):
+            assert chart_week("2024-01-15") == "2024-01-13"
+            assert chart_week("2025-06-01") == "2024-01-13"
+        with patch('app.utils._today', return_value=datetime(2024, 1, 16)):
+            assert chart_week("2024-01-16") == "2024-01-20"
+    
+    def test_invalid_input(self):
+        """Test niepoprawnej daty"""
+        assert chart_week("") is None
+        assert chart_week("2024-13-01") is None
+        assert chart_week(None) is None
+
+
+class TestIterChartWeeks:
+    """Testy kolejnych dat notowań"""
+    
+    def test_weekly_range(self):
+        """Test zakresu kilku tygodni"""
+        assert list(iter_chart_weeks("2024-01-01", "2024-01-20")) == [
+            "2024-01-06", "2024-01-13", "2024-01-20"
+        ]
+    
+    def test_switch_from_monday_to_saturday(self):
+        """Test przejścia z poniedziałków na soboty na przełomie 1961/1962"""
+        assert list(iter_chart_weeks("1961-12-18", "1962-01-13")) == [
+            "1961-12-18", "1961-12-25", "1962-01-06", "1962-01-13"
+        ]
+    
+    def test_invalid_range(self):
+        """Test niepoprawnego zakresu"""
+        with pytest.raises(ValueError):
+            list(iter_chart_weeks("bad", "2024-01-01"))
+    
+    def test_stops_at_latest_published_week(self):
+        """Test zakresu kończącego się w przyszłości"""
+        with patch('app.utils._today', return_value=datetime(2024, 1, 15)):
+            assert list(iter_chart_weeks("2024-01-01", "2024-03-01")) == [
+                "2024-01-06", "2024-01-13"
+            ]
+
+
 class TestCleanSongTitle:
     """Testy czyszczenia tytułów piosenek"""
     
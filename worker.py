@@ -0,0 +1,10 @@
+"""
+Worker wykonujący zadania z kolejki Redis (JOB_QUEUE=redis://...).
+
+Uruchomienie:
+    python worker.py
+"""
+from app import jobs
+
+if __name__ == "__main__":
+    jobs.run_worker()